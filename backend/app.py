@@ -1,9 +1,20 @@
-from flask import request, jsonify
-from config import app, db, bcrypt
-from models import User, PasswordResetToken, Event
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask import request, jsonify, make_response, send_file, Response, stream_with_context
+from config import app, db, email_outbox, event_search, event_stats, identity_cache, metrics, photo_service, rate_limiter, response_cache, revocation_store
+from revocation import family_key
+from models import User, PasswordResetToken, Event, EventTombstone, OutboxMessage, Photo
+from serializers import event_serializer
+from stats import StatsDelta, apply_stats_delta, parse_month, summarize
+from maintenance import delete_account_rows
+from photos import PHOTO_HASH, PHOTO_SIZES, PHOTO_URL_PREFIX, PhotoError, photo_urls
+from geo import covering_prefixes, encode_geohash, haversine_m, radius_bbox, split_bbox
+from flask_jwt_extended import create_access_token, create_refresh_token, current_user, get_jwt, jwt_required, get_jwt_identity
+from sqlalchemy import and_, delete, func, insert, or_, select, tuple_, update
+import base64
+import json
 import secrets
-from datetime import datetime
+import time
+from functools import wraps
+from datetime import datetime, timedelta
 # from transformers import pipeline  # Import transformers
 
 # # Add the sentiment analysis pipeline
@@ -26,6 +37,7 @@ from datetime import datetime
 #         return jsonify({'error': str(e)}), 500
 
 @app.post('/api/forgot-password')
+@rate_limiter.limit("forgot_password")
 def forgot_password():
     data = request.get_json() or {}
 
@@ -40,15 +52,19 @@ def forgot_password():
     reset_token = secrets.token_hex(16)
     reset_entry = PasswordResetToken(user_id=user.id, token=reset_token)
     db.session.add(reset_entry)
+    # ✅ Queued in the same transaction as the token; the outbox worker sends it after we respond
+    email_outbox.enqueue(
+        user.email,
+        "Reset your LoveLog password",
+        f"Use this link within 15 minutes to choose a new password:\nhttps://your-app.com/reset-password?token={reset_token}",
+    )
     db.session.commit()
-
-    
-    # ✅ Instead of returning the token, pretend we are sending an email
-    print(f"📧 Sending email to {user.email} with reset link: https://your-app.com/reset-password?token={reset_token}")
+    email_outbox.notify()
 
     return jsonify({"message": "If your email exists, a password reset link has been sent!"}), 200
 
 @app.post('/api/reset-password')
+@rate_limiter.limit("reset_password", heavy=True)
 def reset_password():
     data = request.get_json() or {}
 
@@ -64,29 +80,78 @@ def reset_password():
     if not user:
         return jsonify({"error": "User not found"}), 404
 
-    # 🔹 Hash the new password before storing it (SECURITY FIX)
-    hashed_password = bcrypt.generate_password_hash(data['new_password']).decode('utf-8')
-    user.password = hashed_password  
+    # 🔹 The setter hashes the new password before storing it (SECURITY FIX)
+    user.password = data['new_password']
+    user.token_version += 1  # 🔑 Whoever knew the old password loses their sessions too
 
     db.session.delete(reset_entry)  # ✅ Remove the used token
+    User.bump_data_version(user.id)
     db.session.commit()
+    response_cache.invalidate_user(user.id)  # Keeps cached ETags in step with the bumped version
+    identity_cache.invalidate(user.id)
 
     return jsonify({"message": "Password reset successful!"}), 200
 
 
+def user_version_response(user_id, data_version, render):
+    """render()'s response tagged with the u<id>-v<data_version> ETag, or a bare 304 if the client has it."""
+    etag = f"u{user_id}-v{data_version}"
+    if request.if_none_match.contains_weak(etag):  # Compressed / msgpack responses carry it as W/"..."
+        response = make_response("", 304)
+    else:
+        response = make_response(render())
+        if response.status_code != 200:
+            return response
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def etag_from_user_version(view):
+    """Answer 304 from users.data_version alone when the client's ETag is still current.
+
+    Must sit below @jwt_required(). Reads the single data_version column by primary key.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        data_version = db.session.scalar(select(User.data_version).where(User.id == current_user.id))
+        if data_version is None:
+            return view(*args, **kwargs)
+        return user_version_response(current_user.id, data_version, lambda: view(*args, **kwargs))
+    return wrapper
+
+
+# 📈 Prometheus scrape endpoint
+@app.get('/metrics')
+def prometheus_metrics():
+    token = app.config.get('METRICS_TOKEN')
+    if not token:
+        # 🔒 Route names, error rates and cache sizes aren't for the public: no token, no scrape outside dev
+        if not (app.debug or app.testing):
+            return jsonify({"error": "Set METRICS_TOKEN to enable /metrics"}), 403
+    elif not secrets.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return jsonify({"error": "Unauthorized"}), 401
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
 # ✅ Protected route to get logged-in user
 @app.get('/api/user')  
 @jwt_required()  
+@response_cache.cached
 def get_logged_in_user():
-    current_user_id = get_jwt_identity()
-    user = db.session.get(User, current_user_id)
-    if user:
-        return jsonify({"id": user.id, "email": user.email}), 200
-    return jsonify({"error": "User not found"}), 404
+    # 🔹 Body and ETag from one row, so a stale identity cache in this worker can't pair an old email with a new version
+    user = db.session.execute(
+        select(User.id, User.email, User.data_version).where(User.id == current_user.id)
+    ).first()
+    if user is None:
+        return jsonify({"error": "User not found"}), 404
+    return user_version_response(user.id, user.data_version, lambda: (jsonify({"id": user.id, "email": user.email}), 200))
 
 
 # ✅ Signup Route
 @app.post('/api/signup')
+@rate_limiter.limit("signup", heavy=True)
 def signup():
     data = request.get_json() or {}
 
@@ -97,17 +162,15 @@ def signup():
         return jsonify({"error": "User already exists"}), 400
 
     new_user = User(email=data['email'])
-    new_user.password = bcrypt.generate_password_hash(data['password']).decode('utf-8')  # ✅ Hash password
+    new_user.password = data['password']  # ✅ Setter hashes the password
 
     db.session.add(new_user)
     db.session.commit()
 
-    access_token = create_access_token(identity=new_user.id)
-
     return jsonify({
         "message": "User created successfully",
         "id": new_user.id,
-        "access_token": access_token
+        **issue_tokens(new_user),
     }), 201
 
 
@@ -116,8 +179,8 @@ def signup():
 def update_user():
     """Update user email or password"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        current_user_id = current_user.id
+        user = db.session.get(User, current_user_id)
 
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -139,10 +202,15 @@ def update_user():
             new_password = data["password"].strip()
             if len(new_password) < 6:
                 return jsonify({"error": "Password must be at least 6 characters"}), 400
-            user.password = bcrypt.generate_password_hash(new_password).decode("utf-8")
+            user.password = new_password  # ✅ Setter hashes the password
+            user.token_version += 1  # 🔑 Signs out every other session; this one gets fresh tokens below
 
+        User.bump_data_version(user.id)
         db.session.commit()
-        return jsonify({"message": "User updated successfully"}), 200
+        response_cache.invalidate_user(user.id)
+        identity_cache.invalidate(user.id)
+        tokens = issue_tokens(user) if "password" in data else {}
+        return jsonify({"message": "User updated successfully", **tokens}), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -150,24 +218,65 @@ def update_user():
 @app.delete('/api/user/delete')
 @jwt_required()
 def delete_user():
-    """Delete the logged-in user account"""
+    """Delete the logged-in user account and everything it owns.
+
+    Set-based DELETEs in one transaction for ordinary accounts. Accounts with more than
+    ACCOUNT_DELETE_INLINE_MAX_EVENTS events are closed right away (login, tokens and the
+    email address stop working) and purged in chunks by the maintenance scheduler (202).
+    """
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        current_user_id = current_user.id
+        user = db.session.get(User, current_user_id)
 
         if not user:
             return jsonify({"error": "User not found"}), 404
 
-        db.session.delete(user)
+        # 🔹 Bounded count: we only need to know whether the account is over the inline limit
+        inline_limit = app.config["ACCOUNT_DELETE_INLINE_MAX_EVENTS"]
+        event_count = db.session.scalar(select(func.count()).select_from(
+            select(Event.id).where(Event.user_id == current_user_id).limit(inline_limit + 1).subquery()
+        ))
+        # Queued emails (e.g. a password reset) must not go out for a deleted account
+        db.session.execute(delete(OutboxMessage).where(OutboxMessage.recipient == user.email, OutboxMessage.status == "pending"))
+
+        if event_count <= inline_limit:
+            delete_account_rows(db, current_user_id)
+            message, status = "User deleted successfully", 200
+        else:
+            # ✅ Free the email and kill the password now; events etc. go in the background
+            db.session.execute(delete(PasswordResetToken).where(PasswordResetToken.user_id == current_user_id))
+            user.email = f"deleted-{current_user_id}@deleted.invalid"
+            user.password_hash = "!"
+            user.token_version += 1
+            user.deleted_at = datetime.utcnow()
+            message, status = "User deleted successfully; remaining data is being removed in the background", 202
+
         db.session.commit()
-        return jsonify({"message": "User deleted successfully"}), 200
+        response_cache.invalidate_user(current_user_id)
+        identity_cache.invalidate(current_user_id)
+        return jsonify({"message": message}), status
 
     except Exception as e:
+        db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
 
+def issue_tokens(user, family=None, family_started=None):
+    """Access token, plus a refresh token tagged with its rotation chain and when the chain began.
+
+    Both carry the user's token_version as "ver", so bumping it retires every token issued before.
+    """
+    version = {"ver": user.token_version}
+    chain = {"fam": family or secrets.token_hex(8), "fam_iat": family_started or int(time.time())}
+    return {
+        "access_token": create_access_token(identity=user.id, additional_claims=version),
+        "refresh_token": create_refresh_token(identity=user.id, additional_claims={**version, **chain}),
+    }
+
+
 # ✅ Login Route
 @app.post('/api/login')
+@rate_limiter.limit("login", heavy=True)
 def login():
     data = request.get_json() or {}
 
@@ -177,45 +286,177 @@ def login():
     user = User.query.filter_by(email=data['email']).first()
 
     if user and user.check_password(data['password']):  # ✅ Use the check_password method
-        access_token = create_access_token(identity=user.id)  
+        # 🔹 Cost factor changed since this hash was made: upgrade it while we have the plaintext
+        if user.password_needs_rehash():
+            user.password = data['password']
+            db.session.commit()
+
         return jsonify({
             "message": "Login successful!",
-            "access_token": access_token
+            **issue_tokens(user),
         }), 200
 
     return jsonify({"error": "Invalid credentials"}), 401
 
 
+# ✅ Refresh Route: renew tokens with an HMAC check instead of a bcrypt login
+@app.post('/api/token/refresh')
+@jwt_required(refresh=True)
+def refresh_tokens():
+    """Swap a refresh token for a new access + refresh pair; the presented one is revoked."""
+    token = get_jwt()
+    # 🔑 current_user may come from another worker's cache: re-read the version before minting
+    token_version = db.session.scalar(
+        select(User.token_version).where(User.id == current_user.id, User.deleted_at.is_(None))
+    )
+    if token_version is None or token.get("ver", 0) != token_version:
+        return jsonify({"error": "Token has been revoked"}), 401
+
+    # Rotation keeps a chain alive only until JWT_REFRESH_FAMILY_MAX_AGE after its login
+    family_started = token.get("fam_iat", token["iat"])
+    if time.time() - family_started > app.config["JWT_REFRESH_FAMILY_MAX_AGE"]:
+        return jsonify({"error": "Session expired, please log in again"}), 401
+
+    if not revocation_store.revoke(token["jti"], token["exp"]):
+        # 🔥 Already rotated: someone else holds a copy, so end the whole chain
+        expires_at = time.time() + app.config["JWT_REFRESH_TOKEN_EXPIRES"]
+        revocation_store.revoke(family_key(token), expires_at)
+        return jsonify({"error": "Token has been revoked"}), 401
+
+    return jsonify(issue_tokens(current_user, family=token.get("fam") or token["jti"], family_started=family_started)), 200
+
+
+# 🔹 Page size limits for windowed / paginated event reads
+DEFAULT_EVENTS_PAGE_SIZE = 100
+MAX_EVENTS_PAGE_SIZE = 500
+
+
+def parse_date_value(value):
+    """Parse a YYYY-MM-DD string into a date, raising ValueError if malformed."""
+    return datetime.strptime(value.strip(), "%Y-%m-%d").date()
+
+
+def parse_time_value(value):
+    """Parse HH:MM, HH:MM:SS or a 12-hour "hh:MM AM" string into a time, raising ValueError if malformed."""
+    for fmt in ("%H:%M", "%H:%M:%S", "%I:%M %p"):
+        try:
+            return datetime.strptime(value.strip(), fmt).time()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized time {value!r}")
+
+
+def parse_date_arg(name):
+    """Read an optional YYYY-MM-DD query param, raising ValueError if malformed."""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    return parse_date_value(value)
+
+
+def encode_opaque_token(payload):
+    """Pack a small JSON payload into a URL-safe token clients treat as opaque."""
+    raw = json.dumps(payload).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_opaque_token(token):
+    """Inverse of encode_opaque_token, raising ValueError on anything malformed."""
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except Exception:
+        raise ValueError("Malformed token")
+
+
+def encode_events_cursor(event):
+    """Opaque keyset cursor pointing just past the given event."""
+    return encode_opaque_token([event.date.isoformat(), event.id])
+
+
+def decode_events_cursor(cursor):
+    """Inverse of encode_events_cursor, raising ValueError on anything unexpected."""
+    try:
+        date, event_id = decode_opaque_token(cursor)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(date, str) or not isinstance(event_id, int):
+        raise ValueError("Invalid cursor")
+    try:
+        return parse_date_value(date), event_id
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+
 @app.get('/api/events')
 @jwt_required()
+@response_cache.cached
+@etag_from_user_version
 def get_user_events():
-    """Get all events for the logged-in user."""
+    """Get events for the logged-in user.
+
+    Optional query params:
+      - from / to: inclusive YYYY-MM-DD bounds on the event date
+      - limit: page size (default 100, max 500)
+      - cursor: next_cursor from the previous page
+    Without any of them every event is returned, as before.
+    """
     try:
         current_user_id = get_jwt_identity()  # Get user ID from JWT
-        events = Event.query.filter_by(user_id=current_user_id).all()  # Fetch all events
+
+        try:
+            date_from = parse_date_arg("from")
+            date_to = parse_date_arg("to")
+        except ValueError:
+            return jsonify({"error": "'from' and 'to' must be dates in YYYY-MM-DD format"}), 400
+
+        cursor = request.args.get("cursor")
+        limit = request.args.get("limit")
+        paginated = any(arg is not None for arg in (date_from, date_to, cursor, limit))
+
+        # 🔹 Ordered by (date, id) so the (user_id, date) index serves both the filter and the sort
+        query = Event.query.options(event_serializer.load_only()).filter(Event.user_id == current_user_id)
+        if date_from:
+            query = query.filter(Event.date >= date_from)
+        if date_to:
+            query = query.filter(Event.date <= date_to)
+        query = query.order_by(Event.date, Event.id)
+
+        next_cursor = None
+        if paginated:
+            try:
+                page_size = int(limit) if limit is not None else DEFAULT_EVENTS_PAGE_SIZE
+            except ValueError:
+                return jsonify({"error": "'limit' must be an integer"}), 400
+            if page_size < 1:
+                return jsonify({"error": "'limit' must be a positive integer"}), 400
+            page_size = min(page_size, MAX_EVENTS_PAGE_SIZE)
+
+            if cursor:
+                try:
+                    after_date, after_id = decode_events_cursor(cursor)
+                except ValueError as e:
+                    return jsonify({"error": str(e)}), 400
+                # ✅ Keyset pagination: seek past the last row instead of OFFSET-scanning
+                query = query.filter(tuple_(Event.date, Event.id) > tuple_(after_date, after_id))
+
+            # Fetch one extra row to know whether another page exists
+            events = query.limit(page_size + 1).all()
+            if len(events) > page_size:
+                events = events[:page_size]
+                next_cursor = encode_events_cursor(events[-1])
+        else:
+            events = query.all()  # Fetch all events
         # print("Fetched events:", events)  # Debugging log
 
 
-        if not events:
+        if not events and not paginated:
             return jsonify({"message": "No events found"}), 200
 
-        # ✅ Manually format event objects into dictionaries
-        events_list = []
-        for event in events:
-            events_list.append({
-                "id": event.id,
-                "title": event.title,
-                "date": event.date,
-                "start_time": event.start_time,
-                "end_time": event.end_time,
-                "range_start": event.range_start,
-                "range_end": event.range_end,
-                "address": event.address,
-                "latitude": event.latitude,
-                "longitude": event.longitude,
-                "photo": event.photo
-            })
+        # ✅ Precompiled, column-projected serializer (see serializers.py)
+        events_list = event_serializer.many(events)
 
+        if paginated:
+            return jsonify({"events": events_list, "next_cursor": next_cursor}), 200
         return jsonify({"events": events_list}), 200
 
     except Exception as e:
@@ -223,6 +464,441 @@ def get_user_events():
         return jsonify({"error": str(e)}), 500
 
 
+# 🔎 Search page size limits
+DEFAULT_SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+
+
+@app.get('/api/events/search')
+@jwt_required()
+def search_events():
+    """Full-text search over the user's event titles, details and addresses.
+
+    Query params:
+      - q: words to look for; each one also matches as a prefix ("ramen pl")
+      - limit: page size (default 20, max 100)
+      - cursor: next_cursor from the previous page
+    Results come best match first (FTS5 bm25, title hits weigh most).
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        q = request.args.get("q", "").strip()
+        if not q:
+            return jsonify({"error": "'q' is required"}), 400
+
+        try:
+            page_size = int(request.args.get("limit", DEFAULT_SEARCH_PAGE_SIZE))
+        except ValueError:
+            return jsonify({"error": "'limit' must be an integer"}), 400
+        if page_size < 1:
+            return jsonify({"error": "'limit' must be a positive integer"}), 400
+        page_size = min(page_size, MAX_SEARCH_PAGE_SIZE)
+
+        offset = 0
+        cursor = request.args.get("cursor")
+        if cursor:
+            try:
+                offset = int(decode_opaque_token(cursor)["offset"])
+            except (ValueError, KeyError, TypeError):
+                return jsonify({"error": "Malformed cursor"}), 400
+
+        # Fetch one extra id to know whether another page exists
+        ids = event_search.search(current_user_id, q, page_size + 1, offset)
+        if ids is None:
+            return jsonify({"error": "'q' has no searchable words"}), 400
+
+        next_cursor = None
+        if len(ids) > page_size:
+            ids = ids[:page_size]
+            next_cursor = encode_opaque_token({"offset": offset + page_size})
+
+        events = Event.query.options(event_serializer.load_only()).filter(Event.id.in_(ids)).all() if ids else []
+        position = {event_id: index for index, event_id in enumerate(ids)}
+        events.sort(key=lambda event: position[event.id])
+        return jsonify({"events": event_serializer.many(events), "next_cursor": next_cursor}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.get('/api/events/overlapping')
+@jwt_required()
+def get_overlapping_events():
+    """Events whose span intersects [from, to], e.g. "everything touching this week".
+
+    Multi-day events (both range ends set, Event.is_multi_day: the same rule the stats
+    rollup uses) come from the (user_id, range_start, range_end) index, the rest by their
+    date from (user_id, date).
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        try:
+            date_from = parse_date_arg("from")
+            date_to = parse_date_arg("to")
+        except ValueError:
+            return jsonify({"error": "'from' and 'to' must be dates in YYYY-MM-DD format"}), 400
+        if date_from is None or date_to is None:
+            return jsonify({"error": "'from' and 'to' are required"}), 400
+        if date_from > date_to:
+            return jsonify({"error": "'from' must not be after 'to'"}), 400
+
+        query = Event.query.options(event_serializer.load_only()).filter(Event.user_id == current_user_id)
+        multi_day = query.filter(
+            Event.is_multi_day,
+            Event.range_start <= date_to,
+            Event.range_end >= date_from
+        ).all()
+        single_day = query.filter(
+            ~Event.is_multi_day,
+            Event.date.between(date_from, date_to)
+        ).all()
+
+        events = sorted(multi_day + single_day, key=lambda event: (event.range_start if event.is_multi_day else event.date, event.id))
+        return jsonify({"events": event_serializer.many(events)}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.get('/api/stats')
+@jwt_required()
+def get_event_stats():
+    """Calendar statistics for the logged-in user, read from the month rollup (never from events).
+
+    Optional query params:
+      - from / to: inclusive YYYY-MM bounds on the heatmap months (totals and streaks always cover everything)
+      - today: the client's local YYYY-MM-DD, for streaks and "days since" (default: the server's date)
+    Each heatmap month lists how many events cover each of its days; multi-day events count on every day.
+    """
+    try:
+        try:
+            first_month = parse_month(request.args["from"]) if request.args.get("from") else None
+            last_month = parse_month(request.args["to"]) if request.args.get("to") else None
+            today = parse_date_arg("today") or datetime.utcnow().date()
+        except ValueError:
+            return jsonify({"error": "'from' and 'to' must be YYYY-MM, 'today' must be YYYY-MM-DD"}), 400
+
+        rows = event_stats.for_user(current_user.id)
+        return jsonify(summarize(rows, today, first_month, last_month)), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# 🔄 How far back a sync token reaches, so writes that were still committing when the
+# previous token was issued are not missed. Clients upsert by id, so overlap is harmless.
+SYNC_TOKEN_LOOKBACK = timedelta(seconds=5)
+
+
+def encode_sync_token(moment):
+    return encode_opaque_token({"since": moment.isoformat()})
+
+
+def decode_sync_token(token):
+    """Turn a sync token back into the datetime it was issued at."""
+    try:
+        return datetime.fromisoformat(decode_opaque_token(token)["since"])
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Invalid sync token")
+
+
+@app.get('/api/events/changes')
+@jwt_required()
+def get_event_changes():
+    """Delta sync: events changed and ids deleted since the given sync token.
+
+    Without `since` every live event is returned (initial sync). The same full sync is
+    sent when `since` is older than SYNC_TOMBSTONE_RETENTION_DAYS, because the tombstones
+    of deletions that old have been purged; `full: true` tells the client to replace its
+    local copy. Every response carries a fresh `sync_token` to send back on the next call.
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        since = request.args.get("since")
+
+        # Taken before querying so nothing committed during this request can fall in a gap
+        issued_at = datetime.utcnow()
+
+        if since:
+            try:
+                changed_after = decode_sync_token(since) - SYNC_TOKEN_LOOKBACK
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            if changed_after < issued_at - timedelta(days=app.config["SYNC_TOMBSTONE_RETENTION_DAYS"]):
+                since = None  # Deletions that far back may be gone: resync from scratch
+
+        if since:
+            events = Event.query.options(event_serializer.load_only()).filter(
+                Event.user_id == current_user_id,
+                Event.updated_at > changed_after
+            ).order_by(Event.updated_at, Event.id).all()
+            deleted_ids = sorted(set(db.session.scalars(
+                select(EventTombstone.event_id).where(
+                    EventTombstone.user_id == current_user_id,
+                    EventTombstone.deleted_at > changed_after
+                )
+            )))
+            # An id can be deleted and never come back, but be defensive about re-used ids
+            live_ids = {event.id for event in events}
+            deleted_ids = [event_id for event_id in deleted_ids if event_id not in live_ids]
+        else:
+            events = Event.query.options(event_serializer.load_only()).filter_by(
+                user_id=current_user_id
+            ).order_by(Event.date, Event.id).all()
+            deleted_ids = []
+
+        return jsonify({
+            "events": event_serializer.many(events),
+            "deleted": deleted_ids,
+            "full": not since,
+            "sync_token": encode_sync_token(issued_at)
+        }), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# 🗺️ Map viewport queries
+MAX_NEARBY_RESULTS = 500
+
+
+def parse_float_arg(name, low, high):
+    """Read a required float query param within [low, high], raising ValueError otherwise."""
+    if name not in request.args:
+        raise ValueError(f"'{name}' is required: pass min_lat/min_lon/max_lat/max_lon or lat/lon/radius")
+    try:
+        value = float(request.args[name])
+    except ValueError:
+        raise ValueError(f"'{name}' must be a valid number")
+    if not low <= value <= high:
+        raise ValueError(f"'{name}' must be between {low} and {high}")
+    return value
+
+
+@app.get('/api/events/nearby')
+@jwt_required()
+def get_nearby_events():
+    """Events inside the visible map viewport, served from the (user_id, geohash) index.
+
+    Either a bounding box (min_lat, min_lon, max_lat, max_lon; min_lon > max_lon means the
+    box crosses the antimeridian) or a circle (lat, lon, radius in meters). Optional limit.
+    """
+    try:
+        current_user_id = get_jwt_identity()
+
+        center = None
+        try:
+            if "radius" in request.args:
+                center = (parse_float_arg("lat", -90, 90), parse_float_arg("lon", -180, 180))
+                radius = parse_float_arg("radius", 0, 20037508)  # Half the equator
+                bbox = radius_bbox(center[0], center[1], radius)
+            else:
+                bbox = (
+                    parse_float_arg("min_lat", -90, 90),
+                    parse_float_arg("min_lon", -180, 180),
+                    parse_float_arg("max_lat", -90, 90),
+                    parse_float_arg("max_lon", -180, 180),
+                )
+                if bbox[0] > bbox[2]:
+                    return jsonify({"error": "'min_lat' must not be greater than 'max_lat'"}), 400
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        try:
+            limit = int(request.args.get("limit", MAX_NEARBY_RESULTS))
+        except ValueError:
+            return jsonify({"error": "'limit' must be an integer"}), 400
+        if limit < 1:
+            return jsonify({"error": "'limit' must be a positive integer"}), 400
+        limit = min(limit, MAX_NEARBY_RESULTS)
+
+        # ✅ Coarse pass: a few narrow range scans over geohash prefixes; fine pass: exact bounds
+        box_filters = []
+        for min_lat, min_lon, max_lat, max_lon in split_bbox(*bbox):
+            prefix_ranges = [
+                and_(Event.geohash >= prefix, Event.geohash < prefix + "{")  # "{" sorts right after "z"
+                for prefix in covering_prefixes(min_lat, min_lon, max_lat, max_lon)
+            ]
+            box_filters.append(and_(
+                or_(*prefix_ranges),
+                Event.latitude.between(min_lat, max_lat),
+                Event.longitude.between(min_lon, max_lon)
+            ))
+
+        events = Event.query.options(event_serializer.load_only()).filter(
+            Event.user_id == current_user_id, or_(*box_filters)
+        ).all()
+
+        results = []
+        for event in events:
+            event_json = event_serializer(event)
+            if center is not None:
+                distance = haversine_m(center[0], center[1], event.latitude, event.longitude)
+                if distance > radius:
+                    continue
+                event_json["distance_m"] = round(distance, 1)
+            results.append(event_json)
+
+        if center is not None:
+            results.sort(key=lambda event_json: event_json["distance_m"])
+        else:
+            results.sort(key=lambda event_json: (event_json["date"], event_json["id"]))
+
+        return jsonify({"events": results[:limit], "truncated": len(results) > limit}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# (field, parser, expected format) for the typed date/time columns
+TEMPORAL_FIELDS = (
+    ("date", parse_date_value, "YYYY-MM-DD"),
+    ("range_start", parse_date_value, "YYYY-MM-DD"),
+    ("range_end", parse_date_value, "YYYY-MM-DD"),
+    ("start_time", parse_time_value, "HH:MM"),
+    ("end_time", parse_time_value, "HH:MM"),
+)
+
+
+def parse_temporal_fields(fields):
+    """Turn the date/time strings of a parsed payload into date/time objects, in place.
+
+    Returns an error message, or None when everything parsed.
+    """
+    for field, parser, expected in TEMPORAL_FIELDS:
+        value = fields.get(field)
+        if value is None:
+            continue
+        if not isinstance(value, str):
+            return f"'{field}' must be a string in {expected} format"
+        if not value.strip():
+            fields[field] = None
+            continue
+        try:
+            fields[field] = parser(value)
+        except ValueError:
+            return f"'{field}' must be in {expected} format"
+
+    if fields.get("range_start") and fields.get("range_end") and fields["range_end"] < fields["range_start"]:
+        return "'range_end' must not be before 'range_start'"
+    return None
+
+
+def parse_new_event(data):
+    """Validate a create payload. Returns (fields, None) or (None, error message)."""
+    # 🔥 Validation: Ensure required fields are present
+    required_fields = ["title", "date"]
+    for field in required_fields:
+        if not data.get(field) or not isinstance(data[field], str) or not data[field].strip():
+            return None, f"'{field}' is required and must be a non-empty string"
+
+    # ✅ Handle optional fields to prevent `.strip()` errors
+    fields = {
+        "title": data.get("title", "").strip(),
+        "date": data.get("date", "").strip(),
+        "start_time": data.get("start_time", "").strip() if data.get("start_time") else None,
+        "end_time": data.get("end_time", "").strip() if data.get("end_time") else None,
+        "details": data.get("details", "").strip() if data.get("details") else None,
+        "address": data.get("address", "").strip() if data.get("address") else None,
+        "photo": data.get("photo", "").strip() if data.get("photo") else None,
+        "range_start": data.get("range_start", "").strip() if data.get("range_start") else None,
+        "range_end": data.get("range_end", "").strip() if data.get("range_end") else None,
+    }
+
+    # ✅ Ensure latitude and longitude are numbers or None
+    for field, label in (("latitude", "Latitude"), ("longitude", "Longitude")):
+        value = data.get(field)
+        if value is not None:
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                return None, f"{label} must be a valid number"
+        fields[field] = value
+
+    error = parse_temporal_fields(fields)
+    if error:
+        return None, error
+    return fields, None
+
+
+def parse_event_replacement(data):
+    """Validate a full-replacement (PUT) payload. Returns (fields, None) or (None, error message)."""
+    # ✅ Required fields (MUST be provided)
+    required_fields = ["title", "date"]
+    for field in required_fields:
+        if field not in data or not isinstance(data[field], str) or not data[field].strip():
+            return None, f"'{field}' is required and must be a non-empty string"
+
+    fields = {
+        "title": data["title"].strip(),
+        "date": data["date"].strip(),
+        "start_time": data.get("start_time", None),  # ✅ Now Optional
+        "end_time": data.get("end_time", None),  # ✅ Now Optional
+        "details": data.get("details", None),  # ✅ Now Optional
+        "address": data.get("address", None),  # ✅ Now Optional
+        "photo": data.get("photo", None),  # ✅ Now Optional
+        "range_start": data.get("range_start", None),  # ✅ Now Optional
+        "range_end": data.get("range_end", None),  # ✅ Now Optional
+        # ✅ Optional Numeric Fields (Convert only if provided)
+        "latitude": float(data["latitude"]) if "latitude" in data and isinstance(data["latitude"], (int, float)) else None,
+        "longitude": float(data["longitude"]) if "longitude" in data and isinstance(data["longitude"], (int, float)) else None,
+    }
+
+    error = parse_temporal_fields(fields)
+    if error:
+        return None, error
+    return fields, None
+
+
+# 📤 Streaming export: rows are pulled from a server-side cursor and written out in chunks
+EXPORT_CHUNK_SIZE = 500
+
+
+@app.get('/api/events/export')
+@jwt_required()
+def export_events():
+    """Stream the logged-in user's full event history.
+
+    ?format=ndjson (default) emits one JSON object per line; ?format=json emits a single
+    {"events": [...]} document. Memory use stays flat however many events there are.
+    """
+    current_user_id = get_jwt_identity()
+    export_format = request.args.get("format", "ndjson")
+    if export_format not in ("ndjson", "json"):
+        return jsonify({"error": "'format' must be 'ndjson' or 'json'"}), 400
+
+    def generate():
+        rows = db.session.execute(
+            select(*event_serializer.columns)
+            .where(Event.user_id == current_user_id)
+            .order_by(Event.date, Event.id)
+            .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+        separator = "\n" if export_format == "ndjson" else ","
+        first = True
+        if export_format == "json":
+            yield '{"events":['
+        for partition in rows.partitions():
+            chunk = separator.join(
+                json.dumps(event_serializer(row), separators=(",", ":"))
+                for row in partition
+            )
+            if export_format == "ndjson":
+                yield chunk + "\n"
+            else:
+                yield chunk if first else "," + chunk
+            first = False
+        if export_format == "json":
+            yield "]}"
+
+    extension = "ndjson" if export_format == "ndjson" else "json"
+    return Response(
+        stream_with_context(generate()),
+        mimetype="application/x-ndjson" if export_format == "ndjson" else "application/json",
+        headers={"Content-Disposition": f"attachment; filename=lovelog-events.{extension}"}
+    )
+
+
 @app.post('/api/events')
 @jwt_required()
 def add_event():
@@ -231,57 +907,22 @@ def add_event():
         current_user_id = get_jwt_identity()
         data = request.get_json() or {}
 
-        # 🔥 Validation: Ensure required fields are present
-        required_fields = ["title", "date"]
-        for field in required_fields:
-            if not data.get(field) or not isinstance(data[field], str) or not data[field].strip():
-                return jsonify({"error": f"'{field}' is required and must be a non-empty string"}), 400
-
-        # ✅ Handle optional fields to prevent `.strip()` errors
-        title = data.get("title", "").strip()
-        date = data.get("date", "").strip()
-        start_time = data.get("start_time", "").strip() if data.get("start_time") else None
-        end_time = data.get("end_time", "").strip() if data.get("end_time") else None
-        address = data.get("address", "").strip() if data.get("address") else None
-        photo = data.get("photo", "").strip() if data.get("photo") else None
-        range_start = data.get("range_start", "").strip() if data.get("range_start") else None
-        range_end = data.get("range_end", "").strip() if data.get("range_end") else None
-
-        # ✅ Ensure latitude and longitude are numbers or None
-        latitude = data.get("latitude")
-        longitude = data.get("longitude")
-
-        if latitude is not None:
-            try:
-                latitude = float(latitude)
-            except ValueError:
-                return jsonify({"error": "Latitude must be a valid number"}), 400
-
-        if longitude is not None:
-            try:
-                longitude = float(longitude)
-            except ValueError:
-                return jsonify({"error": "Longitude must be a valid number"}), 400
+        fields, error = parse_new_event(data)
+        if error:
+            return jsonify({"error": error}), 400
 
         # ✅ Create new event
-        new_event = Event(
-            user_id=current_user_id,
-            title=title,
-            date=date,
-            start_time=start_time,
-            end_time=end_time,
-            address=address,
-            latitude=latitude,
-            longitude=longitude,
-            range_start=range_start,
-            range_end=range_end,
-            photo=photo
-        )
+        new_event = Event(user_id=current_user_id, **fields)
 
         db.session.add(new_event)
+        stats = StatsDelta()
+        stats.add(new_event.date, new_event.range_start, new_event.range_end)
+        apply_stats_delta(db.session, current_user_id, stats)
+        User.bump_data_version(current_user_id)
         db.session.commit()
+        response_cache.invalidate_user(current_user_id)
 
-        return jsonify({"message": "Event added successfully", "event": new_event.to_dict()}), 201
+        return jsonify({"message": "Event added successfully", "event": event_serializer(new_event)}), 201
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -353,30 +994,21 @@ def update_event(event_id):
 
         data = request.get_json() or {}
 
-        # ✅ Required fields (MUST be provided)
-        required_fields = ["title", "date"]
-        for field in required_fields:
-            if field not in data or not isinstance(data[field], str) or not data[field].strip():
-                return jsonify({"error": f"'{field}' is required and must be a non-empty string"}), 400
-
-        # ✅ Optional fields (Only update if provided)
-        event.title = data["title"].strip()
-        event.date = data["date"].strip()
-        
-        event.start_time = data.get("start_time", None)  # ✅ Now Optional
-        event.end_time = data.get("end_time", None)  # ✅ Now Optional
-        event.details = data.get("details", None)  # ✅ Now Optional
-        event.address = data.get("address", None)  # ✅ Now Optional
-        event.photo = data.get("photo", None)  # ✅ Now Optional
-        event.range_start = data.get("range_start", None)  # ✅ Now Optional
-        event.range_end = data.get("range_end", None)  # ✅ Now Optional
+        fields, error = parse_event_replacement(data)
+        if error:
+            return jsonify({"error": error}), 400
 
-        # ✅ Optional Numeric Fields (Convert only if provided)
-        event.latitude = float(data["latitude"]) if "latitude" in data and isinstance(data["latitude"], (int, float)) else None
-        event.longitude = float(data["longitude"]) if "longitude" in data and isinstance(data["longitude"], (int, float)) else None
+        stats = StatsDelta()
+        stats.remove(event.date, event.range_start, event.range_end)
+        for name, value in fields.items():
+            setattr(event, name, value)
+        stats.add(event.date, event.range_start, event.range_end)
+        apply_stats_delta(db.session, user_id, stats)
 
+        User.bump_data_version(user_id)
         db.session.commit()
-        return jsonify({"message": "Event updated successfully", "event": event.to_dict()}), 200
+        response_cache.invalidate_user(user_id)
+        return jsonify({"message": "Event updated successfully", "event": event_serializer(event)}), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -399,13 +1031,234 @@ def delete_event(event_id):
     if event.user_id != user_id:
         return jsonify({"error": "Unauthorized: You can only delete your own events."}), 403
 
-    # Delete event
+    # Delete event, leaving a tombstone behind for delta sync (same transaction)
+    db.session.add(EventTombstone(event_id=event.id, user_id=event.user_id))
     db.session.delete(event)
+    stats = StatsDelta()
+    stats.remove(event.date, event.range_start, event.range_end)
+    apply_stats_delta(db.session, user_id, stats)
+    User.bump_data_version(user_id)
     db.session.commit()
+    response_cache.invalidate_user(user_id)
     return jsonify({"message": "Event deleted successfully!"}), 200
 
 
 
+# 📦 Bulk import / sync
+MAX_BATCH_OPERATIONS = 1000
+
+
+@app.post('/api/events/batch')
+@jwt_required()
+def batch_events():
+    """Apply many create/update/delete operations in a single transaction.
+
+    Body: {"operations": [{"op": "create", "data": {...}},
+                          {"op": "update", "id": 1, "data": {...}},
+                          {"op": "delete", "id": 2}],
+           "atomic": false}
+    Each item is validated with the same rules as POST / PUT /api/events. Invalid items
+    are reported and skipped, unless "atomic" is true, in which case nothing is written.
+    """
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json() or {}
+        if not isinstance(data, dict):
+            return jsonify({"error": "Body must be a JSON object"}), 400
+        operations = data.get("operations")
+        atomic = data.get("atomic", False)
+        if not isinstance(atomic, bool):
+            return jsonify({"error": "'atomic' must be true or false"}), 400
+
+        if not isinstance(operations, list) or not operations:
+            return jsonify({"error": "'operations' must be a non-empty list"}), 400
+        if len(operations) > MAX_BATCH_OPERATIONS:
+            return jsonify({"error": f"At most {MAX_BATCH_OPERATIONS} operations per batch"}), 400
+
+        # 🔹 One query to learn who owns every event the batch touches (and its old dates, for the stats rollup)
+        target_ids = {
+            operation.get("id") for operation in operations
+            if isinstance(operation, dict) and isinstance(operation.get("id"), int)
+        }
+        targets = {row.id: row for row in db.session.execute(
+            select(Event.id, Event.user_id, Event.date, Event.range_start, Event.range_end).where(Event.id.in_(target_ids))
+        )} if target_ids else {}
+        stats = StatsDelta()
+
+        results = [None] * len(operations)
+        creates, updates, deletes = [], [], []
+        seen_ids = set()
+        now = datetime.utcnow()
+
+        for index, operation in enumerate(operations):
+            op = operation.get("op") if isinstance(operation, dict) else None
+            result = {"index": index, "op": op}
+            results[index] = result
+
+            if op not in ("create", "update", "delete"):
+                result.update(status=400, error="'op' must be one of create, update, delete")
+                continue
+            payload = operation.get("data") or {}
+            if op != "delete" and not isinstance(payload, dict):
+                result.update(status=400, error="'data' must be an object")
+                continue
+
+            if op == "create":
+                fields, error = parse_new_event(payload)
+                if error:
+                    result.update(status=400, error=error)
+                    continue
+                fields.update(user_id=user_id, geohash=encode_geohash(fields["latitude"], fields["longitude"]), updated_at=now)
+                creates.append((result, fields))
+                continue
+
+            event_id = operation.get("id")
+            if not isinstance(event_id, int):
+                result.update(status=400, error="'id' is required and must be an integer")
+                continue
+            result["id"] = event_id
+            if event_id not in targets:
+                result.update(status=404, error="Event not found")
+                continue
+            if targets[event_id].user_id != user_id:
+                result.update(status=403, error=f"Unauthorized: You can only {op} your own events.")
+                continue
+            if event_id in seen_ids:
+                result.update(status=409, error="Event appears more than once in this batch")
+                continue
+            seen_ids.add(event_id)
+
+            if op == "update":
+                fields, error = parse_event_replacement(payload)
+                if error:
+                    result.update(status=400, error=error)
+                    continue
+                fields.update(id=event_id, geohash=encode_geohash(fields["latitude"], fields["longitude"]), updated_at=now)
+                updates.append((result, fields))
+            else:
+                deletes.append((result, event_id))
+
+        failed = any("error" in result for result in results)
+        if atomic and failed:
+            return jsonify({"results": results, "committed": False}), 400
+
+        # ✅ Set-based writes: one executemany per kind instead of a round-trip per event
+        if creates:
+            new_ids = db.session.scalars(
+                insert(Event).returning(Event.id, sort_by_parameter_order=True),
+                [fields for _, fields in creates]
+            ).all()
+            for (result, fields), new_id in zip(creates, new_ids):
+                result.update(status=201, id=new_id)
+                stats.add(fields["date"], fields["range_start"], fields["range_end"])
+        if updates:
+            db.session.execute(update(Event), [fields for _, fields in updates])
+            for result, fields in updates:
+                result["status"] = 200
+                old = targets[fields["id"]]
+                stats.remove(old.date, old.range_start, old.range_end)
+                stats.add(fields["date"], fields["range_start"], fields["range_end"])
+        if deletes:
+            deleted_ids = [event_id for _, event_id in deletes]
+            db.session.execute(delete(Event).where(Event.id.in_(deleted_ids), Event.user_id == user_id))
+            db.session.execute(insert(EventTombstone), [
+                {"event_id": event_id, "user_id": user_id, "deleted_at": now} for event_id in deleted_ids
+            ])
+            for result, event_id in deletes:
+                result["status"] = 200
+                old = targets[event_id]
+                stats.remove(old.date, old.range_start, old.range_end)
+
+        applied = bool(creates or updates or deletes)
+        if applied:
+            apply_stats_delta(db.session, user_id, stats)
+            User.bump_data_version(user_id)
+        db.session.commit()
+        if applied:
+            response_cache.invalidate_user(user_id)
+
+        return jsonify({"results": results, "committed": applied}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+
+# 🖼️ Photos: upload once, get per-screen sizes back; set the event's "photo" to the returned "photo" URL
+@app.post('/api/photos')
+@jwt_required()
+@rate_limiter.limit("photo_upload")
+def upload_photo():
+    """Upload an image (multipart field "photo", or the raw body with an image/* Content-Type).
+
+    Returns 201 for a new photo, 200 if the same bytes were uploaded before. Thumbnails are
+    rendered in the background; until then their URLs serve the original.
+    """
+    try:
+        if request.content_length and request.content_length > photo_service.max_bytes + 64 * 1024:
+            return jsonify({"error": f"Photos are limited to {photo_service.max_bytes // (1024 * 1024)} MB"}), 413
+
+        upload = request.files.get("photo")
+        if upload is not None:
+            data = upload.read(photo_service.max_bytes + 1)
+        elif request.mimetype.startswith("image/"):
+            data = request.get_data()
+        else:
+            return jsonify({"error": "Send the image as multipart field 'photo' or as an image/* body"}), 400
+
+        try:
+            photo, created = photo_service.ingest(data)
+        except PhotoError as e:
+            return jsonify({"error": str(e)}), e.status
+
+        return jsonify({
+            "photo": PHOTO_URL_PREFIX + photo.hash,
+            "sizes": photo_urls(PHOTO_URL_PREFIX + photo.hash),
+            "width": photo.width,
+            "height": photo.height,
+            "status": photo.status,
+        }), 201 if created else 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+
+@app.get('/api/photos/<digest>')
+@app.get('/api/photos/<digest>/<size>')
+def get_photo(digest, size="original"):
+    """Serve a photo variant with ETag, Cache-Control and Range support.
+
+    No login needed: the URL embeds the SHA-256 of the image, so it can't be guessed, and it
+    stays valid for image components and CDNs that can't send an Authorization header.
+    """
+    if not PHOTO_HASH.match(digest) or (size != "original" and size not in PHOTO_SIZES):
+        return jsonify({"error": "Photo not found"}), 404
+    photo = db.session.get(Photo, digest)
+    if photo is None:
+        return jsonify({"error": "Photo not found"}), 404
+
+    key, final = photo_service.variant(photo, size)
+    file, length = photo_service.storage.open(key)
+    if file is None:
+        return jsonify({"error": "Photo not found"}), 404
+
+    mimetype = photo.content_type if key.endswith("/original") else "image/jpeg"
+    response = send_file(file, mimetype=mimetype, conditional=False, etag=False, max_age=None)
+    response.content_length = length
+    response.set_etag(key.replace("/", "-"))
+    if final:
+        # Content-addressed: these bytes can never change, so let every cache keep them
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = photo_service.cache_max_age
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True  # A thumbnail will replace this stand-in shortly
+    return response.make_conditional(request, accept_ranges=True, complete_length=length)
+
+
+
 # ✅ Run Flask Server
 if __name__ == '__main__':
     app.run(debug=True)
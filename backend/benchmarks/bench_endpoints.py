@@ -0,0 +1,214 @@
+"""Endpoint latency / throughput benchmark with a regression gate.
+
+Run from backend/:
+    python -m benchmarks.bench_endpoints --save-baseline     # record benchmarks/baselines/endpoints.json
+    python -m benchmarks.bench_endpoints                     # compare; exits 1 on regression
+
+Boots the Flask app from config.py against a freshly generated database (seed.py), then
+drives every route through the test client twice: once sequentially (latency) and once
+from a pool of threads (throughput). Reports p50/p95/p99 and requests/s per endpoint.
+A run fails when an endpoint's p95 is more than --threshold (default 25%) and more than
+--min-delta-ms slower than the stored baseline. Only the sequential numbers gate by
+default (threaded p95 on a shared CI box is noisy); pass --gate all to include them.
+The response cache is off so reads measure the query and serialization work; pass
+--response-cache to time the warm path instead (and compare it against a baseline saved the same way).
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "endpoints.json")
+AS_OF = date(2025, 6, 1)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(samples)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+class Scenario:
+    """One endpoint: an untimed prepare step and the timed request itself."""
+
+    def __init__(self, name, request, prepare=None, expect=(200,), iterations=None):
+        self.name = name
+        self.request = request
+        self.prepare = prepare
+        self.expect = expect
+        self.iterations = iterations
+
+
+def build_scenarios(bcrypt_iterations):
+    unique = itertools.count()
+
+    def new_event(ctx):
+        response = ctx.client.post("/api/events", json={"title": "Bench date", "date": "2025-05-10"}, headers=ctx.headers)
+        return response.get_json()["event"]["id"]
+
+    return [
+        Scenario("POST /api/signup", lambda ctx, _: ctx.client.post("/api/signup", json={
+            "email": f"bench{next(unique)}-{time.time_ns()}@lovelog.test", "password": "password123"
+        }), expect=(201,), iterations=bcrypt_iterations),
+        Scenario("POST /api/login", lambda ctx, _: ctx.client.post("/api/login", json={
+            "email": ctx.email, "password": "password123"
+        }), iterations=bcrypt_iterations),
+        Scenario("GET /api/user", lambda ctx, _: ctx.client.get("/api/user", headers=ctx.headers)),
+        Scenario("GET /api/events", lambda ctx, _: ctx.client.get("/api/events", headers=ctx.headers)),
+        Scenario("GET /api/events?from&to", lambda ctx, _: ctx.client.get(
+            "/api/events?from=2025-04-16&to=2025-07-10", headers=ctx.headers
+        )),
+        Scenario("POST /api/events", lambda ctx, _: ctx.client.post("/api/events", json={
+            "title": "Bench date", "date": "2025-05-10", "start_time": "18:00", "latitude": 40.7, "longitude": -74.0
+        }, headers=ctx.headers), expect=(201,)),
+        Scenario("PUT /api/events/<id>", lambda ctx, event_id: ctx.client.put(f"/api/events/{event_id}", json={
+            "title": "Bench date (edited)", "date": "2025-05-11"
+        }, headers=ctx.headers), prepare=new_event),
+        Scenario("DELETE /api/events/<id>", lambda ctx, event_id: ctx.client.delete(
+            f"/api/events/{event_id}", headers=ctx.headers
+        ), prepare=new_event),
+        Scenario("PATCH /api/user/update", lambda ctx, _: ctx.client.patch("/api/user/update", json={
+            "email": f"{ctx.email_prefix}-{next(unique)}@lovelog.test"
+        }, headers=ctx.headers)),
+    ]
+
+
+class UserContext:
+    """A test client logged in as one generated user."""
+
+    def __init__(self, app, user):
+        from flask_jwt_extended import create_access_token
+
+        self.client = app.test_client()
+        self.email = user.email
+        self.email_prefix = f"renamed{user.id}"
+        with app.app_context():
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity=user.id)}"}
+
+
+def run_scenario(scenario, contexts, iterations, threads):
+    """Run `iterations` requests spread over `threads` workers; returns latency samples (ms) and wall time."""
+    samples = []
+    lock = threading.Lock()
+    per_thread = max(1, iterations // threads)
+
+    def worker(ctx):
+        local = []
+        for _ in range(per_thread):
+            prepared = scenario.prepare(ctx) if scenario.prepare else None
+            started = time.perf_counter()
+            response = scenario.request(ctx, prepared)
+            local.append((time.perf_counter() - started) * 1000)
+            if response.status_code not in scenario.expect:
+                raise RuntimeError(f"{scenario.name}: HTTP {response.status_code} {response.get_data(as_text=True)[:200]}")
+        with lock:
+            samples.extend(local)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, contexts[:threads]))
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples, wall):
+    return {
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "rps": round(len(samples) / wall, 1),
+        "requests": len(samples),
+    }
+
+
+def compare(results, baseline, threshold, min_delta_ms, gate="sequential"):
+    """Regressions as human-readable strings (empty when the run is within budget)."""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if not base or (gate == "sequential" and not key.endswith("[sequential]")):
+            continue
+        delta = result["p95_ms"] - base["p95_ms"]
+        if delta > min_delta_ms and result["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{key}: p95 {base['p95_ms']:.2f} -> {result['p95_ms']:.2f} ms (+{delta / base['p95_ms']:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50, help="Generated users (seed.py)")
+    parser.add_argument("--events-per-user", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=200, help="Requests per endpoint and mode")
+    parser.add_argument("--bcrypt-iterations", type=int, default=20, help="Requests for signup/login (bcrypt-bound)")
+    parser.add_argument("--threads", type=int, default=8, help="Workers in the load phase")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative p95 slowdown")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore p95 slowdowns smaller than this")
+    parser.add_argument("--gate", choices=("sequential", "all"), default="sequential", help="Which modes can fail the run")
+    parser.add_argument("--response-cache", action="store_true", help="Leave RESPONSE_CACHE on (times cache hits)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--output", help="Also write this run's results as JSON here")
+    args = parser.parse_args()
+
+    # The engine profile is chosen when config.py is imported, so point it at a scratch DB first
+    workdir = tempfile.mkdtemp(prefix="lovelog-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["RATELIMIT_ENABLED"] = "0"  # Every simulated client shares one IP
+    # Repeating the same GET would otherwise be served from the cache after the first request
+    os.environ["RESPONSE_CACHE_ENABLED"] = "1" if args.response_cache else "0"
+
+    from config import app
+    from models import User
+    import seed
+
+    seed.seed(args.users, args.events_per_user, seed_value=42, chunk_size=10000, as_of=AS_OF, create_tables=True)
+    with app.app_context():
+        users = User.query.order_by(User.id).limit(max(args.threads, 1)).all()
+        contexts = [UserContext(app, user) for user in users]
+
+    results = {}
+    print(f"\n{'endpoint':<28} {'mode':<10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+    for scenario in build_scenarios(args.bcrypt_iterations):
+        iterations = scenario.iterations or args.iterations
+        for mode, threads in (("sequential", 1), ("load", args.threads)):
+            samples, wall = run_scenario(scenario, contexts, iterations, threads)
+            summary = summarize(samples, wall)
+            results[f"{scenario.name} [{mode}]"] = summary
+            print(f"{scenario.name:<28} {mode:<10} {summary['p50_ms']:>8.2f} {summary['p95_ms']:>8.2f} "
+                  f"{summary['p99_ms']:>8.2f} {summary['rps']:>8.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\n📌 Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.threshold, args.min_delta_ms, args.gate)
+    if regressions:
+        print("\n❌ Latency regressions against baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\n✅ No latency regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
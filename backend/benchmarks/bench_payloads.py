@@ -0,0 +1,71 @@
+"""Payload size and encode time for a 5k-event history in every negotiable representation.
+
+Run from backend/:  python -m benchmarks.bench_payloads [--events 5000] [--repeat 5]
+
+Events come from seed.py's generator, so text varies and compression ratios are realistic.
+Encoding goes through the app's own JSON provider (msgpack is produced exactly as for an
+`Accept: application/msgpack` request) and the ResponseCompressor's encoders. "pretty" is
+the indented JSON the API sent before compact output became the default.
+"""
+import argparse
+import random
+import timeit
+from datetime import date, datetime
+from types import SimpleNamespace
+
+from config import app, response_compressor
+from encoding import MSGPACK_MIMETYPE, msgpack
+from seed import generate_user_events
+from serializers import event_serializer
+
+
+def build_history(count):
+    """One couple's events as seed.py would generate them, shaped like ORM rows for the serializer."""
+    rows = generate_user_events(random.Random(42), 1, count, date(2025, 6, 1), datetime(2025, 6, 1, 12, 0))
+    return [SimpleNamespace(id=index, **row) for index, row in enumerate(rows, 1)]
+
+
+def encode(payload, accept, compact=True):
+    previous = app.json.compact
+    app.json.compact = compact
+    try:
+        with app.test_request_context(headers={"Accept": accept}):
+            return app.json.response(payload).get_data()
+    finally:
+        app.json.compact = previous
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payload = {"events": event_serializer.many(build_history(args.events))}
+    formats = {
+        "json (pretty)": lambda: encode(payload, "application/json", compact=False),
+        "json": lambda: encode(payload, "application/json"),
+    }
+    if msgpack is not None:
+        formats["msgpack"] = lambda: encode(payload, MSGPACK_MIMETYPE)
+
+    print(f"{args.events} events, best of {args.repeat} runs")
+    print(f"  {'representation':<24} {'bytes':>11} {'vs pretty':>9} {'encode ms':>10} {'compress ms':>12} {'total ms':>9}")
+    reference = None
+    for name, serialize in formats.items():
+        encode_seconds = min(timeit.repeat(serialize, number=1, repeat=args.repeat))
+        body = serialize()
+        reference = reference or len(body)
+        rows = [(name, body, 0.0)]
+        if name != "json (pretty)":
+            for encoding in response_compressor.encoders:
+                compressed = response_compressor.compress(body, encoding)
+                seconds = min(timeit.repeat(lambda: response_compressor.compress(body, encoding), number=1, repeat=args.repeat))
+                rows.append((f"{name} + {encoding}", compressed, seconds))
+        for label, data, compress_seconds in rows:
+            print(f"  {label:<24} {len(data):>11,} {len(data) / reference:>8.1%} {encode_seconds * 1000:>10.2f} "
+                  f"{compress_seconds * 1000:>12.2f} {(encode_seconds + compress_seconds) * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Microbenchmark: SerializerMixin.to_dict vs the compiled serializer.
+
+Run from backend/:  python -m benchmarks.bench_serializer [--events 5000] [--repeat 5]
+"""
+import argparse
+import timeit
+from datetime import date, datetime, time
+
+from models import Event, User
+from serializers import event_serializer
+
+
+def build_events(count):
+    """Transient (never flushed) events shaped like real calendar entries."""
+    owner = User(id=1, email="bench@lovelog.app")
+    return [
+        Event(
+            id=i, user_id=1, user=owner, title=f"Date night #{i}", details="Dinner and a walk by the river.",
+            address="123 Main St", latitude=40.7 + i * 1e-5, longitude=-74.0 - i * 1e-5,
+            start_time=time(18, 0), end_time=time(21, 0), date=date(2025, 2, 14), range_start=None, range_end=None,
+            photo="https://example.com/photo.jpg", updated_at=datetime(2025, 2, 14, 21, 30)
+        )
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    events = build_events(args.events)
+    candidates = {
+        "SerializerMixin.to_dict": lambda: [event.to_dict() for event in events],
+        "compiled event_serializer": lambda: event_serializer.many(events),
+    }
+
+    print(f"Serializing {args.events} events, best of {args.repeat} runs")
+    timings = {}
+    for name, fn in candidates.items():
+        timings[name] = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        per_event_us = timings[name] / args.events * 1e6
+        print(f"  {name:<28} {timings[name] * 1000:9.2f} ms   {per_event_us:7.2f} us/event")
+
+    baseline, compiled = timings.values()
+    print(f"  speedup: {baseline / compiled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import time
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+
+from flask import make_response, request
+from flask_jwt_extended import get_jwt_identity
+from werkzeug.utils import import_string
+
+from encoding import negotiated_mimetype
+
+
+class CacheBackend:
+    """Storage interface for ResponseCache; entries are namespaced per user.
+
+    A shared implementation (Redis, memcached...) is what makes invalidation visible
+    across workers. `snapshot`/`set` let a backend refuse a value that was computed
+    before an `invalidate` of the same namespace landed.
+    """
+
+    def get(self, namespace, key):
+        raise NotImplementedError
+
+    def snapshot(self, namespace):
+        raise NotImplementedError
+
+    def set(self, namespace, key, value, snapshot):
+        raise NotImplementedError
+
+    def invalidate(self, namespace):
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+
+class LocalCacheBackend(CacheBackend):
+    """In-process LRU + TTL store bounded by entry count and total payload bytes."""
+
+    def __init__(self, max_entries=10000, max_bytes=32 * 1024 * 1024, ttl=60, max_namespaces=100000):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_namespaces = max_namespaces
+        self._entries = OrderedDict()  # (namespace, key) -> (expires_at, size, value)
+        self._keys_by_namespace = {}
+        self._generations = {}
+        self._epoch = 0
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def _drop(self, entry_key):
+        _, size, _ = self._entries.pop(entry_key)
+        self._bytes -= size
+        keys = self._keys_by_namespace.get(entry_key[0])
+        if keys is not None:
+            keys.discard(entry_key)
+            if not keys:
+                del self._keys_by_namespace[entry_key[0]]
+
+    def get(self, namespace, key):
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._drop((namespace, key))
+                self.misses += 1
+                return None
+            self._entries.move_to_end((namespace, key))
+            self.hits += 1
+            return entry[2]
+
+    def snapshot(self, namespace):
+        with self._lock:
+            return self._epoch, self._generations.get(namespace, 0)
+
+    def set(self, namespace, key, value, snapshot):
+        size = len(value[0])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            # A write for this user committed while the value was being computed: don't store it
+            if snapshot != (self._epoch, self._generations.get(namespace, 0)):
+                return
+            entry_key = (namespace, key)
+            if entry_key in self._entries:
+                self._drop(entry_key)
+            self._entries[entry_key] = (time.monotonic() + self.ttl, size, value)
+            self._keys_by_namespace.setdefault(namespace, set()).add(entry_key)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, namespace):
+        with self._lock:
+            for entry_key in list(self._keys_by_namespace.get(namespace, ())):
+                self._drop(entry_key)
+            if len(self._generations) >= self.max_namespaces:
+                # Keep bookkeeping bounded: forget every generation, and bump the epoch so
+                # any value computed before this point is still refused
+                self._generations.clear()
+                self._epoch += 1
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+class ResponseCache:
+    """Caches serialized JSON read responses per user, invalidated explicitly on writes.
+
+    Config keys:
+      - RESPONSE_CACHE_ENABLED: turn the whole layer off (default True)
+      - RESPONSE_CACHE_BACKEND: import path of a CacheBackend class (default local LRU)
+      - RESPONSE_CACHE_MAX_ENTRIES / RESPONSE_CACHE_MAX_BYTES / RESPONSE_CACHE_TTL
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get("RESPONSE_CACHE_ENABLED", True)
+        backend_class = app.config.get("RESPONSE_CACHE_BACKEND", LocalCacheBackend)
+        if isinstance(backend_class, str):
+            backend_class = import_string(backend_class)
+        self.backend = backend_class(
+            max_entries=app.config.get("RESPONSE_CACHE_MAX_ENTRIES", 10000),
+            max_bytes=app.config.get("RESPONSE_CACHE_MAX_BYTES", 32 * 1024 * 1024),
+            ttl=app.config.get("RESPONSE_CACHE_TTL", 60),
+        )
+
+    def cached(self, view):
+        """Cache a JWT-protected GET view's 200 responses under (user id, full path, JSON or msgpack).
+
+        Must sit below @jwt_required(). A hit is answered without touching the database,
+        including the 304 check against the cached ETag. Bodies are cached uncompressed;
+        content coding is applied per request afterwards.
+        """
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return view(*args, **kwargs)
+
+            namespace = str(get_jwt_identity())
+            key = f"{request.full_path} {negotiated_mimetype()}"
+            hit = self.backend.get(namespace, key)
+            if hit is not None:
+                body, etag, mimetype = hit
+                if etag and request.if_none_match.contains_weak(etag):
+                    response = make_response("", 304)
+                else:
+                    response = make_response(body, 200)
+                    response.mimetype = mimetype
+                if etag:
+                    response.set_etag(etag)
+                    response.headers["Cache-Control"] = "private, no-cache"
+                return response
+
+            snapshot = self.backend.snapshot(namespace)
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                etag, _ = response.get_etag()
+                self.backend.set(namespace, key, (response.get_data(), etag, response.mimetype), snapshot)
+            return response
+        return wrapper
+
+    def invalidate_user(self, user_id):
+        """Drop every cached response for this user; call after the write commits."""
+        if self.backend is not None:
+            self.backend.invalidate(str(user_id))
+
+    def stats(self):
+        return self.backend.stats() if self.backend is not None else {}
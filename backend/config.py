@@ -1,3 +1,4 @@
+import json
 import os
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
@@ -5,9 +6,22 @@ from flask_migrate import Migrate
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import MetaData
-from flask_bcrypt import Bcrypt
 from dotenv import load_dotenv
 from flask_jwt_extended import JWTManager
+from hashing import PasswordHasher
+from cache import ResponseCache
+from identity import IdentityCache
+from revocation import RevocationStore
+from outbox import EmailOutbox
+from maintenance import MaintenanceScheduler
+from ratelimit import RateLimiter
+from metrics import Metrics, sample_lines
+from profiling import QueryProfiler
+from search import EventSearch, exclude_search_tables
+from stats import EventStats
+from photos import PhotoService
+from encoding import NegotiatingJSONProvider, ResponseCompressor
+from db_profiles import profile_from_env
 
 # Load environment variables from .env file
 load_dotenv()
@@ -21,15 +35,26 @@ app.config['SECRET_KEY'] = os.environ.get('FLASK_SECRET', 'your_default_secret_k
 # JWT CONFIGURATION
 app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET', 'your_jwt_secret_key')  # Secret for JWT tokens
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = 3600  # Token expires in 1 hour (adjust as needed)
-app.config['JWT_REFRESH_TOKEN_EXPIRES'] = 86400  # Refresh token expires in 1 day
+app.config['JWT_REFRESH_TOKEN_EXPIRES'] = int(os.environ.get('JWT_REFRESH_TOKEN_EXPIRES', 86400))  # Refresh token expires in 1 day
+app.config['JWT_REFRESH_FAMILY_MAX_AGE'] = int(os.environ.get('JWT_REFRESH_FAMILY_MAX_AGE', 30 * 86400))  # Rotation can't extend a login past this (seconds)
+app.config['TOKEN_REVOCATION_FILE'] = os.environ.get('TOKEN_REVOCATION_FILE')  # Default: instance/revoked_tokens.log
 
 # Initialize JWT Manager
 jwt = JWTManager(app)
 
-# DATABASE CONFIGURATION
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///app.db'
+# Rotated / reused refresh tokens are refused through this (see revocation.py)
+revocation_store = RevocationStore(app, jwt)
+
+# DATABASE CONFIGURATION (DATABASE_URL / DB_PROFILE pick a tuned SQLite or pooled server engine, see db_profiles.py)
+db_profile = profile_from_env()
+db_profile.configure(app)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.json.compact = False
+# 📦 Compact JSON on the wire (JSON_PRETTY=1 for indented output while debugging); msgpack via Accept, see encoding.py
+app.json_provider_class = NegotiatingJSONProvider
+app.json = NegotiatingJSONProvider(app)
+app.json.compact = os.environ.get('JSON_PRETTY', '0') != '1'
+app.json.sort_keys = False  # Serializers already emit a fixed key order; sorting big payloads costs ~20% of encode time
+app.config['MSGPACK_ENABLED'] = os.environ.get('MSGPACK_ENABLED', '1') == '1'
 
 CORS(app)
 
@@ -39,8 +64,132 @@ metadata = MetaData(naming_convention={
 })
 
 db = SQLAlchemy(metadata=metadata)
-migrate = Migrate(app, db)
+migrate = Migrate(app, db, include_object=exclude_search_tables)
 db.init_app(app)
+with app.app_context():
+    db_profile.install(db.engine)  # Connect-time pragmas, before any connection is opened
+
+# BCRYPT (for hashing passwords, see hashing.py)
+app.config['BCRYPT_LOG_ROUNDS'] = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))  # Cost factor; raising it rehashes on next login
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))  # 0 = hash inline (handy for debugging)
+
+# All password hashing goes through this so bcrypt runs in a bounded worker pool
+password_hasher = PasswordHasher(app)
+
+# METRICS (Prometheus text format at /metrics; request/SQL/bcrypt instrumentation, see metrics.py)
+app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '1') == '1'
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')  # Scrapers send "Authorization: Bearer <token>"; unset = /metrics only in debug/testing
+metrics = Metrics(app, db, password_hasher)
+
+# QUERY PROFILER (dev/staging only: slow-query + N+1 logging with EXPLAIN, cProfile via header, see profiling.py)
+app.config['QUERY_PROFILER_ENABLED'] = os.environ.get('QUERY_PROFILER_ENABLED', '0') == '1'
+app.config['SLOW_QUERY_MS'] = float(os.environ.get('SLOW_QUERY_MS', 100))
+app.config['N_PLUS_ONE_THRESHOLD'] = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 5))  # Same statement this many times in one request
+app.config['REQUEST_PROFILE_HEADER'] = os.environ.get('REQUEST_PROFILE_HEADER', 'X-Profile')  # Send "X-Profile: 1" to cProfile a request
+app.config['REQUEST_PROFILE_DIR'] = os.environ.get('REQUEST_PROFILE_DIR')  # Default: instance/profiles
+query_profiler = QueryProfiler(app, db)
+
+# FULL-TEXT SEARCH (SQLite FTS5 index over event title/details/address; `flask search rebuild`, see search.py)
+event_search = EventSearch(app, db)
+
+# CALENDAR STATS (per-user month rollup behind /api/stats; `flask stats rebuild`, see stats.py)
+app.config['STATS_REBUILD_CHUNK_SIZE'] = int(os.environ.get('STATS_REBUILD_CHUNK_SIZE', 1000))
+event_stats = EventStats(app, db)
+
+# PHOTOS (content-addressed uploads + thumbnails from a process pool; `flask photos reprocess`, see photos.py)
+app.config['PHOTO_STORAGE'] = os.environ.get('PHOTO_STORAGE', 'photos.LocalPhotoStorage')
+app.config['PHOTO_STORAGE_DIR'] = os.environ.get('PHOTO_STORAGE_DIR')  # Default: instance/photos
+app.config['PHOTO_MAX_BYTES'] = int(os.environ.get('PHOTO_MAX_BYTES', 15 * 1024 * 1024))
+app.config['PHOTO_MAX_PIXELS'] = int(os.environ.get('PHOTO_MAX_PIXELS', 50_000_000))  # Decompression-bomb guard
+app.config['PHOTO_WORKERS'] = int(os.environ.get('PHOTO_WORKERS', 2))  # Thumbnailing processes per web process
+app.config['PHOTO_JPEG_QUALITY'] = int(os.environ.get('PHOTO_JPEG_QUALITY', 82))
+app.config['PHOTO_CACHE_MAX_AGE'] = int(os.environ.get('PHOTO_CACHE_MAX_AGE', 365 * 24 * 3600))  # Blobs never change
+photo_service = PhotoService(app, db)
+
+# RESPONSE CACHE (per-user cache of serialized reads; point RESPONSE_CACHE_BACKEND at a shared store when running several workers)
+app.config['RESPONSE_CACHE_ENABLED'] = os.environ.get('RESPONSE_CACHE_ENABLED', '1') == '1'
+app.config['RESPONSE_CACHE_BACKEND'] = os.environ.get('RESPONSE_CACHE_BACKEND', 'cache.LocalCacheBackend')
+app.config['RESPONSE_CACHE_MAX_ENTRIES'] = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 10000))
+app.config['RESPONSE_CACHE_MAX_BYTES'] = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+app.config['RESPONSE_CACHE_TTL'] = int(os.environ.get('RESPONSE_CACHE_TTL', 60))  # Seconds
+response_cache = ResponseCache(app)
+
+# RESPONSE COMPRESSION (gzip, or brotli when installed, for bodies over COMPRESSION_MIN_SIZE; registered after metrics so sizes are on-the-wire)
+app.config['COMPRESSION_ENABLED'] = os.environ.get('COMPRESSION_ENABLED', '1') == '1'
+app.config['COMPRESSION_MIN_SIZE'] = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))  # Bytes
+app.config['COMPRESSION_GZIP_LEVEL'] = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+app.config['COMPRESSION_BROTLI_QUALITY'] = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))  # 0-11; 4 is gzip-fast, smaller
+response_compressor = ResponseCompressor(app)
+
+# IDENTITY CACHE (JWT user lookup; profile fields cached per user id, see identity.py)
+app.config['IDENTITY_CACHE_MAX_ENTRIES'] = int(os.environ.get('IDENTITY_CACHE_MAX_ENTRIES', 10000))
+app.config['IDENTITY_CACHE_TTL'] = int(os.environ.get('IDENTITY_CACHE_TTL', 60))  # Seconds; bounds cross-worker staleness
+identity_cache = IdentityCache(app, jwt)
+
+# EMAIL OUTBOX (reset emails are queued in the DB and sent by a background worker, see outbox.py)
+app.config['MAIL_BACKEND'] = os.environ.get('MAIL_BACKEND', 'outbox.ConsoleMailer')  # outbox.SMTPMailer for real delivery
+app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'localhost')
+app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 587))
+app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
+app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
+app.config['MAIL_USE_TLS'] = os.environ.get('MAIL_USE_TLS', '1') == '1'
+app.config['MAIL_FROM'] = os.environ.get('MAIL_FROM', 'LoveLog <no-reply@lovelog.app>')
+app.config['OUTBOX_WORKER_ENABLED'] = os.environ.get('OUTBOX_WORKER_ENABLED', '1') == '1'
+app.config['OUTBOX_BATCH_SIZE'] = int(os.environ.get('OUTBOX_BATCH_SIZE', 50))
+app.config['OUTBOX_POLL_INTERVAL'] = int(os.environ.get('OUTBOX_POLL_INTERVAL', 5))  # Seconds
+app.config['OUTBOX_MAX_ATTEMPTS'] = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 8))
+app.config['OUTBOX_BACKOFF_BASE'] = int(os.environ.get('OUTBOX_BACKOFF_BASE', 30))  # Seconds; doubles per attempt
+email_outbox = EmailOutbox(app)
+
+# MAINTENANCE (periodic token / outbox / tombstone / deleted-account purges, ANALYZE, VACUUM; also `flask maintenance run|status|loop`, see maintenance.py)
+app.config['MAINTENANCE_SCHEDULER_ENABLED'] = os.environ.get('MAINTENANCE_SCHEDULER_ENABLED', '1') == '1'
+app.config['MAINTENANCE_TICK'] = int(os.environ.get('MAINTENANCE_TICK', 60))  # Seconds between due checks
+app.config['MAINTENANCE_PURGE_RESET_TOKENS_INTERVAL'] = int(os.environ.get('MAINTENANCE_PURGE_RESET_TOKENS_INTERVAL', 3600))
+app.config['MAINTENANCE_PURGE_OUTBOX_INTERVAL'] = int(os.environ.get('MAINTENANCE_PURGE_OUTBOX_INTERVAL', 6 * 3600))
+app.config['MAINTENANCE_PURGE_TOMBSTONES_INTERVAL'] = int(os.environ.get('MAINTENANCE_PURGE_TOMBSTONES_INTERVAL', 24 * 3600))
+app.config['MAINTENANCE_PURGE_DELETED_ACCOUNTS_INTERVAL'] = int(os.environ.get('MAINTENANCE_PURGE_DELETED_ACCOUNTS_INTERVAL', 60))
+app.config['MAINTENANCE_ANALYZE_INTERVAL'] = int(os.environ.get('MAINTENANCE_ANALYZE_INTERVAL', 24 * 3600))
+app.config['MAINTENANCE_VACUUM_INTERVAL'] = int(os.environ.get('MAINTENANCE_VACUUM_INTERVAL', 7 * 24 * 3600))  # 0 disables a job
+app.config['MAINTENANCE_CHUNK_SIZE'] = int(os.environ.get('MAINTENANCE_CHUNK_SIZE', 1000))  # Rows deleted per transaction
+app.config['MAINTENANCE_CHUNK_PAUSE'] = float(os.environ.get('MAINTENANCE_CHUNK_PAUSE', 0.05))  # Seconds between chunks, lets request writers in
+app.config['ACCOUNT_DELETE_INLINE_MAX_EVENTS'] = int(os.environ.get('ACCOUNT_DELETE_INLINE_MAX_EVENTS', 2000))  # Larger accounts are purged in the background
+app.config['OUTBOX_RETENTION_DAYS'] = int(os.environ.get('OUTBOX_RETENTION_DAYS', 7))
+app.config['SYNC_TOMBSTONE_RETENTION_DAYS'] = int(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', 30))  # Older sync tokens get a full resync
+maintenance = MaintenanceScheduler(app)
+
+# RATE LIMITING (token buckets per client IP / per submitted email on auth routes, see ratelimit.py)
+app.config['RATELIMIT_ENABLED'] = os.environ.get('RATELIMIT_ENABLED', '1') == '1'
+app.config['RATELIMIT_BACKEND'] = os.environ.get('RATELIMIT_BACKEND', 'ratelimit.LocalRateLimitBackend')  # Shared store for several workers
+app.config['RATELIMIT_MAX_KEYS'] = int(os.environ.get('RATELIMIT_MAX_KEYS', 100000))
+app.config['RATELIMIT_MAX_CONCURRENT'] = int(os.environ.get('RATELIMIT_MAX_CONCURRENT', 8))  # bcrypt-bound requests in flight per process
+app.config['RATELIMIT_ADMISSION_TIMEOUT'] = float(os.environ.get('RATELIMIT_ADMISSION_TIMEOUT', 0.5))  # Seconds to wait for a slot
+app.config['RATE_LIMITS'] = {
+    "login": {"ip": "20/minute", "email": "5/minute"},
+    "signup": {"ip": "5/minute"},
+    "forgot_password": {"ip": "5/minute", "email": "3/hour"},
+    "reset_password": {"ip": "10/minute"},
+    "photo_upload": {"ip": "30/minute"},
+    **json.loads(os.environ.get('RATE_LIMITS', '{}')),  # e.g. RATE_LIMITS='{"login": {"ip": "50/minute"}}'
+}
+rate_limiter = RateLimiter(app)
+
+
+def collect_component_metrics():
+    """Cache and maintenance-job numbers for /metrics."""
+    cache, identity = response_cache.stats(), identity_cache.stats()
+    jobs = dict(maintenance.metrics)
+    return [
+        *sample_lines("response_cache_requests_total", "Response cache lookups.", "counter",
+                      {"hit": cache.get("hits", 0), "miss": cache.get("misses", 0)}, "result"),
+        *sample_lines("response_cache_evictions_total", "Response cache LRU/size evictions.", "counter", cache.get("evictions", 0)),
+        *sample_lines("response_cache_bytes", "Bytes held by the response cache.", "gauge", cache.get("bytes", 0)),
+        *sample_lines("identity_cache_requests_total", "Identity cache lookups.", "counter",
+                      {"hit": identity["hits"], "miss": identity["misses"]}, "result"),
+        *sample_lines("maintenance_job_runs_total", "Maintenance job runs in this process.", "counter",
+                      {name: job["runs"] for name, job in jobs.items()}, "job"),
+        *sample_lines("maintenance_job_last_duration_seconds", "Duration of the last run in this process.", "gauge",
+                      {name: job["last_seconds"] for name, job in jobs.items()}, "job"),
+    ]
+
 
-# BCRYPT (for hashing passwords)
-bcrypt = Bcrypt(app)
+metrics.add_collector(collect_component_metrics)
@@ -0,0 +1,128 @@
+import os
+
+from sqlalchemy import event
+
+
+def _env(environ, name, default, cast=str):
+    value = environ.get(name)
+    return default if value in (None, "") else cast(value)
+
+
+def _env_bool(value):
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class EngineProfile:
+    """How the SQLAlchemy engine is built and tuned for one kind of database."""
+
+    name = None
+
+    def __init__(self, url):
+        self.url = url
+
+    def engine_options(self):
+        """Keyword arguments for create_engine (SQLALCHEMY_ENGINE_OPTIONS)."""
+        return {}
+
+    def install(self, engine):
+        """Attach connect-time hooks to an engine built from engine_options()."""
+
+    def configure(self, app):
+        """Point the Flask app at this profile's database; call before db.init_app(app)."""
+        app.config["SQLALCHEMY_DATABASE_URI"] = self.url
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = self.engine_options()
+        app.config["DB_ENGINE_PROFILE"] = self.name
+
+
+class SQLiteProfile(EngineProfile):
+    """Single-file SQLite tuned for concurrent readers with one writer at a time.
+
+    WAL lets reads proceed during a write, synchronous=NORMAL drops the fsync per commit
+    (still safe against app crashes in WAL mode), busy_timeout makes writers wait for the
+    lock instead of failing with "database is locked", and mmap/cache_size keep hot pages
+    in memory.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, url, journal_mode="WAL", synchronous="NORMAL", mmap_size=256 * 1024 * 1024,
+                 busy_timeout=5000, cache_size=-64 * 1024):
+        super().__init__(url)
+        self.pragmas = {
+            "journal_mode": journal_mode,
+            "synchronous": synchronous,
+            "mmap_size": mmap_size,
+            "busy_timeout": busy_timeout,  # Milliseconds
+            "cache_size": cache_size,  # Negative = KiB rather than pages
+        }
+
+    @classmethod
+    def from_env(cls, url, environ):
+        return cls(
+            url,
+            journal_mode=_env(environ, "SQLITE_JOURNAL_MODE", "WAL"),
+            synchronous=_env(environ, "SQLITE_SYNCHRONOUS", "NORMAL"),
+            mmap_size=_env(environ, "SQLITE_MMAP_SIZE", 256 * 1024 * 1024, int),
+            busy_timeout=_env(environ, "SQLITE_BUSY_TIMEOUT_MS", 5000, int),
+            cache_size=_env(environ, "SQLITE_CACHE_SIZE", -64 * 1024, int),
+        )
+
+    def engine_options(self):
+        # Let the Python driver wait as long as SQLite's own busy handler would
+        return {"connect_args": {"timeout": self.pragmas["busy_timeout"] / 1000}}
+
+    def install(self, engine):
+        pragmas = [(name, value) for name, value in self.pragmas.items() if value is not None]
+
+        @event.listens_for(engine, "connect")
+        def apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for name, value in pragmas:
+                    cursor.execute(f"PRAGMA {name}={value}")
+            finally:
+                cursor.close()
+
+
+class ServerProfile(EngineProfile):
+    """Client/server database (PostgreSQL, MySQL...) behind a sized connection pool."""
+
+    name = "server"
+
+    def __init__(self, url, pool_size=10, max_overflow=20, pool_pre_ping=True, pool_recycle=1800, pool_timeout=30):
+        super().__init__(url)
+        self.pool = {
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_pre_ping": pool_pre_ping,  # Drop connections the server closed while idle
+            "pool_recycle": pool_recycle,  # Seconds; stay under the server/proxy idle timeout
+            "pool_timeout": pool_timeout,
+        }
+
+    @classmethod
+    def from_env(cls, url, environ):
+        return cls(
+            url,
+            pool_size=_env(environ, "DB_POOL_SIZE", 10, int),
+            max_overflow=_env(environ, "DB_MAX_OVERFLOW", 20, int),
+            pool_pre_ping=_env(environ, "DB_POOL_PRE_PING", True, _env_bool),
+            pool_recycle=_env(environ, "DB_POOL_RECYCLE", 1800, int),
+            pool_timeout=_env(environ, "DB_POOL_TIMEOUT", 30, int),
+        )
+
+    def engine_options(self):
+        return dict(self.pool)
+
+
+PROFILES = {profile.name: profile for profile in (SQLiteProfile, ServerProfile)}
+
+
+def profile_from_env(environ=os.environ):
+    """Pick the engine profile from DATABASE_URL / DB_PROFILE (auto-detected from the URL by default)."""
+    url = _env(environ, "DATABASE_URL", "sqlite:///app.db")
+    name = _env(environ, "DB_PROFILE", "auto")
+    if name == "auto":
+        name = "sqlite" if url.startswith("sqlite") else "server"
+    if name not in PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {name!r}; expected one of {sorted(PROFILES)} or 'auto'")
+    return PROFILES[name].from_env(url, environ)
@@ -0,0 +1,124 @@
+import gzip
+from functools import partial
+
+from flask import current_app, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip is offered
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:  # Optional: without it every client gets JSON
+    msgpack = None
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+MSGPACK_MIMETYPES = (MSGPACK_MIMETYPE, "application/x-msgpack")
+
+
+def negotiated_mimetype():
+    """application/msgpack when the client's Accept prefers it over JSON (and msgpack is on), else JSON."""
+    if msgpack is None or not current_app.config.get("MSGPACK_ENABLED", True) or not request:
+        return JSON_MIMETYPE
+    accept = request.accept_mimetypes
+    msgpack_quality = max(accept.quality(mimetype) for mimetype in MSGPACK_MIMETYPES)
+    # Only an explicit msgpack entry counts: "*/*" alone (browsers, fetch) keeps JSON
+    if msgpack_quality and msgpack_quality > accept[JSON_MIMETYPE] and any(
+        value in MSGPACK_MIMETYPES for value, _ in accept
+    ):
+        return MSGPACK_MIMETYPE
+    return JSON_MIMETYPE
+
+
+def weaken_etag(response):
+    """Mark a strong ETag weak: the data is the same as the plain JSON response, the bytes aren't."""
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+class NegotiatingJSONProvider(DefaultJSONProvider):
+    """jsonify() that answers in MessagePack when the request asks for it through Accept.
+
+    The view still returns the same dict; only the wire encoding changes. Values msgpack
+    can't pack natively (dates, decimals...) go through the same `default` as JSON does.
+    """
+
+    def response(self, *args, **kwargs):
+        if negotiated_mimetype() != MSGPACK_MIMETYPE:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = msgpack.packb(obj, default=self.default)
+        return self._app.response_class(body, mimetype=MSGPACK_MIMETYPE)
+
+
+class ResponseCompressor:
+    """gzip / brotli for buffered API responses, chosen from Accept-Encoding.
+
+    Runs as an after_request hook, so it sees JSON, MessagePack and /metrics bodies alike.
+    Streamed (export) and file (photo) responses are left alone, as are bodies under
+    COMPRESSION_MIN_SIZE, where the headers would outweigh the savings. Compressed
+    responses carry a weak ETag (same data, different bytes) and Vary: Accept-Encoding.
+    Brotli wins ties when the `brotli` package is installed.
+
+    Config keys:
+      - COMPRESSION_ENABLED / COMPRESSION_MIN_SIZE (bytes) / COMPRESSION_MIMETYPES
+      - COMPRESSION_GZIP_LEVEL / COMPRESSION_BROTLI_QUALITY
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get("COMPRESSION_ENABLED", True)
+        self.negotiates = msgpack is not None and app.config.get("MSGPACK_ENABLED", True)
+        self.min_size = app.config.get("COMPRESSION_MIN_SIZE", 1024)
+        self.mimetypes = set(app.config.get("COMPRESSION_MIMETYPES", (JSON_MIMETYPE, MSGPACK_MIMETYPE, "text/plain")))
+        self.encoders = {"gzip": partial(gzip.compress, compresslevel=app.config.get("COMPRESSION_GZIP_LEVEL", 6), mtime=0)}
+        if brotli is not None:
+            self.encoders = {"br": partial(brotli.compress, quality=app.config.get("COMPRESSION_BROTLI_QUALITY", 4)), **self.encoders}
+        app.after_request(self._after_request)
+
+    def choose(self, accept_encoding):
+        """Best encoding we support from an Accept-Encoding header, or None for identity."""
+        best, best_quality = None, 0
+        for name in self.encoders:  # Preference order: br, then gzip
+            quality = accept_encoding.quality(name)
+            if quality > best_quality:
+                best, best_quality = name, quality
+        return best
+
+    def compress(self, body, encoding):
+        return self.encoders[encoding](body)
+
+    def _after_request(self, response):
+        if self.negotiates and response.mimetype in (JSON_MIMETYPE, MSGPACK_MIMETYPE):
+            response.vary.add("Accept")
+        if response.mimetype == MSGPACK_MIMETYPE:
+            weaken_etag(response)  # Shares its ETag with the JSON representation
+        if (
+            not self.enabled
+            or response.direct_passthrough
+            or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in self.mimetypes
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+        encoding = self.choose(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        response.set_data(self.compress(body, encoding))
+        response.headers["Content-Encoding"] = encoding
+        weaken_etag(response)
+        return response
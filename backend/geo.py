@@ -0,0 +1,114 @@
+import math
+
+# 🌍 Geohash helpers backing the map's viewport queries
+GEOHASH_PRECISION = 9  # ~5m x 5m cells, plenty for "where was this date"
+EARTH_RADIUS_M = 6371008.8
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Standard base32 geohash of a point, or None if either coordinate is missing."""
+    if latitude is None or longitude is None:
+        return None
+
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits = bit_count = 0
+    even = True  # Geohash interleaves bits starting with longitude
+
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if longitude >= mid:
+                bits, lon_lo = bits * 2 + 1, mid
+            else:
+                bits, lon_hi = bits * 2, mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                bits, lat_lo = bits * 2 + 1, mid
+            else:
+                bits, lat_hi = bits * 2, mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = bit_count = 0
+
+    return "".join(chars)
+
+
+def _cell_size(precision):
+    """(lat_degrees, lon_degrees) covered by one geohash cell of this length."""
+    lat_bits = 5 * precision // 2
+    lon_bits = 5 * precision - lat_bits
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits), lat_bits, lon_bits
+
+
+def covering_prefixes(min_lat, min_lon, max_lat, max_lon, max_cells=32):
+    """Geohash prefixes whose cells together cover the bounding box.
+
+    Picks the longest prefix length that needs at most `max_cells` cells, so the
+    index lookup stays a handful of narrow range scans. Boxes crossing the
+    antimeridian must be split by the caller.
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_step, lon_step, lat_bits, lon_bits = _cell_size(precision)
+        # Clamp both ends: a box edge on lat 90 / lon 180 would index one cell past the grid
+        lat_first = min(int((min_lat + 90) // lat_step), (1 << lat_bits) - 1)
+        lat_last = min(int((max_lat + 90) // lat_step), (1 << lat_bits) - 1)
+        lon_first = min(int((min_lon + 180) // lon_step), (1 << lon_bits) - 1)
+        lon_last = min(int((max_lon + 180) // lon_step), (1 << lon_bits) - 1)
+        if (lat_last - lat_first + 1) * (lon_last - lon_first + 1) <= max_cells:
+            break
+
+    prefixes = set()
+    for lat_index in range(lat_first, lat_last + 1):
+        for lon_index in range(lon_first, lon_last + 1):
+            prefixes.add(encode_geohash(
+                -90 + (lat_index + 0.5) * lat_step,
+                -180 + (lon_index + 0.5) * lon_step,
+                precision
+            ))
+    return sorted(prefixes)
+
+
+def split_bbox(min_lat, min_lon, max_lat, max_lon):
+    """Split a box crossing the antimeridian (min_lon > max_lon) into two plain boxes."""
+    if min_lon <= max_lon:
+        return [(min_lat, min_lon, max_lat, max_lon)]
+    return [(min_lat, min_lon, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lon)]
+
+
+def radius_bbox(latitude, longitude, radius_m):
+    """Bounding box (possibly antimeridian-crossing) around a circle on the globe."""
+    lat_delta = math.degrees(radius_m / EARTH_RADIUS_M)
+    min_lat = max(latitude - lat_delta, -90.0)
+    max_lat = min(latitude + lat_delta, 90.0)
+
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if min_lat == -90.0 or max_lat == 90.0 or cos_lat < 1e-9:
+        return min_lat, -180.0, max_lat, 180.0  # Circle covers a pole: every longitude
+
+    lon_delta = lat_delta / cos_lat
+    if lon_delta >= 180.0:
+        return min_lat, -180.0, max_lat, 180.0
+
+    min_lon = longitude - lon_delta
+    max_lon = longitude + lon_delta
+    if min_lon < -180.0:
+        min_lon += 360.0
+    if max_lon > 180.0:
+        max_lon -= 360.0
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in meters."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
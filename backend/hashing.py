@@ -0,0 +1,100 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+
+import bcrypt
+
+
+# 🔹 These run inside the worker processes, so they must stay module-level (picklable).
+# They call the bcrypt package directly: importing config here would build the whole app in
+# every worker under the spawn start method. Hashes use the $2b$ prefix, as Flask-Bcrypt's did.
+def _generate_hash(password, rounds):
+    if not password:
+        raise ValueError('Password must be non-empty.')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check_hash(password_hash, password):
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    except ValueError:  # Not a bcrypt hash, e.g. the "!" of a closed account
+        return False
+
+
+def hash_cost(password_hash):
+    """Cost factor encoded in a bcrypt hash ($2b$<cost>$...), or None if unreadable."""
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """Runs bcrypt in a bounded process pool so hashing never burns request-thread CPU.
+
+    Config keys (read from the Flask app):
+      - BCRYPT_LOG_ROUNDS: cost factor for new hashes
+      - PASSWORD_HASH_WORKERS: pool size; 0 hashes inline on the calling thread
+    """
+
+    def __init__(self, app=None):
+        self.rounds = 12
+        self.workers = 0
+        self._pool = None
+        self._pool_pid = None
+        self._lock = Lock()
+        self.observer = None  # Optional callback(operation, seconds), set by metrics.py
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.rounds = app.config.get('BCRYPT_LOG_ROUNDS', self.rounds)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+
+    def _get_pool(self):
+        # Created lazily and per process, so a forking server never shares a parent's pool
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        try:
+            return self._get_pool().submit(fn, *args).result()
+        except BrokenProcessPool:
+            # A worker died (OOM kill etc.): drop the pool and answer this call inline
+            with self._lock:
+                self._pool = None
+            return fn(*args)
+
+    def _timed(self, operation, fn, *args):
+        if self.observer is None:
+            return self._run(fn, *args)
+        started = time.perf_counter()
+        try:
+            return self._run(fn, *args)
+        finally:
+            self.observer(operation, time.perf_counter() - started)
+
+    def hash(self, password):
+        """Hash a plaintext password with the configured cost."""
+        return self._timed("hash", _generate_hash, password, self.rounds)
+
+    def verify(self, password_hash, password):
+        """Check a plaintext password against a stored hash."""
+        return self._timed("verify", _check_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True when the stored hash was made with a different cost than configured."""
+        return hash_cost(password_hash) != self.rounds
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+            self._pool = None
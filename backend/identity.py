@@ -0,0 +1,99 @@
+import time
+from collections import OrderedDict, namedtuple
+from threading import Lock
+
+from flask import jsonify
+from sqlalchemy import select
+
+# 🔹 What a JWT-protected view knows about the caller without touching the users table.
+# No profile fields: those would lag a change by IDENTITY_CACHE_TTL on other workers, so
+# GET /api/user reads them fresh. The refresh route re-reads token_version for the same reason.
+Identity = namedtuple("Identity", ["id", "token_version"])
+
+
+class IdentityCache:
+    """Resolves the JWT identity to an Identity through a bounded LRU + TTL cache.
+
+    Registered as flask_jwt_extended's user lookup, so every @jwt_required() view gets
+    `current_user`. Tokens of deleted accounts, and tokens whose "ver" claim is older than
+    the user's token_version (password changed or reset), are refused with 401.
+    Unknown ids are cached too. Call `invalidate(user_id)` after any commit that bumps
+    token_version or removes the user; other workers catch up within IDENTITY_CACHE_TTL.
+
+    Config keys:
+      - IDENTITY_CACHE_MAX_ENTRIES / IDENTITY_CACHE_TTL (seconds, 0 disables caching)
+    """
+
+    def __init__(self, app=None, jwt=None):
+        self.max_entries = 10000
+        self.ttl = 60
+        self._entries = OrderedDict()  # user_id -> (expires_at, Identity or None)
+        self._generations = {}
+        self._epoch = 0
+        self._lock = Lock()
+        self.hits = self.misses = 0
+        if app is not None:
+            self.init_app(app, jwt)
+
+    def init_app(self, app, jwt):
+        self.max_entries = app.config.get("IDENTITY_CACHE_MAX_ENTRIES", 10000)
+        self.ttl = app.config.get("IDENTITY_CACHE_TTL", 60)
+        identity_claim = app.config.get("JWT_IDENTITY_CLAIM", "sub")
+
+        @jwt.user_lookup_loader
+        def lookup_user(jwt_header, jwt_data):
+            identity = self.get(jwt_data[identity_claim])
+            if identity is None or jwt_data.get("ver", 0) != identity.token_version:
+                return None
+            return identity
+
+        @jwt.user_lookup_error_loader
+        def user_not_found(jwt_header, jwt_data):
+            if self.get(jwt_data[identity_claim]) is not None:  # Account exists, the token predates a token_version bump
+                return jsonify({"error": "Token has been revoked"}), 401
+            return jsonify({"error": "User not found"}), 401
+
+    def get(self, user_id):
+        """The caller's Identity, or None if the account no longer exists."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] >= time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            snapshot = (self._epoch, self._generations.get(user_id, 0))
+
+        identity = self._load(user_id)
+
+        with self._lock:
+            # Skip the store if an invalidate landed while we were reading
+            if self.ttl > 0 and snapshot == (self._epoch, self._generations.get(user_id, 0)):
+                self._entries[user_id] = (time.monotonic() + self.ttl, identity)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return identity
+
+    def _load(self, user_id):
+        from config import db
+        from models import User
+
+        row = db.session.execute(
+            select(User.id, User.token_version).where(User.id == user_id, User.deleted_at.is_(None))
+        ).first()
+        return Identity(*row) if row else None
+
+    def invalidate(self, user_id):
+        """Forget a user's cached identity; call after the write commits."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+            if len(self._generations) >= self.max_entries:
+                # Bounded bookkeeping: the epoch bump still refuses lookups already in flight
+                self._generations.clear()
+                self._epoch += 1
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
@@ -0,0 +1,313 @@
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import delete, or_, select, text, update
+from sqlalchemy.exc import IntegrityError
+
+
+def delete_in_chunks(db, model, condition, chunk_size, pause=0):
+    """Delete matching rows `chunk_size` at a time, committing each chunk; returns the row count.
+
+    `pause` sleeps between chunks so request writers get the (SQLite) write lock in between.
+    """
+    total = 0
+    while True:
+        ids = db.session.scalars(select(model.id).where(condition).limit(chunk_size)).all()
+        if not ids:
+            return total
+        db.session.execute(delete(model).where(model.id.in_(ids)), execution_options={"synchronize_session": False})
+        db.session.commit()
+        total += len(ids)
+        if pause and len(ids) == chunk_size:
+            time.sleep(pause)
+
+
+def delete_account_rows(db, user_id, chunk_size=None, pause=0):
+    """Remove everything a user owns, then the user row itself; returns the number of events deleted.
+
+    Without `chunk_size` it is a handful of set-based DELETE ... WHERE user_id = ? statements
+    in the caller's transaction (the caller commits). With it, events and tombstones go in
+    committed chunks, for accounts too large to delete under one write lock.
+    """
+    from models import Event, EventMonthStat, EventTombstone, PasswordResetToken, User
+
+    options = {"synchronize_session": False}
+    if chunk_size is None:
+        events = db.session.execute(delete(Event).where(Event.user_id == user_id), execution_options=options).rowcount
+        db.session.execute(delete(EventTombstone).where(EventTombstone.user_id == user_id), execution_options=options)
+    else:
+        events = delete_in_chunks(db, Event, Event.user_id == user_id, chunk_size, pause)
+        delete_in_chunks(db, EventTombstone, EventTombstone.user_id == user_id, chunk_size, pause)
+    # One row per month / per outstanding reset: small enough to go in one statement either way
+    db.session.execute(delete(EventMonthStat).where(EventMonthStat.user_id == user_id), execution_options=options)
+    db.session.execute(delete(PasswordResetToken).where(PasswordResetToken.user_id == user_id), execution_options=options)
+    db.session.execute(delete(User).where(User.id == user_id), execution_options=options)
+    return events
+
+
+# 🔹 Jobs: plain functions taking the scheduler, returning a small JSON-able summary
+
+def purge_reset_tokens(scheduler):
+    from config import db
+    from models import PasswordResetToken
+
+    cutoff = datetime.utcnow() - PasswordResetToken.LIFETIME
+    deleted = delete_in_chunks(db, PasswordResetToken, PasswordResetToken.created_at < cutoff, scheduler.chunk_size)
+    return {"deleted": deleted}
+
+
+def purge_outbox(scheduler):
+    from config import db
+    from models import OutboxMessage
+
+    cutoff = datetime.utcnow() - timedelta(days=scheduler.outbox_retention_days)
+    condition = OutboxMessage.status.in_(("sent", "failed")) & (OutboxMessage.created_at < cutoff)
+    return {"deleted": delete_in_chunks(db, OutboxMessage, condition, scheduler.chunk_size)}
+
+
+def purge_tombstones(scheduler):
+    """Forget deletions older than the sync window; /api/events/changes sends older tokens a full resync."""
+    from config import db
+    from models import EventTombstone
+
+    cutoff = datetime.utcnow() - timedelta(days=scheduler.tombstone_retention_days)
+    return {"deleted": delete_in_chunks(db, EventTombstone, EventTombstone.deleted_at < cutoff, scheduler.chunk_size, scheduler.chunk_pause)}
+
+
+def purge_deleted_accounts(scheduler):
+    """Finish deleting accounts that were too large to delete inside the request."""
+    from config import db
+    from models import User
+
+    accounts = events = 0
+    for user_id in db.session.scalars(select(User.id).where(User.deleted_at.is_not(None)).order_by(User.deleted_at)).all():
+        events += delete_account_rows(db, user_id, scheduler.chunk_size, scheduler.chunk_pause)
+        db.session.commit()
+        accounts += 1
+    return {"accounts": accounts, "events": events}
+
+
+def analyze(scheduler):
+    """Refresh the query planner's statistics."""
+    from config import db
+
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("ANALYZE"))
+        if connection.dialect.name == "sqlite":
+            connection.execute(text("PRAGMA optimize"))
+    return {}
+
+
+def vacuum(scheduler):
+    """Compact the database; on SQLite only when enough of the file is free pages."""
+    from config import db
+
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        if connection.dialect.name != "sqlite":
+            connection.execute(text("VACUUM"))
+            return {}
+        page_count = connection.execute(text("PRAGMA page_count")).scalar()
+        free_pages = connection.execute(text("PRAGMA freelist_count")).scalar()
+        free_ratio = free_pages / page_count if page_count else 0
+        if free_ratio < scheduler.vacuum_min_free_ratio:
+            return {"skipped": True, "free_ratio": round(free_ratio, 3)}
+        connection.execute(text("VACUUM"))
+        connection.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+        return {"free_ratio": round(free_ratio, 3), "pages_before": page_count}
+
+
+class MaintenanceScheduler:
+    """Runs periodic database housekeeping, at most once per interval across all workers.
+
+    Each job has a row in maintenance_jobs. A worker claims it with one conditional UPDATE
+    (not locked, or lease expired, and interval elapsed), so concurrent processes never run
+    the same job twice. The row also records the last run's duration and result; per-process
+    duration metrics are kept in `metrics`. Runs from a daemon thread when
+    MAINTENANCE_SCHEDULER_ENABLED, or on demand with `flask maintenance run`.
+
+    Config keys:
+      - MAINTENANCE_SCHEDULER_ENABLED / MAINTENANCE_TICK (seconds between due checks)
+      - MAINTENANCE_<JOB>_INTERVAL (seconds; 0 disables the job)
+      - MAINTENANCE_LOCK_LEASE / MAINTENANCE_CHUNK_SIZE / MAINTENANCE_CHUNK_PAUSE (seconds)
+      - MAINTENANCE_VACUUM_MIN_FREE_RATIO
+      - OUTBOX_RETENTION_DAYS / SYNC_TOMBSTONE_RETENTION_DAYS
+    """
+
+    JOBS = {
+        "purge_reset_tokens": (purge_reset_tokens, 3600),
+        "purge_outbox": (purge_outbox, 6 * 3600),
+        "purge_tombstones": (purge_tombstones, 24 * 3600),
+        "purge_deleted_accounts": (purge_deleted_accounts, 60),
+        "analyze": (analyze, 24 * 3600),
+        "vacuum": (vacuum, 7 * 24 * 3600),
+    }
+
+    def __init__(self, app=None):
+        self.app = None
+        self.jobs = {}
+        self.metrics = {}
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._thread = None
+        self._thread_pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get("MAINTENANCE_SCHEDULER_ENABLED", True)
+        self.tick = app.config.get("MAINTENANCE_TICK", 60)
+        self.lease = timedelta(seconds=app.config.get("MAINTENANCE_LOCK_LEASE", 3600))
+        self.chunk_size = app.config.get("MAINTENANCE_CHUNK_SIZE", 1000)
+        self.chunk_pause = app.config.get("MAINTENANCE_CHUNK_PAUSE", 0.05)
+        self.vacuum_min_free_ratio = app.config.get("MAINTENANCE_VACUUM_MIN_FREE_RATIO", 0.1)
+        self.outbox_retention_days = app.config.get("OUTBOX_RETENTION_DAYS", 7)
+        self.tombstone_retention_days = app.config.get("SYNC_TOMBSTONE_RETENTION_DAYS", 30)
+        for name, (job, default_interval) in self.JOBS.items():
+            interval = app.config.get(f"MAINTENANCE_{name.upper()}_INTERVAL", default_interval)
+            if interval:
+                self.jobs[name] = (job, timedelta(seconds=interval))
+
+        @app.before_request
+        def start_maintenance_scheduler():
+            self.start()
+
+        app.cli.add_command(self._cli())
+
+    def start(self):
+        # Same lazy per-process thread as the email outbox worker
+        if not self.enabled or (self._thread_pid == os.getpid() and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread_pid == os.getpid() and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._loop, name="maintenance", daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            time.sleep(self.tick)
+            try:
+                self.run_pending()
+            except Exception as e:
+                self.app.logger.exception("Maintenance scheduler error: %s", e)
+
+    def run_pending(self, names=None, force=False):
+        """Run every due job (or just `names`); returns {name: summary} for the ones this worker ran."""
+        ran = {}
+        with self.app.app_context():
+            for name in names or list(self.jobs):
+                job, interval = self.jobs[name]
+                if self._acquire(name, interval, force):
+                    ran[name] = self._run(name, job)
+        return ran
+
+    def _acquire(self, name, interval, force):
+        from config import db
+        from models import MaintenanceJob
+
+        if db.session.get(MaintenanceJob, name) is None:
+            try:
+                db.session.add(MaintenanceJob(name=name, runs=0))
+                db.session.commit()
+            except IntegrityError:  # Another worker created it first
+                db.session.rollback()
+
+        now = datetime.utcnow()
+        claim = (
+            update(MaintenanceJob)
+            .where(MaintenanceJob.name == name)
+            .where(or_(MaintenanceJob.locked_until.is_(None), MaintenanceJob.locked_until < now))
+            .values(locked_until=now + self.lease, locked_by=self.owner, last_started_at=now)
+        )
+        if not force:
+            claim = claim.where(or_(
+                MaintenanceJob.last_finished_at.is_(None), MaintenanceJob.last_finished_at <= now - interval
+            ))
+        acquired = db.session.execute(claim).rowcount == 1
+        db.session.commit()
+        return acquired
+
+    def _run(self, name, job):
+        from config import db
+        from models import MaintenanceJob
+
+        started = time.perf_counter()
+        try:
+            result, status = job(self), "ok"
+        except Exception as e:
+            db.session.rollback()
+            result, status = {"error": f"{type(e).__name__}: {e}"}, "error"
+            self.app.logger.exception("Maintenance job %s failed", name)
+        duration = time.perf_counter() - started
+
+        db.session.execute(
+            update(MaintenanceJob)
+            .where(MaintenanceJob.name == name, MaintenanceJob.locked_by == self.owner)
+            .values(
+                locked_until=None,
+                last_finished_at=datetime.utcnow(),
+                last_duration_ms=int(duration * 1000),
+                last_status=status,
+                last_result=json.dumps(result),
+                runs=MaintenanceJob.runs + 1,
+            )
+        )
+        db.session.commit()
+
+        with self._lock:
+            metric = self.metrics.setdefault(name, {"runs": 0, "failures": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            metric["runs"] += 1
+            metric["failures"] += status != "ok"
+            metric["total_seconds"] += duration
+            metric["max_seconds"] = max(metric["max_seconds"], duration)
+            metric["last_seconds"] = duration
+        self.app.logger.info("Maintenance job %s %s in %.3fs: %s", name, status, duration, result)
+        return {"status": status, "duration_ms": int(duration * 1000), **result}
+
+    def _cli(self):
+        group = click.Group("maintenance", help="Database housekeeping jobs.")
+
+        @group.command("run")
+        @click.argument("names", nargs=-1)
+        @click.option("--force", is_flag=True, help="Run even if the interval hasn't elapsed.")
+        def run_command(names, force):
+            """Run due jobs now (all, or the given NAMES)."""
+            unknown = set(names) - set(self.jobs)
+            if unknown:
+                raise click.BadParameter(f"unknown job(s): {', '.join(sorted(unknown))}; choose from {', '.join(self.jobs)}")
+            ran = self.run_pending(names or None, force=force)
+            for name in names or self.jobs:
+                click.echo(f"{name}: {json.dumps(ran[name]) if name in ran else 'not due or locked'}")
+
+        @group.command("status")
+        def status_command():
+            """Show each job's last run."""
+            from config import db
+            from models import MaintenanceJob
+
+            rows = {row.name: row for row in db.session.scalars(select(MaintenanceJob))}
+            for name, (_, interval) in self.jobs.items():
+                row = rows.get(name)
+                if row is None or row.last_finished_at is None:
+                    click.echo(f"{name}: never run (every {interval})")
+                else:
+                    click.echo(f"{name}: {row.last_status} at {row.last_finished_at:%Y-%m-%d %H:%M:%S} UTC in "
+                               f"{row.last_duration_ms} ms, {row.runs} runs (every {interval}) {row.last_result}")
+
+        @group.command("loop")
+        def loop_command():
+            """Run the scheduler in the foreground (for a dedicated maintenance process)."""
+            click.echo(f"🧹 Checking {len(self.jobs)} jobs every {self.tick}s")
+            while True:
+                for name, summary in self.run_pending().items():
+                    click.echo(f"{name}: {json.dumps(summary)}")
+                time.sleep(self.tick)
+
+        return group
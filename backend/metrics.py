@@ -0,0 +1,184 @@
+import threading
+import time
+from bisect import bisect_left
+
+from flask import request
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SQL_SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+HASH_BUCKETS = (0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, buckets, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Metrics:
+    """Request, SQL and password-hashing instrumentation rendered in the Prometheus text format.
+
+    Per request: latency, status, response size, and how many SQL statements it ran and
+    for how long (SQLAlchemy cursor events, tallied in a thread-local). Routes are labelled
+    by their URL rule, never the raw path, so label cardinality stays fixed. Each process
+    keeps its own numbers; with several workers, scrape each one or aggregate upstream.
+    Streamed responses are timed to the first byte.
+
+    Config keys:
+      - METRICS_ENABLED: install the hooks at all (default True)
+    """
+
+    def __init__(self, app=None, db=None, password_hasher=None):
+        self.enabled = True
+        self._local = threading.local()
+        self._collectors = []
+        self.requests = Counter("http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status"))
+        self.latency = Histogram("http_request_duration_seconds", "Time to produce a response.", LATENCY_BUCKETS, ("route", "method"))
+        self.response_size = Histogram("http_response_size_bytes", "Response body size.", SIZE_BUCKETS, ("route", "method"))
+        self.request_sql_count = Histogram("http_request_sql_statements", "SQL statements run per request.", SQL_COUNT_BUCKETS, ("route", "method"))
+        self.request_sql_time = Histogram("http_request_sql_seconds", "Time spent in SQL per request.", SQL_SECONDS_BUCKETS, ("route", "method"))
+        self.sql_statements = Counter("sql_statements_total", "SQL statements run, in and outside requests.", ("context",))
+        self.sql_time = Counter("sql_seconds_total", "Time spent in SQL, in and outside requests.", ("context",))
+        self.password_hash_time = Histogram("password_hash_seconds", "bcrypt hash/verify time.", HASH_BUCKETS, ("operation",))
+        self._all = [
+            self.requests, self.latency, self.response_size, self.request_sql_count, self.request_sql_time,
+            self.sql_statements, self.sql_time, self.password_hash_time,
+        ]
+        if app is not None:
+            self.init_app(app, db, password_hasher)
+
+    def init_app(self, app, db, password_hasher=None):
+        self.enabled = app.config.get("METRICS_ENABLED", True)
+        if not self.enabled:
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        with app.app_context():
+            event.listen(db.engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(db.engine, "after_cursor_execute", self._after_cursor_execute)
+        if password_hasher is not None:
+            password_hasher.observer = self.observe_password_hash
+
+    def add_collector(self, collector):
+        """Register a callable returning extra exposition lines (gauges from caches, jobs...)."""
+        self._collectors.append(collector)
+
+    # 🔹 Hooks
+
+    def _before_request(self):
+        local = self._local
+        local.in_request = True
+        local.sql_count = 0
+        local.sql_seconds = 0.0
+        local.started = time.perf_counter()
+
+    def _after_request(self, response):
+        local = self._local
+        if not getattr(local, "in_request", False):
+            return response
+        local.in_request = False
+        elapsed = time.perf_counter() - local.started
+        labels = (request.url_rule.rule if request.url_rule else "<unmatched>", request.method)
+
+        self.requests.inc(labels + (str(response.status_code),))
+        self.latency.observe(elapsed, labels)
+        self.request_sql_count.observe(local.sql_count, labels)
+        self.request_sql_time.observe(local.sql_seconds, labels)
+        if not response.is_streamed:
+            self.response_size.observe(response.calculate_content_length() or 0, labels)
+        return response
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_started"].pop()
+        local = self._local
+        if getattr(local, "in_request", False):
+            local.sql_count += 1
+            local.sql_seconds += elapsed
+            context_label = ("request",)
+        else:
+            context_label = ("background",)
+        self.sql_statements.inc(context_label)
+        self.sql_time.inc(context_label, elapsed)
+
+    def observe_password_hash(self, operation, seconds):
+        self.password_hash_time.observe(seconds, (operation,))
+
+    def render(self):
+        lines = []
+        for metric in self._all:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+def sample_lines(name, help, kind, values, labelname=None):
+    """Exposition lines for a collector: `values` is a number, or {label value: number} with `labelname`."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    if labelname is None:
+        lines.append(f"{name} {values}")
+    else:
+        for label, value in sorted(values.items()):
+            lines.append(f'{name}{{{labelname}="{_escape(label)}"}} {value}')
+    return lines
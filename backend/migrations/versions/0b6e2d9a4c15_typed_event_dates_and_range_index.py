@@ -0,0 +1,115 @@
+"""Convert event date/time columns to Date/Time and add (user_id, range_start, range_end) index
+
+Revision ID: 0b6e2d9a4c15
+Revises: f19a7c3e5b84
+Create Date: 2025-03-19 11:08:37.552190
+
+"""
+import calendar
+import logging
+import re
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b6e2d9a4c15'
+down_revision = 'f19a7c3e5b84'
+branch_labels = None
+depends_on = None
+
+
+DATE_COLUMNS = ('date', 'range_start', 'range_end')
+TIME_COLUMNS = ('start_time', 'end_time')
+
+
+def _normalize_date(value):
+    """(ISO date or None, note): the note says what was changed beyond reformatting, else None."""
+    raw = (value or '').strip()
+    match = re.fullmatch(r'(\d{4})-(\d{1,2})-(\d{1,2})', raw)
+    if not match:
+        return None, 'unparseable, set to NULL' if raw else None
+    year, month, day = (int(part) for part in match.groups())
+    if not 1 <= month <= 12 or day < 1:
+        return None, 'unparseable, set to NULL'
+    # Old rows could hold impossible days such as 2025-02-29: clamp those to the month's last day
+    last_day = calendar.monthrange(year, month)[1]
+    note = f'day {day} does not exist, clamped to {last_day}' if day > last_day else None
+    return date(year, month, min(day, last_day)).isoformat(), note
+
+
+def _normalize_time(value):
+    """(HH:MM:SS or None, note), like _normalize_date."""
+    # SQLite's Time storage format is HH:MM:SS; the old columns mostly held HH:MM
+    for fmt in ('%H:%M', '%H:%M:%S', '%I:%M %p'):
+        try:
+            return datetime.strptime(value.strip(), fmt).strftime('%H:%M:%S'), None
+        except (AttributeError, ValueError):
+            continue
+    return None, 'unparseable, set to NULL' if (value or '').strip() else None
+
+
+def upgrade():
+    connection = op.get_bind()
+    rows = connection.execute(sa.text(
+        "SELECT id, date, range_start, range_end, start_time, end_time FROM events"
+    )).mappings().all()
+
+    updates, broken, rewritten = [], [], []
+    for row in rows:
+        values = {'id': row['id']}
+        for columns, normalize in ((DATE_COLUMNS, _normalize_date), (TIME_COLUMNS, _normalize_time)):
+            for column in columns:
+                values[column], note = normalize(row[column])
+                if note:
+                    rewritten.append((row['id'], column, row[column], values[column], note))
+        if values['date'] is None and values['range_start'] is not None:
+            values['date'] = values['range_start']
+            rewritten.append((row['id'], 'date', row['date'], values['date'], 'taken from range_start'))
+        if values['date'] is None:
+            broken.append(row['id'])
+        updates.append(values)
+
+    if broken:
+        raise RuntimeError(f"events with unparseable 'date' (fix by hand, then re-run): {broken}")
+    # Leave a trace of every value that changed meaning, not just format
+    log = logging.getLogger('alembic.runtime.migration')
+    for event_id, column, old, new, note in rewritten:
+        log.warning("events.%s of event %s rewritten: %r -> %r (%s)", column, event_id, old, new, note)
+
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.alter_column('date', existing_type=sa.VARCHAR(length=10), type_=sa.Date(), existing_nullable=False,
+                              postgresql_using='date::date')
+        batch_op.alter_column('range_start', existing_type=sa.VARCHAR(length=10), type_=sa.Date(), existing_nullable=True,
+                              postgresql_using='range_start::date')
+        batch_op.alter_column('range_end', existing_type=sa.VARCHAR(length=10), type_=sa.Date(), existing_nullable=True,
+                              postgresql_using='range_end::date')
+        batch_op.alter_column('start_time', existing_type=sa.VARCHAR(length=10), type_=sa.Time(), existing_nullable=True,
+                              postgresql_using='start_time::time')
+        batch_op.alter_column('end_time', existing_type=sa.VARCHAR(length=10), type_=sa.Time(), existing_nullable=True,
+                              postgresql_using='end_time::time')
+        batch_op.create_index('ix_events_user_id_range', ['user_id', 'range_start', 'range_end'], unique=False)
+
+    # Written after the table copy: SQLite's batch copy CASTs to DATE/TIME, which has
+    # numeric affinity and would mangle '2025-02-28' into 2025
+    if updates:
+        connection.execute(sa.text(
+            "UPDATE events SET date = :date, range_start = :range_start, range_end = :range_end, "
+            "start_time = :start_time, end_time = :end_time WHERE id = :id"
+        ), updates)
+
+
+def downgrade():
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.drop_index('ix_events_user_id_range')
+        batch_op.alter_column('end_time', existing_type=sa.Time(), type_=sa.VARCHAR(length=10), existing_nullable=True)
+        batch_op.alter_column('start_time', existing_type=sa.Time(), type_=sa.VARCHAR(length=10), existing_nullable=True)
+        batch_op.alter_column('range_end', existing_type=sa.Date(), type_=sa.VARCHAR(length=10), existing_nullable=True)
+        batch_op.alter_column('range_start', existing_type=sa.Date(), type_=sa.VARCHAR(length=10), existing_nullable=True)
+        batch_op.alter_column('date', existing_type=sa.Date(), type_=sa.VARCHAR(length=10), existing_nullable=False)
+
+    # Back to the HH:MM strings the app used to store
+    op.execute("UPDATE events SET start_time = substr(start_time, 1, 5) WHERE start_time IS NOT NULL")
+    op.execute("UPDATE events SET end_time = substr(end_time, 1, 5) WHERE end_time IS NOT NULL")
@@ -0,0 +1,40 @@
+"""Add maintenance_jobs and index password_reset_tokens.created_at
+
+Revision ID: 7a3f5c1e9b02
+Revises: 1c7e4a9b2d56
+Create Date: 2025-03-23 16:45:09.618420
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3f5c1e9b02'
+down_revision = '1c7e4a9b2d56'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('maintenance_jobs',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('locked_until', sa.DateTime(), nullable=True),
+    sa.Column('locked_by', sa.String(length=64), nullable=True),
+    sa.Column('last_started_at', sa.DateTime(), nullable=True),
+    sa.Column('last_finished_at', sa.DateTime(), nullable=True),
+    sa.Column('last_duration_ms', sa.Integer(), nullable=True),
+    sa.Column('last_status', sa.String(length=10), nullable=True),
+    sa.Column('last_result', sa.Text(), nullable=True),
+    sa.Column('runs', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    with op.batch_alter_table('password_reset_tokens', schema=None) as batch_op:
+        batch_op.create_index('ix_password_reset_tokens_created_at', ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('password_reset_tokens', schema=None) as batch_op:
+        batch_op.drop_index('ix_password_reset_tokens_created_at')
+
+    op.drop_table('maintenance_jobs')
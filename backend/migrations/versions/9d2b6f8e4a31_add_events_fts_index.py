@@ -0,0 +1,55 @@
+"""Add FTS5 full-text index over event title, details and address
+
+Revision ID: 9d2b6f8e4a31
+Revises: 7a3f5c1e9b02
+Create Date: 2025-03-26 13:20:57.481936
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9d2b6f8e4a31'
+down_revision = '7a3f5c1e9b02'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of search.FTS_DDL as of this revision
+FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+        title, details, address, user_id,
+        content='events', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS events_fts_ai AFTER INSERT ON events BEGIN
+        INSERT INTO events_fts(rowid, title, details, address, user_id)
+        VALUES (new.id, new.title, new.details, new.address, new.user_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS events_fts_ad AFTER DELETE ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, title, details, address, user_id)
+        VALUES ('delete', old.id, old.title, old.details, old.address, old.user_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS events_fts_au AFTER UPDATE OF title, details, address, user_id ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, title, details, address, user_id)
+        VALUES ('delete', old.id, old.title, old.details, old.address, old.user_id);
+        INSERT INTO events_fts(rowid, title, details, address, user_id)
+        VALUES (new.id, new.title, new.details, new.address, new.user_id);
+    END""",
+]
+
+
+def upgrade():
+    # FTS5 is SQLite-only; other databases fall back to unindexed ILIKE search
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for statement in FTS_DDL:
+        op.execute(statement)
+    op.execute("INSERT INTO events_fts(events_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute("DROP TRIGGER IF EXISTS events_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS events_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS events_fts_ai")
+    op.execute("DROP TABLE IF EXISTS events_fts")
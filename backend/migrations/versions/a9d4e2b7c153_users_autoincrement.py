@@ -0,0 +1,34 @@
+"""Recreate users with AUTOINCREMENT so ids of deleted accounts are never reused
+
+Revision ID: a9d4e2b7c153
+Revises: f3a1c8d6b209
+Create Date: 2025-04-02 14:26:51.730418
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d4e2b7c153'
+down_revision = 'f3a1c8d6b209'
+branch_labels = None
+depends_on = None
+
+
+def _recreate_users(autoincrement):
+    # Only SQLite reuses rowids; other databases' sequences already never go back
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('users', schema=None, recreate='always',
+                              table_kwargs={'sqlite_autoincrement': autoincrement}) as batch_op:
+        pass
+
+
+def upgrade():
+    # The copy into the new table seeds sqlite_sequence with the highest surviving id
+    _recreate_users(True)
+
+
+def downgrade():
+    _recreate_users(False)
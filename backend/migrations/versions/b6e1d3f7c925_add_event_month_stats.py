@@ -0,0 +1,71 @@
+"""Add event_month_stats rollup table
+
+Revision ID: b6e1d3f7c925
+Revises: 9d2b6f8e4a31
+Create Date: 2025-03-28 09:54:13.207654
+
+"""
+import calendar
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e1d3f7c925'
+down_revision = '9d2b6f8e4a31'
+branch_labels = None
+depends_on = None
+
+
+def _add_event(months, event_date, range_start, range_end):
+    # Frozen copy of stats.StatsDelta.add (366-day span cap) so this revision never changes behaviour
+    first, last = (range_start, range_end) if range_start and range_end else (event_date, event_date)
+    last = min(last, first + timedelta(days=365))
+    months.setdefault(first.replace(day=1), [0, [0] * 31])[0] += 1
+    day = first
+    while day <= last:
+        chunk_end = min(last, day.replace(day=calendar.monthrange(day.year, day.month)[1]))
+        day_counts = months.setdefault(day.replace(day=1), [0, [0] * 31])[1]
+        for index in range(day.day - 1, chunk_end.day):
+            day_counts[index] += 1
+        day = chunk_end + timedelta(days=1)
+
+
+def upgrade():
+    op.create_table('event_month_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('event_count', sa.Integer(), nullable=False),
+    sa.Column('day_counts', sa.JSON(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name=op.f('fk_event_month_stats_user_id_users')),
+    sa.PrimaryKeyConstraint('user_id', 'month')
+    )
+
+    # Backfill from existing events, one user at a time
+    events = sa.table('events', sa.column('user_id', sa.Integer()), sa.column('date', sa.Date()),
+                      sa.column('range_start', sa.Date()), sa.column('range_end', sa.Date()))
+    stats = sa.table('event_month_stats', sa.column('user_id', sa.Integer()), sa.column('month', sa.Date()),
+                     sa.column('event_count', sa.Integer()), sa.column('day_counts', sa.JSON()))
+    connection = op.get_bind()
+
+    def write(user_id, months):
+        if months:
+            connection.execute(sa.insert(stats), [
+                {'user_id': user_id, 'month': month, 'event_count': count, 'day_counts': days}
+                for month, (count, days) in sorted(months.items())
+            ])
+
+    current_user, months = None, {}
+    rows = connection.execute(sa.select(events.c.user_id, events.c.date, events.c.range_start, events.c.range_end).order_by(events.c.user_id))
+    for user_id, event_date, range_start, range_end in rows:
+        if user_id != current_user:
+            write(current_user, months)
+            current_user, months = user_id, {}
+        _add_event(months, event_date, range_start, range_end)
+    write(current_user, months)
+
+
+def downgrade():
+    op.drop_table('event_month_stats')
@@ -0,0 +1,26 @@
+"""Add (user_id, date) index on events
+
+Revision ID: c41d2e8f7a10
+Revises: a7fb19de1e51
+Create Date: 2025-03-10 10:12:41.318604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d2e8f7a10'
+down_revision = 'a7fb19de1e51'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.create_index('ix_events_user_id_date', ['user_id', 'date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.drop_index('ix_events_user_id_date')
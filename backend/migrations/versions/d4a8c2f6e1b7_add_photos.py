@@ -0,0 +1,35 @@
+"""Add photos table for uploaded, content-addressed images
+
+Revision ID: d4a8c2f6e1b7
+Revises: b6e1d3f7c925
+Create Date: 2025-03-29 14:22:41.530218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a8c2f6e1b7'
+down_revision = 'b6e1d3f7c925'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('photos',
+    sa.Column('hash', sa.String(length=64), nullable=False),
+    sa.Column('content_type', sa.String(length=50), nullable=False),
+    sa.Column('byte_size', sa.Integer(), nullable=False),
+    sa.Column('width', sa.Integer(), nullable=False),
+    sa.Column('height', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('variants', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('hash')
+    )
+
+
+def downgrade():
+    op.drop_table('photos')
@@ -0,0 +1,47 @@
+"""Add events.updated_at and event_tombstones for delta sync
+
+Revision ID: d8a5f3b21c67
+Revises: c41d2e8f7a10
+Create Date: 2025-03-12 18:03:22.774019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a5f3b21c67'
+down_revision = 'c41d2e8f7a10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('event_tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name=op.f('fk_event_tombstones_user_id_users')),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('event_tombstones', schema=None) as batch_op:
+        batch_op.create_index('ix_event_tombstones_user_id_deleted_at', ['user_id', 'deleted_at'], unique=False)
+
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_events_user_id_updated_at', ['user_id', 'updated_at'], unique=False)
+
+    # Existing rows count as changed "now" so the first delta sync picks them up
+    op.execute("UPDATE events SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL")
+
+
+def downgrade():
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.drop_index('ix_events_user_id_updated_at')
+        batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('event_tombstones', schema=None) as batch_op:
+        batch_op.drop_index('ix_event_tombstones_user_id_deleted_at')
+
+    op.drop_table('event_tombstones')
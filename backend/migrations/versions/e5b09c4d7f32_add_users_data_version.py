@@ -0,0 +1,26 @@
+"""Add users.data_version for ETag revalidation
+
+Revision ID: e5b09c4d7f32
+Revises: d8a5f3b21c67
+Create Date: 2025-03-14 09:41:05.127733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b09c4d7f32'
+down_revision = 'd8a5f3b21c67'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('data_version')
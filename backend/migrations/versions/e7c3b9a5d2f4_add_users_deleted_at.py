@@ -0,0 +1,28 @@
+"""Add users.deleted_at for background account purges
+
+Revision ID: e7c3b9a5d2f4
+Revises: d4a8c2f6e1b7
+Create Date: 2025-03-30 10:08:56.914372
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7c3b9a5d2f4'
+down_revision = 'd4a8c2f6e1b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('deleted_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_users_deleted_at', ['deleted_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_deleted_at')
+        batch_op.drop_column('deleted_at')
@@ -0,0 +1,67 @@
+"""Add events.geohash with (user_id, geohash) index
+
+Revision ID: f19a7c3e5b84
+Revises: e5b09c4d7f32
+Create Date: 2025-03-16 14:27:50.903112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f19a7c3e5b84'
+down_revision = 'e5b09c4d7f32'
+branch_labels = None
+depends_on = None
+
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def _encode_geohash(latitude, longitude, precision=9):
+    # Frozen copy of geo.encode_geohash so this revision never changes behaviour
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if longitude >= mid:
+                bits, lon_lo = bits * 2 + 1, mid
+            else:
+                bits, lon_hi = bits * 2, mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                bits, lat_lo = bits * 2 + 1, mid
+            else:
+                bits, lat_hi = bits * 2, mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = bit_count = 0
+    return "".join(chars)
+
+
+def upgrade():
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('geohash', sa.String(length=12), nullable=True))
+        batch_op.create_index('ix_events_user_id_geohash', ['user_id', 'geohash'], unique=False)
+
+    # Backfill rows that already have coordinates
+    connection = op.get_bind()
+    rows = connection.execute(sa.text(
+        "SELECT id, latitude, longitude FROM events WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+    )).fetchall()
+    if rows:
+        connection.execute(
+            sa.text("UPDATE events SET geohash = :geohash WHERE id = :id"),
+            [{"id": row.id, "geohash": _encode_geohash(row.latitude, row.longitude)} for row in rows]
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('events', schema=None) as batch_op:
+        batch_op.drop_index('ix_events_user_id_geohash')
+        batch_op.drop_column('geohash')
@@ -0,0 +1,26 @@
+"""Add users.token_version so password changes and deletions end existing sessions
+
+Revision ID: f3a1c8d6b209
+Revises: e7c3b9a5d2f4
+Create Date: 2025-04-02 09:41:17.203851
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a1c8d6b209'
+down_revision = 'e7c3b9a5d2f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('token_version')
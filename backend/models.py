@@ -1,4 +1,8 @@
-from config import db, bcrypt
+from config import db, password_hasher
+from geo import encode_geohash
+from stats import has_range
+from sqlalchemy import and_
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy_serializer import SerializerMixin
 from datetime import datetime, timedelta
 
@@ -9,12 +13,20 @@ class User(db.Model, SerializerMixin):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(256), nullable=False)  # 🔹 Increased hash length
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")  # 🔄 Bumped on every write, backs ETags
+    deleted_at = db.Column(db.DateTime, nullable=True)  # 🗑️ Set while a large deleted account is purged in the background
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")  # 🔑 Stamped into tokens as "ver"; bumping it ends every session
 
     # Relationship to events
     events = db.relationship("Event", back_populates="user")  # Explicitly defined here
 
     # 🔹 Serialization rules to prevent exposing passwords & recursive loops
-    serialize_rules = ("-password_hash", "-events.user")
+    serialize_rules = ("-password_hash", "-data_version", "-deleted_at", "-token_version", "-events.user")
+
+    __table_args__ = (
+        db.Index("ix_users_deleted_at", "deleted_at"),  # The purge job only looks for accounts pending deletion
+        {"sqlite_autoincrement": True},  # 🔑 Never hand a deleted account's id (and so its old tokens) to a new signup
+    )
 
 
     # Property to prevent direct access to password hash
@@ -22,14 +34,23 @@ class User(db.Model, SerializerMixin):
     def password(self):
         raise AttributeError('Password is not readable')
 
-    # Setter to hash the password before storing it in the database
+    # Setter to hash the password before storing it in the database (pass plaintext, it's hashed exactly once here)
     @password.setter
     def password(self, new_password):
-        self.password_hash = bcrypt.generate_password_hash(new_password).decode('utf-8')
+        self.password_hash = password_hasher.hash(new_password)
 
     # Method to authenticate user by checking password hash
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    # True when the stored hash uses an outdated cost factor and should be replaced
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password_hash)
+
+    # Mark everything this user can read as changed; call inside the writing transaction
+    @classmethod
+    def bump_data_version(cls, user_id):
+        cls.query.filter_by(id=user_id).update({cls.data_version: cls.data_version + 1})
 
     def __repr__(self):
         return f'<User {self.email}>'
@@ -44,9 +65,15 @@ class PasswordResetToken(db.Model, SerializerMixin):
     token = db.Column(db.String(128), unique=True, nullable=False)  # 🔹 Increased token length
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index("ix_password_reset_tokens_created_at", "created_at"),  # For the expiry purge
+    )
+
     # Token expires in 15 minutes
+    LIFETIME = timedelta(minutes=15)
+
     def is_expired(self):
-        return datetime.utcnow() > self.created_at + timedelta(minutes=15)
+        return datetime.utcnow() > self.created_at + self.LIFETIME
 
 class Event(db.Model, SerializerMixin):
     __tablename__ = 'events'
@@ -58,24 +85,140 @@ class Event(db.Model, SerializerMixin):
     address = db.Column(db.String(255), nullable=True)  # 🏠 Still keep address for user readability
     latitude = db.Column(db.Float, nullable=True)  # 🌍 Add latitude
     longitude = db.Column(db.Float, nullable=True)  # 📍 Add longitude
-    start_time = db.Column(db.String(10), nullable=True)
-    end_time = db.Column(db.String(10), nullable=True)
-    date = db.Column(db.String(10), nullable=False)  # YYYY-MM-DD format
-    range_start = db.Column(db.String(10), nullable=True)
-    range_end = db.Column(db.String(10), nullable=True)
+    geohash = db.Column(db.String(12), nullable=True)  # 🗺️ Derived from lat/lon, kept in sync by the listener below
+    start_time = db.Column(db.Time, nullable=True)
+    end_time = db.Column(db.Time, nullable=True)
+    date = db.Column(db.Date, nullable=False)  # Serialized as YYYY-MM-DD
+    range_start = db.Column(db.Date, nullable=True)  # 🔹 Only set for multi-day events
+    range_end = db.Column(db.Date, nullable=True)
     photo = db.Column(db.String(500), nullable=True)  # ✅ Add this if needed
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # 🔄 Drives delta sync
 
     user = db.relationship("User", back_populates="events")  # Explicitly defined here
 
     # 🔹 Serialization rules to prevent recursive loops
-    serialize_rules = ("-user.events", "-user.password_hash")
+    serialize_rules = ("-user.events", "-user.password_hash", "-user.data_version", "-user_id", "-geohash")
+
+    # 🔹 Calendar reads are always "this user's events in a date window", so index exactly that
+    __table_args__ = (
+        db.Index("ix_events_user_id_date", "user_id", "date"),
+        db.Index("ix_events_user_id_updated_at", "user_id", "updated_at"),
+        db.Index("ix_events_user_id_geohash", "user_id", "geohash"),
+        db.Index("ix_events_user_id_range", "user_id", "range_start", "range_end"),  # Interval lookups for multi-day events
+    )
+
+    # 📅 Multi-day means both range ends are set (stats.has_range); otherwise the event covers just `date`
+    @hybrid_property
+    def is_multi_day(self):
+        return has_range(self.range_start, self.range_end)
+
+    @is_multi_day.expression
+    def is_multi_day(cls):
+        return and_(cls.range_start.is_not(None), cls.range_end.is_not(None))
 
     def __repr__(self):
         return f"<Event {self.title} @ {self.address} ({self.latitude}, {self.longitude})>"
 
-    
+
+
+# 🗺️ Keep the geohash index column in step with latitude/longitude on every ORM insert/update
+@db.event.listens_for(Event, "before_insert")
+@db.event.listens_for(Event, "before_update")
+def sync_event_geohash(mapper, connection, target):
+    target.geohash = encode_geohash(target.latitude, target.longitude)
+
+
+# Tombstone left behind by a deleted event so syncing clients can drop it too
+class EventTombstone(db.Model, SerializerMixin):
+    __tablename__ = 'event_tombstones'
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, nullable=False)  # No FK: the event row is gone
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_event_tombstones_user_id_deleted_at", "user_id", "deleted_at"),
+    )
+
+    def __repr__(self):
+        return f"<EventTombstone {self.event_id} @ {self.deleted_at}>"
+
+
 # class Favorite(db.Model, SerializerMixin):
 #     __tablename__ = 'favorites'
 
 
 
+
+# 📬 Outgoing email, written in the same transaction as whatever triggered it and sent by outbox.py's worker
+class OutboxMessage(db.Model, SerializerMixin):
+    __tablename__ = 'email_outbox'
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default="pending")  # pending / sent / failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Also the claim lease
+    claim_token = db.Column(db.String(32))
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    def __repr__(self):
+        return f"<OutboxMessage {self.id} to {self.recipient} ({self.status})>"
+
+
+# 🧹 One row per maintenance.py job: doubles as the cross-worker lock and the last-run record
+class MaintenanceJob(db.Model, SerializerMixin):
+    __tablename__ = 'maintenance_jobs'
+
+    name = db.Column(db.String(50), primary_key=True)
+    locked_until = db.Column(db.DateTime)
+    locked_by = db.Column(db.String(64))
+    last_started_at = db.Column(db.DateTime)
+    last_finished_at = db.Column(db.DateTime)
+    last_duration_ms = db.Column(db.Integer)
+    last_status = db.Column(db.String(10))  # ok / error
+    last_result = db.Column(db.Text)
+    runs = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<MaintenanceJob {self.name} ({self.last_status})>"
+
+
+# 📅 Per-user, per-month rollup of events, maintained by stats.py alongside every event write
+class EventMonthStat(db.Model, SerializerMixin):
+    __tablename__ = 'event_month_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)  # First day of the month
+    event_count = db.Column(db.Integer, nullable=False, default=0)  # Events whose span starts this month
+    day_counts = db.Column(db.JSON, nullable=False)  # 31 ints: events covering each day (multi-day spans expanded)
+
+    def __repr__(self):
+        return f"<EventMonthStat {self.user_id} {self.month:%Y-%m}: {self.event_count}>"
+
+
+# 🖼️ Uploaded photo, keyed by the SHA-256 of its bytes (blobs live in photo storage, see photos.py)
+class Photo(db.Model, SerializerMixin):
+    __tablename__ = 'photos'
+
+    hash = db.Column(db.String(64), primary_key=True)
+    content_type = db.Column(db.String(50), nullable=False)  # Of the original upload
+    byte_size = db.Column(db.Integer, nullable=False)
+    width = db.Column(db.Integer, nullable=False)
+    height = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(16), nullable=False, default="pending")  # pending -> ready | failed
+    variants = db.Column(db.JSON, nullable=True)  # {size: {"width", "height", "bytes"}} once thumbnails exist
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<Photo {self.hash[:12]} {self.width}x{self.height} {self.status}>"
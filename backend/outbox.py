@@ -0,0 +1,216 @@
+import os
+import random
+import smtplib
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from sqlalchemy import select, update
+from werkzeug.utils import import_string
+
+
+class Mailer:
+    """Delivery backend for EmailOutbox. `connect()` yields a function sending one message."""
+
+    def __init__(self, app):
+        self.sender = app.config.get("MAIL_FROM", "LoveLog <no-reply@lovelog.app>")
+
+    def build(self, recipient, subject, body):
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = recipient
+        message["Subject"] = subject
+        message.set_content(body)
+        return message
+
+    def connect(self):
+        raise NotImplementedError
+
+
+class SMTPMailer(Mailer):
+    """Real SMTP: one connection (and login) per batch, not per message."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.host = app.config.get("MAIL_SERVER", "localhost")
+        self.port = app.config.get("MAIL_PORT", 587)
+        self.username = app.config.get("MAIL_USERNAME")
+        self.password = app.config.get("MAIL_PASSWORD")
+        self.use_tls = app.config.get("MAIL_USE_TLS", True)
+        self.timeout = app.config.get("MAIL_TIMEOUT", 10)
+
+    @contextmanager
+    def connect(self):
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            yield lambda recipient, subject, body: smtp.send_message(self.build(recipient, subject, body))
+
+
+class ConsoleMailer(Mailer):
+    """Development default: prints the email instead of sending it."""
+
+    @contextmanager
+    def connect(self):
+        def send(recipient, subject, body):
+            print(f"📧 Sending email to {recipient}: {subject}\n{body}")
+        yield send
+
+
+class MemoryMailer(Mailer):
+    """Fake SMTP sink for tests: keeps every built message in MemoryMailer.outbox.
+
+    Set MemoryMailer.fail_next to a number of upcoming sends that should raise.
+    """
+
+    outbox = []
+    fail_next = 0
+
+    @contextmanager
+    def connect(self):
+        def send(recipient, subject, body):
+            if MemoryMailer.fail_next > 0:
+                MemoryMailer.fail_next -= 1
+                raise smtplib.SMTPServerDisconnected("simulated failure")
+            MemoryMailer.outbox.append(self.build(recipient, subject, body))
+        yield send
+
+
+class EmailOutbox:
+    """Transactional outbox for email: enqueue inside the request's transaction, deliver later.
+
+    A daemon thread per process claims due rows in batches (UPDATE ... claim_token, with
+    next_attempt_at pushed out as a lease so a crashed worker's claim expires), sends them
+    over one mailer connection and records the outcome. Failures back off exponentially
+    with jitter until OUTBOX_MAX_ATTEMPTS, then the row is marked failed.
+
+    Config keys:
+      - MAIL_BACKEND: import path of a Mailer class (default outbox.ConsoleMailer)
+      - OUTBOX_WORKER_ENABLED: run the in-process worker (default True)
+      - OUTBOX_BATCH_SIZE / OUTBOX_POLL_INTERVAL / OUTBOX_LEASE (seconds)
+      - OUTBOX_MAX_ATTEMPTS / OUTBOX_BACKOFF_BASE / OUTBOX_BACKOFF_MAX (seconds)
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.mailer = None
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._thread_pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        mailer_class = app.config.get("MAIL_BACKEND", ConsoleMailer)
+        if isinstance(mailer_class, str):
+            mailer_class = import_string(mailer_class)
+        self.mailer = mailer_class(app)
+        self.worker_enabled = app.config.get("OUTBOX_WORKER_ENABLED", True)
+        self.batch_size = app.config.get("OUTBOX_BATCH_SIZE", 50)
+        self.poll_interval = app.config.get("OUTBOX_POLL_INTERVAL", 5)
+        self.lease = timedelta(seconds=app.config.get("OUTBOX_LEASE", 120))
+        self.max_attempts = app.config.get("OUTBOX_MAX_ATTEMPTS", 8)
+        self.backoff_base = app.config.get("OUTBOX_BACKOFF_BASE", 30)
+        self.backoff_max = app.config.get("OUTBOX_BACKOFF_MAX", 3600)
+
+        @app.before_request
+        def start_outbox_worker():
+            self.start()
+
+    def enqueue(self, recipient, subject, body):
+        """Add an email to the current session; it is only sent if the transaction commits."""
+        from config import db
+        from models import OutboxMessage
+
+        message = OutboxMessage(recipient=recipient, subject=subject, body=body)
+        db.session.add(message)
+        return message
+
+    def notify(self):
+        """Wake the worker after committing new messages instead of waiting for the next poll."""
+        self.start()
+        self._wakeup.set()
+
+    def start(self):
+        # One thread per process, started lazily so forking servers and CLI commands don't inherit one
+        if not self.worker_enabled or (self._thread_pid == os.getpid() and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread_pid == os.getpid() and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            try:
+                while self.drain() == self.batch_size:
+                    pass  # Full batch: there may be more waiting
+            except Exception as e:  # Keep the worker alive through DB hiccups
+                self.app.logger.exception("Email outbox worker error: %s", e)
+
+    def drain(self):
+        """Claim and deliver one batch of due messages; returns how many were claimed."""
+        from config import db
+        from models import OutboxMessage
+
+        with self.app.app_context():
+            now = datetime.utcnow()
+            claim = uuid.uuid4().hex
+            due = (
+                select(OutboxMessage.id)
+                .where(OutboxMessage.status == "pending", OutboxMessage.next_attempt_at <= now)
+                .order_by(OutboxMessage.next_attempt_at)
+                .limit(self.batch_size)
+            )
+            db.session.execute(
+                update(OutboxMessage)
+                .where(OutboxMessage.id.in_(due), OutboxMessage.next_attempt_at <= now)
+                .values(claim_token=claim, next_attempt_at=now + self.lease)
+            )
+            db.session.commit()
+            messages = db.session.scalars(select(OutboxMessage).where(OutboxMessage.claim_token == claim)).all()
+            if not messages:
+                return 0
+
+            handled = set()
+            try:
+                with self.mailer.connect() as send:
+                    for message in messages:
+                        try:
+                            send(message.recipient, message.subject, message.body)
+                        except Exception as e:
+                            self._record_failure(message, e)
+                        else:
+                            message.status = "sent"
+                            message.sent_at = datetime.utcnow()
+                            message.last_error = None
+                        handled.add(message.id)
+            except Exception as e:
+                # Couldn't connect (or the connection dropped): everything not attempted is retried
+                for message in messages:
+                    if message.id not in handled:
+                        self._record_failure(message, e)
+
+            for message in messages:
+                message.claim_token = None
+            db.session.commit()
+            return len(messages)
+
+    def _record_failure(self, message, error):
+        message.attempts += 1
+        message.last_error = f"{type(error).__name__}: {error}"
+        if message.attempts >= self.max_attempts:
+            message.status = "failed"
+            return
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (message.attempts - 1))
+        message.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay * random.uniform(0.5, 1.0))
@@ -0,0 +1,267 @@
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import click
+from PIL import Image, ImageOps, UnidentifiedImageError
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import import_string
+
+# 🖼️ Variants every photo gets: name -> longest edge in pixels ("original" is always served as uploaded)
+PHOTO_SIZES = {"thumb": 200, "small": 640, "medium": 1280}
+PHOTO_URL_PREFIX = "/api/photos/"
+PHOTO_HASH = re.compile(r"^[0-9a-f]{64}$")
+ACCEPTED_FORMATS = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp", "GIF": "image/gif"}
+
+
+def photo_urls(photo):
+    """{size: url} for an Event.photo pointing at an uploaded photo, else None (external URL or no photo).
+
+    Pure string work, so serializers can call it for every event without touching the database.
+    """
+    if not photo or not photo.startswith(PHOTO_URL_PREFIX):
+        return None
+    digest = photo[len(PHOTO_URL_PREFIX):].split("/", 1)[0]
+    if not PHOTO_HASH.match(digest):
+        return None
+    base = PHOTO_URL_PREFIX + digest
+    return {**{size: f"{base}/{size}" for size in PHOTO_SIZES}, "original": base}
+
+
+class PhotoStorage:
+    """Blob store for photos, addressed by key ("<sha256>/<size>"). Keys are written once, never changed.
+
+    An object store (S3, GCS...) fits behind the same three methods.
+    """
+
+    def save(self, key, data):
+        raise NotImplementedError
+
+    def open(self, key):
+        """(binary file object, size in bytes), or (None, None) if the key doesn't exist."""
+        raise NotImplementedError
+
+    def exists(self, key):
+        raise NotImplementedError
+
+
+class LocalPhotoStorage(PhotoStorage):
+    """Files under a directory, fanned out by hash prefix: <root>/ab/abcdef.../<size>."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], *key.split("/"))
+
+    def save(self, key, data):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename, so readers never see a half-written blob
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def open(self, key):
+        try:
+            file = open(self.path(key), "rb")
+        except FileNotFoundError:
+            return None, None
+        return file, os.fstat(file.fileno()).st_size
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+
+def make_thumbnails(data, sizes, quality, max_pixels):
+    """Runs in a pool worker: decode once, return {size: (jpeg bytes, width, height)}."""
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)  # Phone photos are often stored sideways plus an EXIF rotation
+        if image.mode != "RGB":
+            # JPEG has no alpha: flatten transparent PNG/WebP/GIF onto white
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        variants = {}
+        for name, edge in sorted(sizes.items(), key=lambda item: -item[1]):
+            # Shrink from the previous (larger) variant instead of the full original each time
+            image.thumbnail((edge, edge), Image.LANCZOS)
+            output = io.BytesIO()
+            image.save(output, "JPEG", quality=quality, optimize=True, progressive=True)
+            variants[name] = (output.getvalue(), image.width, image.height)
+        return variants
+
+
+class PhotoError(Exception):
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+class PhotoService:
+    """Photo ingestion: content-addressed originals plus thumbnails rendered in a process pool.
+
+    An upload is hashed (SHA-256) and stored once under that hash, so the same picture
+    uploaded twice costs nothing. Decoding and resizing run in a ProcessPoolExecutor (one per
+    process, started lazily like the outbox worker), so the request returns as soon as the
+    original is safely stored and image decoding never ties up a request thread. Until a
+    size is ready its URL serves the original, marked no-cache. `flask photos reprocess`
+    retries photos left pending by a restart or failed earlier.
+
+    Config keys:
+      - PHOTO_STORAGE: import path of a PhotoStorage class (default local disk)
+      - PHOTO_STORAGE_DIR: root for LocalPhotoStorage (default instance/photos)
+      - PHOTO_MAX_BYTES / PHOTO_MAX_PIXELS: upload limits
+      - PHOTO_WORKERS / PHOTO_JPEG_QUALITY / PHOTO_CACHE_MAX_AGE (seconds)
+    """
+
+    def __init__(self, app=None, db=None):
+        self.app = None
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.app = app
+        self.db = db
+        self.max_bytes = app.config.get("PHOTO_MAX_BYTES", 15 * 1024 * 1024)
+        self.max_pixels = app.config.get("PHOTO_MAX_PIXELS", 50_000_000)
+        self.workers = app.config.get("PHOTO_WORKERS", 2)
+        self.quality = app.config.get("PHOTO_JPEG_QUALITY", 82)
+        self.cache_max_age = app.config.get("PHOTO_CACHE_MAX_AGE", 365 * 24 * 3600)
+        storage_class = app.config.get("PHOTO_STORAGE", LocalPhotoStorage)
+        if isinstance(storage_class, str):
+            storage_class = import_string(storage_class)
+        self.storage = storage_class(app.config.get("PHOTO_STORAGE_DIR") or os.path.join(app.instance_path, "photos"))
+        app.cli.add_command(self._cli())
+
+    def executor(self):
+        # A fresh pool per process: forked workers must not share the parent's pool
+        if self._executor_pid != os.getpid():
+            with self._lock:
+                if self._executor_pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    self._executor_pid = os.getpid()
+        return self._executor
+
+    # 🔹 Ingestion
+
+    def ingest(self, data):
+        """Store an uploaded image and queue its thumbnails; returns (Photo, created).
+
+        Only reads the image header here (format and dimensions); raises PhotoError with an
+        HTTP status for anything that isn't an acceptable image.
+        """
+        from models import Photo
+
+        if not data:
+            raise PhotoError("No image data", 400)
+        if len(data) > self.max_bytes:
+            raise PhotoError(f"Photos are limited to {self.max_bytes // (1024 * 1024)} MB", 413)
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image_format, (width, height) = image.format, image.size
+        except Image.DecompressionBombError:
+            raise PhotoError("Image dimensions are too large", 413) from None
+        except (UnidentifiedImageError, OSError):
+            raise PhotoError("Unsupported image; upload JPEG, PNG, WebP or GIF", 415) from None
+        if image_format not in ACCEPTED_FORMATS:
+            raise PhotoError("Unsupported image; upload JPEG, PNG, WebP or GIF", 415)
+        if width * height > self.max_pixels:
+            raise PhotoError("Image dimensions are too large", 413)
+
+        digest = hashlib.sha256(data).hexdigest()
+        photo = self.db.session.get(Photo, digest)
+        if photo is not None and self.storage.exists(f"{digest}/original"):
+            return photo, False
+
+        self.storage.save(f"{digest}/original", data)
+        if photo is None:
+            photo = Photo(
+                hash=digest, content_type=ACCEPTED_FORMATS[image_format], byte_size=len(data),
+                width=width, height=height, status="pending",
+            )
+            self.db.session.add(photo)
+            try:
+                self.db.session.commit()
+            except IntegrityError:  # The same picture is being uploaded concurrently
+                self.db.session.rollback()
+                return self.db.session.get(Photo, digest), False
+        self.process(digest, data)
+        return photo, True
+
+    def process(self, digest, data):
+        """Render thumbnails for a stored original in the pool; the result is saved from the pool's callback thread."""
+        future = self.executor().submit(make_thumbnails, data, PHOTO_SIZES, self.quality, self.max_pixels)
+        future.add_done_callback(lambda done: self._finish(digest, done))
+        return future
+
+    def _finish(self, digest, future):
+        from models import Photo
+
+        with self.app.app_context():
+            try:
+                variants = future.result()
+                for name, (blob, _, _) in variants.items():
+                    self.storage.save(f"{digest}/{name}", blob)
+                values = {
+                    "status": "ready",
+                    "variants": {name: {"width": w, "height": h, "bytes": len(blob)} for name, (blob, w, h) in variants.items()},
+                }
+            except Exception as e:
+                self.app.logger.exception("Thumbnailing photo %s failed", digest)
+                values = {"status": "failed", "variants": {"error": f"{type(e).__name__}: {e}"}}
+            self.db.session.execute(
+                update(Photo).where(Photo.hash == digest).values(processed_at=datetime.utcnow(), **values)
+            )
+            self.db.session.commit()
+
+    # 🔹 Serving
+
+    def variant(self, photo, size):
+        """(storage key, cacheable) for a size: the original stands in until the thumbnail is ready."""
+        if size != "original" and photo.status == "ready" and size in (photo.variants or {}):
+            return f"{photo.hash}/{size}", True
+        return f"{photo.hash}/original", size == "original"
+
+    def _cli(self):
+        group = click.Group("photos", help="Uploaded photos and their thumbnails.")
+
+        @group.command("reprocess")
+        @click.option("--all", "everything", is_flag=True, help="Also redo photos that are already ready.")
+        def reprocess_command(everything):
+            """Regenerate thumbnails for pending/failed photos (or all) and wait for them."""
+            from models import Photo
+
+            query = select(Photo.hash)
+            if not everything:
+                query = query.where(Photo.status != "ready")
+            futures = []
+            for digest in self.db.session.scalars(query).all():
+                file, _ = self.storage.open(f"{digest}/original")
+                if file is None:
+                    click.echo(f"{digest}: original missing, skipped")
+                    continue
+                with file:
+                    futures.append(self.process(digest, file.read()))
+            for future in futures:
+                future.exception()
+            self.executor().shutdown(wait=True)  # Also waits for the callbacks that save the results
+            click.echo(f"🖼️ Reprocessed {len(futures):,} photos.")
+
+        return group
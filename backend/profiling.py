@@ -0,0 +1,160 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import g, request
+from sqlalchemy import event
+
+
+class QueryProfiler:
+    """Development/staging SQL profiler: slow queries, N+1 patterns and on-demand cProfile.
+
+    Hooks SQLAlchemy cursor events and, per request, tallies each statement's text (bound
+    parameters keep it identical across calls, so a lazy-loaded relationship walked in a
+    loop shows up as one statement run N times). Statements slower than SLOW_QUERY_MS, and
+    those repeated N_PLUS_ONE_THRESHOLD+ times in one request, are logged with their
+    EXPLAIN (QUERY PLAN on SQLite). Responses get X-Query-Count / X-Query-Time-Ms headers.
+
+    A request carrying the REQUEST_PROFILE_HEADER header runs under cProfile; the stats are
+    written to REQUEST_PROFILE_DIR and the file name returned in X-Profile-File.
+
+    Config keys:
+      - QUERY_PROFILER_ENABLED (default False; keep it off in production)
+      - SLOW_QUERY_MS / N_PLUS_ONE_THRESHOLD / QUERY_PROFILER_EXPLAIN
+      - REQUEST_PROFILE_HEADER / REQUEST_PROFILE_DIR
+    """
+
+    def __init__(self, app=None, db=None):
+        self.enabled = False
+        self._local = threading.local()
+        self._plans = OrderedDict()  # statement -> plan text, LRU
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.enabled = app.config.get("QUERY_PROFILER_ENABLED", False)
+        if not self.enabled:
+            return
+        self.app = app
+        self.slow_seconds = app.config.get("SLOW_QUERY_MS", 100) / 1000
+        self.repeat_threshold = app.config.get("N_PLUS_ONE_THRESHOLD", 5)
+        self.explain = app.config.get("QUERY_PROFILER_EXPLAIN", True)
+        self.profile_header = app.config.get("REQUEST_PROFILE_HEADER", "X-Profile")
+        self.profile_dir = app.config.get("REQUEST_PROFILE_DIR") or os.path.join(app.instance_path, "profiles")
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        with app.app_context():
+            event.listen(db.engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(db.engine, "after_cursor_execute", self._after_cursor_execute)
+
+    # 🔹 Request hooks
+
+    def _before_request(self):
+        self._local.statements = {}  # statement -> [count, total seconds, first parameters]
+        if request.headers.get(self.profile_header):
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    def _after_request(self, response):
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            response.headers["X-Profile-File"] = self._dump_profile(profiler)
+
+        statements = getattr(self._local, "statements", None)
+        self._local.statements = None
+        if statements is None:
+            return response
+
+        route = f"{request.method} {request.url_rule.rule if request.url_rule else request.path}"
+        response.headers["X-Query-Count"] = str(sum(count for count, _, _ in statements.values()))
+        response.headers["X-Query-Time-Ms"] = f"{sum(total for _, total, _ in statements.values()) * 1000:.2f}"
+        for statement, (count, total, parameters) in statements.items():
+            if count >= self.repeat_threshold:
+                self.app.logger.warning(
+                    "🔁 Possible N+1 in %s: statement ran %d times (%.1f ms total)\n%s%s",
+                    route, count, total * 1000, statement, self._plan_suffix(statement, parameters),
+                )
+        return response
+
+    def _dump_profile(self, profiler):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        rule = request.url_rule.rule if request.url_rule else request.path
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", rule).strip("_") or "root"
+        filename = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{request.method}-{slug}.prof"
+        profiler.dump_stats(os.path.join(self.profile_dir, filename))
+
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(15)
+        self.app.logger.info("🧪 Profile of %s %s saved to %s\n%s", request.method, request.path, filename, summary.getvalue())
+        return filename
+
+    # 🔹 SQLAlchemy hooks
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("profiler_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["profiler_started"].pop()
+        if getattr(self._local, "explaining", False):
+            return
+
+        statements = getattr(self._local, "statements", None)
+        if statements is not None:
+            entry = statements.get(statement)
+            if entry is None:
+                statements[statement] = [1, elapsed, parameters]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+
+        if elapsed >= self.slow_seconds:
+            plan = "" if executemany else self._plan_suffix(statement, parameters, conn)
+            where = f" in {request.method} {request.path}" if statements is not None else ""
+            self.app.logger.warning("🐢 Slow query%s: %.1f ms\n%s%s", where, elapsed * 1000, statement, plan)
+
+    def _plan_suffix(self, statement, parameters, conn=None):
+        """"\\nplan..." for logging, cached per statement; empty if EXPLAIN is off or fails."""
+        if not self.explain or not statement.lstrip().upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE")):
+            return ""
+        with self._lock:
+            plan = self._plans.get(statement)
+            if plan is not None:
+                self._plans.move_to_end(statement)
+                return plan
+        if conn is None:
+            from config import db
+            with db.engine.connect() as explain_conn:
+                plan = self._explain(explain_conn, statement, parameters)
+        else:
+            plan = self._explain(conn, statement, parameters)
+        with self._lock:
+            self._plans[statement] = plan
+            while len(self._plans) > 256:
+                self._plans.popitem(last=False)
+        return plan
+
+    def _explain(self, conn, statement, parameters):
+        prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+        # Straight through the DBAPI so this doesn't re-enter the cursor events
+        cursor = conn.connection.dbapi_connection.cursor()
+        self._local.explaining = True
+        try:
+            cursor.execute(prefix + statement, parameters or ())
+            rows = cursor.fetchall()
+        except Exception as e:
+            return f"\n  (EXPLAIN failed: {e})"
+        finally:
+            self._local.explaining = False
+            cursor.close()
+        if conn.dialect.name == "sqlite":
+            return "".join(f"\n  {row[-1]}" for row in rows)
+        return "".join(f"\n  {row[0]}" for row in rows)
@@ -0,0 +1,139 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import jsonify, request
+from werkzeug.utils import import_string
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_limit(limit):
+    """"10/minute" -> (capacity 10, refill 10/60 tokens per second)."""
+    count, _, period = limit.partition("/")
+    if period not in PERIODS or not count.strip().isdigit():
+        raise ValueError(f"Bad rate limit {limit!r}; expected '<count>/<second|minute|hour|day>'")
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period]
+
+
+class RateLimitBackend:
+    """Token-bucket storage for RateLimiter.
+
+    A shared implementation (e.g. Redis running the refill-and-take as one Lua script) is
+    what makes limits hold across workers; `take` must be atomic per key.
+    """
+
+    def take(self, key, capacity, rate):
+        """Spend one token from `key`'s bucket; returns 0 if allowed, else seconds until one is available."""
+        raise NotImplementedError
+
+
+class LocalRateLimitBackend(RateLimitBackend):
+    """In-process buckets, LRU-bounded: the keys dropped first are the longest idle (i.e. refilled) ones."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class RateLimiter:
+    """Per-route token buckets (per client IP and per submitted email) plus admission control.
+
+    `@rate_limiter.limit("login")` looks up RATE_LIMITS["login"], e.g.
+    {"ip": "20/minute", "email": "5/minute"}, and answers 429 with Retry-After once a bucket
+    is empty. Routes marked `heavy` also need one of RATELIMIT_MAX_CONCURRENT slots per
+    process; when none frees up within RATELIMIT_ADMISSION_TIMEOUT the request is shed
+    before it reaches bcrypt. Client IPs come from request.remote_addr, so run behind
+    werkzeug's ProxyFix when there is a reverse proxy.
+
+    Config keys:
+      - RATELIMIT_ENABLED / RATE_LIMITS
+      - RATELIMIT_BACKEND: import path of a RateLimitBackend class (default local LRU)
+      - RATELIMIT_MAX_KEYS / RATELIMIT_MAX_CONCURRENT / RATELIMIT_ADMISSION_TIMEOUT (seconds)
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.backend = None
+        self.limits = {}
+        self._slots = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get("RATELIMIT_ENABLED", True)
+        backend_class = app.config.get("RATELIMIT_BACKEND", LocalRateLimitBackend)
+        if isinstance(backend_class, str):
+            backend_class = import_string(backend_class)
+        self.backend = backend_class(max_keys=app.config.get("RATELIMIT_MAX_KEYS", 100000))
+        self.limits = {
+            route: {scope: parse_limit(limit) for scope, limit in scopes.items()}
+            for route, scopes in app.config.get("RATE_LIMITS", {}).items()
+        }
+        self.admission_timeout = app.config.get("RATELIMIT_ADMISSION_TIMEOUT", 0.5)
+        self._slots = threading.BoundedSemaphore(app.config.get("RATELIMIT_MAX_CONCURRENT", 8))
+
+    def _too_many(self, retry_after, message):
+        response = jsonify({"error": message})
+        response.status_code = 429
+        response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+        return response
+
+    def check(self, route):
+        """Spend a token from each of the route's buckets; a 429 response if any is empty, else None."""
+        scopes = self.limits.get(route, {})
+        identities = {"ip": request.remote_addr or "unknown"}
+        if "email" in scopes:
+            body = request.get_json(silent=True)
+            email = body.get("email") if isinstance(body, dict) else None  # A list / scalar body is the view's 400 to give
+            if isinstance(email, str) and email.strip():
+                identities["email"] = email.strip().lower()
+
+        retry_after = 0
+        for scope, (capacity, rate) in scopes.items():
+            if scope in identities:
+                retry_after = max(retry_after, self.backend.take(f"{route}:{scope}:{identities[scope]}", capacity, rate))
+        if retry_after:
+            return self._too_many(retry_after, "Too many attempts, please try again later")
+        return None
+
+    def limit(self, route, heavy=False):
+        """Decorate a view with RATE_LIMITS[route]; `heavy` views also go through admission control."""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return view(*args, **kwargs)
+                rejected = self.check(route)
+                if rejected is not None:
+                    return rejected
+                if not heavy:
+                    return view(*args, **kwargs)
+                # 🔥 Shed load while every slot is busy hashing, instead of queueing behind bcrypt
+                if not self._slots.acquire(timeout=self.admission_timeout):
+                    return self._too_many(1, "Server is busy, please try again shortly")
+                try:
+                    return view(*args, **kwargs)
+                finally:
+                    self._slots.release()
+            return wrapper
+        return decorator
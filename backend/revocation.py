@@ -0,0 +1,131 @@
+import os
+import time
+from threading import Lock
+
+from flask import jsonify
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev server, no cross-worker locking needed
+    fcntl = None
+
+
+class RevocationStore:
+    """Revoked refresh tokens, kept in memory and persisted to an append-only file.
+
+    Entries are keyed by token id (`jti`) or by token family (`fam:<id>`) and remember
+    when the token expires, so compaction can drop entries the JWT layer already rejects.
+    Each line is "<exp> <key>". Other workers' appends are picked up when the file grows,
+    and the file is rewritten without dead entries once it is mostly expired lines.
+    Only refresh tokens are checked, and only their family here; access tokens are
+    short-lived and stay HMAC-only.
+
+    Config keys:
+      - TOKEN_REVOCATION_FILE: path of the log (default instance/revoked_tokens.log)
+    """
+
+    def __init__(self, app=None, jwt=None):
+        self.path = None
+        self._revoked = {}  # key -> expires_at (unix seconds)
+        self._inode = None
+        self._offset = 0
+        self._lines = 0
+        self._lock = Lock()
+        if app is not None:
+            self.init_app(app, jwt)
+
+    def init_app(self, app, jwt):
+        self.path = app.config.get("TOKEN_REVOCATION_FILE") or os.path.join(app.instance_path, "revoked_tokens.log")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._lock:
+            self._sync()
+
+        @jwt.token_in_blocklist_loader
+        def is_token_revoked(jwt_header, jwt_payload):
+            # A rotated jti still gets through to the refresh view, which treats it as reuse
+            if jwt_payload.get("type") != "refresh":
+                return False
+            return self.is_revoked(family_key(jwt_payload))
+
+        @jwt.revoked_token_loader
+        def revoked_token(jwt_header, jwt_payload):
+            return jsonify({"error": "Token has been revoked"}), 401
+
+    def _sync(self):
+        """Load lines appended since the last read (by this or another worker)."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if stat.st_ino != self._inode:  # First read, or compacted by another worker: start over
+            self._revoked, self._offset, self._lines = {}, 0, 0
+            self._inode = stat.st_ino
+        if stat.st_size == self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read()
+        complete = chunk[:chunk.rfind(b"\n") + 1]  # Leave a half-written last line for next time
+        for line in complete.decode().splitlines():
+            expires_at, _, key = line.partition(" ")
+            if key:
+                self._revoked[key] = int(expires_at)
+                self._lines += 1
+        self._offset += len(complete)
+
+    def is_revoked(self, key):
+        with self._lock:
+            self._sync()
+            return key in self._revoked
+
+    def revoke(self, key, expires_at):
+        """Record `key` as revoked; False if it already was (i.e. the token was reused)."""
+        line = f"{int(expires_at)} {key}\n".encode()
+        with self._lock:
+            f = self._open_locked()
+            try:
+                self._sync()
+                if key in self._revoked:
+                    return False
+                f.write(line)
+                f.flush()
+                self._revoked[key] = int(expires_at)
+                self._offset += len(line)
+                self._lines += 1
+                if self._lines > 1000 and self._lines > 2 * self._live_count():
+                    self._compact()
+                return True
+            finally:
+                f.close()  # Releases the flock
+
+    def _open_locked(self):
+        """Open the log for appending under an exclusive lock, retrying if it was swapped by a compaction."""
+        while True:
+            f = open(self.path, "ab")
+            if not fcntl:
+                return f
+            fcntl.flock(f, fcntl.LOCK_EX)
+            if os.fstat(f.fileno()).st_ino == os.stat(self.path).st_ino:
+                return f
+            f.close()
+
+    def _live_count(self):
+        now = time.time()
+        return sum(1 for expires_at in self._revoked.values() if expires_at > now)
+
+    def _compact(self):
+        """Rewrite the log with unexpired entries only; caller holds the file lock."""
+        now = time.time()
+        self._revoked = {key: expires_at for key, expires_at in self._revoked.items() if expires_at > now}
+        data = "".join(f"{expires_at} {key}\n" for key, expires_at in self._revoked.items()).encode()
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as tmp:
+            tmp.write(data)
+        os.replace(tmp_path, self.path)
+        self._inode = os.stat(self.path).st_ino
+        self._offset, self._lines = len(data), len(self._revoked)
+
+
+def family_key(jwt_payload):
+    """Revocation key for a refresh token's rotation chain (tokens minted before families use their jti)."""
+    return f"fam:{jwt_payload.get('fam') or jwt_payload['jti']}"
@@ -0,0 +1,155 @@
+import re
+
+import click
+from sqlalchemy import and_, event, or_, select, text
+
+# 🔎 External-content FTS5 index over events: the text lives only in `events`, the index
+# holds tokens. user_id is indexed as a column too, so a search intersects the caller's
+# doclist with the terms' instead of matching everyone's events and filtering afterwards.
+# prefix='2 3' keeps extra index entries for 2/3-letter prefixes, which search-as-you-type hits most.
+FTS_TABLE = "events_fts"
+FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, details, address, user_id,
+        content='events', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS events_fts_ai AFTER INSERT ON events BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, details, address, user_id)
+        VALUES (new.id, new.title, new.details, new.address, new.user_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS events_fts_ad AFTER DELETE ON events BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, details, address, user_id)
+        VALUES ('delete', old.id, old.title, old.details, old.address, old.user_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS events_fts_au AFTER UPDATE OF title, details, address, user_id ON events BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, details, address, user_id)
+        VALUES ('delete', old.id, old.title, old.details, old.address, old.user_id);
+        INSERT INTO {FTS_TABLE}(rowid, title, details, address, user_id)
+        VALUES (new.id, new.title, new.details, new.address, new.user_id);
+    END""",
+]
+FTS_DROP = [
+    "DROP TRIGGER IF EXISTS events_fts_au",
+    "DROP TRIGGER IF EXISTS events_fts_ad",
+    "DROP TRIGGER IF EXISTS events_fts_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+# Column weights for bm25(): a hit in the title counts most; user_id never scores
+RANK = f"bm25({FTS_TABLE}, 10.0, 2.0, 5.0, 0.0)"
+
+
+
+def exclude_search_tables(object, name, type_, reflected, compare_to):
+    """Alembic include_object hook: autogenerate must not try to drop the FTS5 tables."""
+    return not (type_ == "table" and reflected and name.startswith(FTS_TABLE))
+
+
+MAX_SEARCH_TERMS = 8
+SEARCH_TERM = re.compile(r"\w+")
+
+
+def build_match_query(user_id, q):
+    """FTS5 MATCH expression for a free-text query, or None if it has no searchable words.
+
+    Every word becomes a quoted prefix term ("ramen pl" -> "ramen"* "pl"*), so user input
+    can never be read as FTS syntax, and results must contain all of them.
+    """
+    terms = SEARCH_TERM.findall(q)[:MAX_SEARCH_TERMS]
+    if not terms:
+        return None
+    phrase = " ".join(f'"{term}"*' for term in terms)
+    return f'user_id:"{int(user_id)}" AND {{title details address}}: ({phrase})'
+
+
+class EventSearch:
+    """Keeps the FTS5 index installed and answers ranked searches (SQLite only).
+
+    The index is maintained by triggers, so ORM writes, Core bulk writes and raw SQL all
+    stay in sync. `flask search rebuild` (re)installs the table and triggers and reindexes
+    every event: run it after restoring a backup or after a batch migration that recreated
+    the events table (SQLite drops a table's triggers with it).
+    """
+
+    def __init__(self, app=None, db=None):
+        self.db = None
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.db = db
+        # db.create_all() (fresh databases, benchmarks) gets the index too; migrations install it themselves
+        event.listen(db.metadata, "after_create", self._after_create)
+        # ...and db.drop_all() takes it away, or the next create_all would keep the old tokens
+        event.listen(db.metadata, "after_drop", self._after_drop)
+        app.cli.add_command(self._cli())
+
+    def _after_create(self, metadata, connection, **kw):
+        if connection.dialect.name != "sqlite":
+            return
+        existed = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+        ).first()
+        for statement in FTS_DDL:
+            connection.execute(text(statement))
+        if not existed:
+            connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+    def _after_drop(self, metadata, connection, **kw):
+        if connection.dialect.name != "sqlite":
+            return
+        for statement in FTS_DROP:
+            connection.execute(text(statement))
+
+    def supported(self):
+        return self.db.engine.dialect.name == "sqlite"
+
+    def search(self, user_id, q, limit, offset=0):
+        """Ids of the user's events matching `q`, best first; None if `q` has no searchable words."""
+        match = build_match_query(user_id, q)
+        if match is None:
+            return None
+        if not self.supported():
+            return self._search_like(user_id, SEARCH_TERM.findall(q)[:MAX_SEARCH_TERMS], limit, offset)
+        rows = self.db.session.execute(
+            text(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match "
+                f"ORDER BY {RANK}, rowid DESC LIMIT :limit OFFSET :offset"
+            ),
+            {"match": match, "limit": limit, "offset": offset},
+        )
+        return [row[0] for row in rows]
+
+    def _search_like(self, user_id, terms, limit, offset):
+        # Other databases: unranked substring match, newest first (no index, fine for small accounts)
+        from models import Event
+
+        columns = (Event.title, Event.details, Event.address)
+        query = (
+            select(Event.id)
+            .where(Event.user_id == user_id, and_(*(or_(*(column.ilike(f"%{term}%") for column in columns)) for term in terms)))
+            .order_by(Event.date.desc(), Event.id.desc())
+            .limit(limit)
+            .offset(offset)
+        )
+        return list(self.db.session.scalars(query))
+
+    def rebuild(self):
+        """Drop and recreate the index and triggers, then reindex every event; returns the row count."""
+        with self.db.engine.begin() as connection:
+            for statement in FTS_DROP + FTS_DDL:
+                connection.execute(text(statement))
+            connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+            connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"))
+            return connection.execute(text("SELECT count(*) FROM events")).scalar()
+
+    def _cli(self):
+        group = click.Group("search", help="Event full-text search index.")
+
+        @group.command("rebuild")
+        def rebuild_command():
+            """Recreate the FTS5 index and its triggers from the events table."""
+            if not self.supported():
+                raise click.ClickException("Full-text search needs SQLite (FTS5).")
+            click.echo(f"🔎 Reindexed {self.rebuild():,} events.")
+
+        return group
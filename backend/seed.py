@@ -1,75 +1,183 @@
+"""Synthetic data generator for capacity planning.
+
+Creates N users with M events each, with realistic dates, multi-day ranges, times,
+addresses and coordinates. Output is reproducible for a given --seed. Rows go in through
+SQLAlchemy Core executemany in chunks, so tens of millions of rows take minutes.
+
+Run from backend/:
+    python seed.py                                   # 10 users x 100 events
+    python seed.py --users 100000 --events-per-user 100 --chunk-size 20000
+"""
+import argparse
+import random
+import sys
+import time as clock
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import func, insert, select, text
+
 from app import app, db
+from config import event_stats, password_hasher
+from geo import encode_geohash
 from models import Event, User  # Import User to assign user_id
 
-def seed_events():
+# 💕 The original hand-written demo dates, now used as templates
+DATE_TEMPLATES = [
+    ("First Ice Cream Date 🍦", "Tried 5 different flavors, but we both loved the matcha one the most. Ended with a playful spoon fight! 💚"),
+    ("Weekend Cabin Getaway 🏕️", "Cozy fireplace, homemade hot cocoa, and stargazing at night. Best weekend ever. 🔥✨"),
+    ("Sunset Picnic at the Park 🌅", "Made cute sandwiches together, fed the ducks, and watched the sun dip below the lake. Magical. ✨"),
+    ("Rainy Coffee Shop Date ☕", "Shared an oversized sweater and listened to lo-fi while sipping caramel lattes. Best rainy day ever. 🌧️"),
+    ("Valentine's Day Special 💖", "Surprised each other with handwritten love letters and heart-shaped chocolates. Teary-eyed moment. 🥹🍫"),
+    ("Late-Night Drive & Stargazing 🚗", "Drove with no destination, ended up at a quiet hilltop. Held hands and counted shooting stars. 🌠"),
+    ("DIY Pizza Night 🍕", "Tried to make heart-shaped pizzas. His looked perfect, mine looked like a potato. Laughed until we cried. 😂"),
+    ("Cherry Blossom Walk 🌸", "Held hands under a tunnel of pink blossoms. Took way too many photos but every moment felt like a dream. 📸💕"),
+    ("Build-A-Bear Date 🧸", "Made matching teddy bears with little love notes inside. Mine has his voice recorded inside. 😭❤️"),
+    ("Surprise Staycation at a Fancy Hotel 🏨", "Ordered room service in fluffy robes and had a bubble bath together. Felt like a honeymoon. 🛁💕"),
+    ("Arcade Battle Date 🎮", "Competed in every game. I won at racing, he won at claw machines. Left with matching plushies. 🏆🐻"),
+    ("Matching Pajama Day 🛏️", "Wore matching cat pajamas, made a blanket fort, played Switch until we fell asleep. 💤🐱"),
+    ("Baking Together 🍪", "Flour fight. Cookie dough taste test (a lot). Burnt the first batch but laughed so much. 🍪💖"),
+]
+
+# 🌍 Home cities couples are spread across: (name, latitude, longitude)
+CITIES = [
+    ("New York, NY", 40.7128, -74.0060), ("San Francisco, CA", 37.7749, -122.4194),
+    ("Chicago, IL", 41.8781, -87.6298), ("Austin, TX", 30.2672, -97.7431),
+    ("Seattle, WA", 47.6062, -122.3321), ("London, UK", 51.5074, -0.1278),
+    ("Paris, France", 48.8566, 2.3522), ("Tokyo, Japan", 35.6762, 139.6503),
+    ("Seoul, South Korea", 37.5665, 126.9780), ("Sydney, Australia", -33.8688, 151.2093),
+]
+STREETS = ["Main St", "Park Ave", "Broadway", "Elm St", "Lakeview Dr", "Sunset Blvd", "Maple Ave", "River Rd"]
+
+MULTI_DAY_SHARE = 0.08
+NO_LOCATION_SHARE = 0.15
+PHOTO_SHARE = 0.25
+SEED_PASSWORD = "password123"
+
+
+def generate_user_events(rng, user_id, count, today, now):
+    """Yield `count` event rows (dicts for Core insert) for one couple."""
+    city, home_lat, home_lon = rng.choice(CITIES)
+    together_since = today - timedelta(days=rng.randint(60, 5 * 365))
+    history_days = (today - together_since).days
+
+    for _ in range(count):
+        # Dates cluster on weekends: re-roll most weekday picks once
+        day = together_since + timedelta(days=rng.randint(0, history_days))
+        if day.weekday() < 4 and rng.random() < 0.5:
+            day = together_since + timedelta(days=rng.randint(0, history_days))
+
+        title, details = rng.choice(DATE_TEMPLATES)
+        start_hour = min(23, max(8, int(rng.gauss(17, 3))))
+        start = time(start_hour, rng.choice((0, 15, 30, 45)))
+        end = time((start_hour + rng.randint(1, 4)) % 24, rng.choice((0, 15, 30, 45)))
+
+        range_start = range_end = None
+        if rng.random() < MULTI_DAY_SHARE:
+            range_start, range_end = day, day + timedelta(days=rng.randint(1, 4))
+
+        latitude = longitude = address = None
+        if rng.random() >= NO_LOCATION_SHARE:
+            # ~5km of jitter around home, the odd trip much further out
+            spread = 0.05 if rng.random() < 0.9 else 2.0
+            latitude = max(-90.0, min(90.0, rng.gauss(home_lat, spread)))
+            longitude = max(-180.0, min(180.0, rng.gauss(home_lon, spread)))
+            address = f"{rng.randint(1, 9999)} {rng.choice(STREETS)}, {city}"
+
+        yield {
+            "user_id": user_id,
+            "title": title,
+            "details": details if rng.random() < 0.7 else None,
+            "address": address,
+            "latitude": latitude,
+            "longitude": longitude,
+            "geohash": encode_geohash(latitude, longitude),  # Core inserts skip the ORM listener
+            "start_time": start,
+            "end_time": end,
+            "date": day,
+            "range_start": range_start,
+            "range_end": range_end,
+            "photo": f"https://picsum.photos/seed/{rng.getrandbits(32)}/1200/900" if rng.random() < PHOTO_SHARE else None,
+            "updated_at": now,
+        }
+
+
+def report(label, done, total, started):
+    rate = done / max(clock.monotonic() - started, 1e-9)
+    sys.stderr.write(f"\r  {label}: {done:,}/{total:,} ({rate:,.0f} rows/s)")
+    if done == total:
+        sys.stderr.write("\n")
+    sys.stderr.flush()
+
+
+def insert_in_chunks(connection, table, rows, total, chunk_size, label):
+    """executemany `rows` into `table`, one transaction per chunk."""
+    started = clock.monotonic()
+    done = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            with connection.begin():
+                connection.execute(insert(table), chunk)
+            done += len(chunk)
+            chunk = []
+            report(label, done, total, started)
+    if chunk or not done:
+        with connection.begin():
+            if chunk:
+                connection.execute(insert(table), chunk)
+        done += len(chunk)
+        report(label, done, total, started)
+
+
+def seed(users, events_per_user, seed_value, chunk_size, as_of=None, create_tables=False):
     with app.app_context():  # ✅ Ensures the script runs within the Flask application context
-        # Fetch an existing user (first user in the database)
-        test_user = User.query.first()
-
-        if not test_user:
-            print("❌ No users found! Please create a user before running seed.py.")
-            return
-
-        test_events = [
-            Event(user_id=test_user.id, title="First Ice Cream Date 🍦", date="2025-02-02", 
-                  start_time="14:00", end_time="15:30",
-                  details="Tried 5 different flavors, but we both loved the matcha one the most. Ended with a playful spoon fight! 💚"),
-
-            Event(user_id=test_user.id, title="Weekend Cabin Getaway 🏕️", date="2025-02-03", 
-                  start_time="17:00", end_time="11:00",  
-                  details="Cozy fireplace, homemade hot cocoa, and stargazing at night. Best weekend ever. 🔥✨", 
-                  range_start="2025-02-03", range_end="2025-02-05"), 
-
-            Event(user_id=test_user.id, title="Sunset Picnic at the Park 🌅", date="2025-02-06", 
-                  start_time="17:30", end_time="19:00",
-                  details="Made cute sandwiches together, fed the ducks, and watched the sun dip below the lake. Magical. ✨"),
-
-            Event(user_id=test_user.id, title="Rainy Coffee Shop Date ☕", date="2025-02-08", 
-                  start_time="13:00", end_time="15:00",
-                  details="Shared an oversized sweater and listened to lo-fi while sipping caramel lattes. Best rainy day ever. 🌧️"),
-
-            Event(user_id=test_user.id, title="Valentine's Day Special 💖", date="2025-02-13", 
-                  start_time="18:00", end_time="22:00",
-                  details="Surprised each other with handwritten love letters and heart-shaped chocolates. Teary-eyed moment. 🥹🍫", 
-                  range_start="2025-02-13", range_end="2025-02-14"), 
-
-            Event(user_id=test_user.id, title="Late-Night Drive & Stargazing 🚗", date="2025-02-15", 
-                  start_time="22:00", end_time="00:30",
-                  details="Drove with no destination, ended up at a quiet hilltop. Held hands and counted shooting stars. 🌠"),
-
-            Event(user_id=test_user.id, title="DIY Pizza Night 🍕", date="2025-02-18", 
-                  start_time="19:00", end_time="21:30",
-                  details="Tried to make heart-shaped pizzas. His looked perfect, mine looked like a potato. Laughed until we cried. 😂"),
-
-            Event(user_id=test_user.id, title="Cherry Blossom Walk 🌸", date="2025-02-20", 
-                  start_time="16:00", end_time="18:30",
-                  details="Held hands under a tunnel of pink blossoms. Took way too many photos but every moment felt like a dream. 📸💕"),
-
-            Event(user_id=test_user.id, title="Build-A-Bear Date 🧸", date="2025-02-22", 
-                  start_time="14:00", end_time="16:00",
-                  details="Made matching teddy bears with little love notes inside. Mine has his voice recorded inside. 😭❤️"),
-
-            Event(user_id=test_user.id, title="Surprise Staycation at a Fancy Hotel 🏨", date="2025-02-23", 
-                  start_time="15:00", end_time="11:00",
-                  details="Ordered room service in fluffy robes and had a bubble bath together. Felt like a honeymoon. 🛁💕", 
-                  range_start="2025-02-23", range_end="2025-02-24"), 
-
-            Event(user_id=test_user.id, title="Arcade Battle Date 🎮", date="2025-02-25", 
-                  start_time="17:00", end_time="20:00",
-                  details="Competed in every game. I won at racing, he won at claw machines. Left with matching plushies. 🏆🐻"),
-
-            Event(user_id=test_user.id, title="Matching Pajama Day 🛏️", date="2025-02-26", 
-                  start_time="12:00", end_time="23:59",
-                  details="Wore matching cat pajamas, made a blanket fort, played Switch until we fell asleep. 💤🐱"),
-
-            Event(user_id=test_user.id, title="Baking Together 🍪", date="2025-02-27", 
-                  start_time="15:00", end_time="18:00",
-                  details="Flour fight. Cookie dough taste test (a lot). Burnt the first batch but laughed so much. 🍪💖"),
-        ]
-
-        db.session.add_all(test_events)
-        db.session.commit()
-        print("✅ Cute test events with user_id added to the database!")
+        if create_tables:
+            db.create_all()
+
+        first_id = (db.session.scalar(select(func.max(User.id))) or 0) + 1
+        db.session.close()
+        # One bcrypt hash shared by every generated user: hashing per user would dominate the run
+        password_hash = password_hasher.hash(SEED_PASSWORD)
+        today = as_of or date.today()
+        now = datetime.utcnow()
+
+        def user_rows():
+            for user_id in range(first_id, first_id + users):
+                yield {"id": user_id, "email": f"user{user_id}@lovelog.test", "password_hash": password_hash, "data_version": 0}
+
+        def event_rows():
+            for user_id in range(first_id, first_id + users):
+                # Seeded per user, so output doesn't depend on chunk size or ordering
+                rng = random.Random(f"{seed_value}:{user_id}")
+                yield from generate_user_events(rng, user_id, events_per_user, today, now)
+
+        print(f"🌱 Generating {users:,} users x {events_per_user:,} events (seed={seed_value}, chunks of {chunk_size:,})")
+        started = clock.monotonic()
+        with db.engine.connect() as connection:
+            insert_in_chunks(connection, User.__table__, user_rows(), users, chunk_size, "users")
+            insert_in_chunks(connection, Event.__table__, event_rows(), users * events_per_user, chunk_size, "events")
+            if connection.dialect.name == "postgresql":
+                # Ids were assigned explicitly, so move the serial past them for future signups
+                with connection.begin():
+                    connection.execute(text("SELECT setval(pg_get_serial_sequence('users', 'id'), (SELECT MAX(id) FROM users))"))
+        # Core inserts bypass the write routes, so roll the new users' events into the calendar stats here
+        counted, written = event_stats.rebuild(from_user_id=first_id)
+        print(f"📅 Rolled {counted:,} events into {written:,} month stats rows")
+        print(f"✅ Done in {clock.monotonic() - started:.1f}s. Users log in with password '{SEED_PASSWORD}'.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic LoveLog users and events.")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--events-per-user", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42, help="Same seed + --as-of + starting user id = same data")
+    parser.add_argument("--as-of", type=date.fromisoformat, help="Pretend today is YYYY-MM-DD (default: today)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Rows per executemany / transaction")
+    parser.add_argument("--create-tables", action="store_true", help="db.create_all() first (fresh databases only)")
+    args = parser.parse_args()
+    seed(args.users, args.events_per_user, args.seed, args.chunk_size, args.as_of, args.create_tables)
+
 
 if __name__ == "__main__":
-    seed_events()
+    main()
@@ -0,0 +1,75 @@
+from sqlalchemy import DateTime, Date, Time
+from sqlalchemy.orm import load_only
+
+from models import Event
+from photos import photo_urls
+
+
+def _excluded_columns(model):
+    """Top-level "-column" entries of a model's SerializerMixin serialize_rules."""
+    return {
+        rule[1:] for rule in getattr(model, "serialize_rules", ())
+        if rule.startswith("-") and "." not in rule
+    }
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def _time(value):
+    # HH:MM like the app has always sent, unless seconds were actually recorded
+    if value is None:
+        return None
+    return value.isoformat(timespec="seconds" if value.second or value.microsecond else "minutes")
+
+
+class CompiledSerializer:
+    """Column-projected replacement for SerializerMixin.to_dict, generated once per model.
+
+    Reads the model's table metadata and serialize_rules at import time and compiles a
+    plain function that builds the dict with straight attribute reads. Relationships are
+    never followed; dates become ISO-8601 strings and times HH:MM. Works on ORM objects
+    and on Core result rows alike, as long as they expose the columns as attributes.
+    `computed` adds derived keys: {name: (serialized column, function of its value)}.
+    """
+
+    def __init__(self, model, computed=None):
+        excluded = _excluded_columns(model)
+        self.model = model
+        self.fields = [column.key for column in model.__table__.columns if column.key not in excluded]
+        self.columns = [getattr(model, field) for field in self.fields]
+
+        column_types = {column.key: column.type for column in model.__table__.columns}
+        entries = []
+        for field in self.fields:
+            if isinstance(column_types[field], Time):
+                entries.append(f"{field!r}: _time(obj.{field})")
+            elif isinstance(column_types[field], (DateTime, Date)):
+                entries.append(f"{field!r}: _iso(obj.{field})")
+            else:
+                entries.append(f"{field!r}: obj.{field}")
+        namespace = {"_iso": _iso, "_time": _time}
+        for index, (name, (field, function)) in enumerate((computed or {}).items()):
+            if field not in self.fields:
+                raise ValueError(f"Computed field {name!r} reads {field!r}, which isn't serialized")
+            namespace[f"_computed{index}"] = function
+            entries.append(f"{name!r}: _computed{index}(obj.{field})")
+        source = f"def serialize(obj):\n    return {{{', '.join(entries)}}}\n"
+        exec(compile(source, f"<serializer {model.__name__}>", "exec"), namespace)
+        self._serialize = namespace["serialize"]
+
+    def __call__(self, obj):
+        return self._serialize(obj)
+
+    def many(self, objs):
+        serialize = self._serialize
+        return [serialize(obj) for obj in objs]
+
+    def load_only(self):
+        """Query option loading exactly the serialized columns (plus the primary key)."""
+        return load_only(*self.columns)
+
+
+# 🔹 Built once at import time; use these instead of .to_dict() on hot paths
+event_serializer = CompiledSerializer(Event, computed={"photo_sizes": ("photo", photo_urls)})  # Per-screen photo URLs
@@ -0,0 +1,255 @@
+import calendar
+from datetime import date, timedelta
+
+import click
+from flask import current_app
+from sqlalchemy import delete, insert, select
+
+# 📅 Multi-day spans longer than this are counted on their first MAX_SPAN_DAYS days only
+MAX_SPAN_DAYS = 366
+
+
+def has_range(range_start, range_end):
+    """The one rule for multi-day events: both range ends set. Anything else covers just its date.
+
+    Event.is_multi_day is the same rule for queries (the overlap endpoint).
+    """
+    return range_start is not None and range_end is not None
+
+
+def event_span(event_date, range_start=None, range_end=None):
+    """(first day, last day) an event covers: its range when it has one (has_range), else its date."""
+    if has_range(range_start, range_end):
+        first, last = range_start, range_end
+    else:
+        first = last = event_date
+    return first, min(last, first + timedelta(days=MAX_SPAN_DAYS - 1))
+
+
+def month_end(day):
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+def parse_month(value):
+    """Parse a YYYY-MM string into the first day of that month, raising ValueError if malformed."""
+    year, _, month = value.strip().partition("-")
+    return date(int(year), int(month), 1)
+
+
+class StatsDelta:
+    """Per-month changes to one user's rollup, accumulated before they touch the database.
+
+    event_count is bumped in the month an event *starts*, so summing months gives the real
+    total; day_counts is bumped on every day the event covers, across month boundaries.
+    """
+
+    def __init__(self):
+        self.months = {}  # first day of month -> [event_count delta, [31 day_counts deltas]]
+
+    def _month(self, day):
+        return self.months.setdefault(day.replace(day=1), [0, [0] * 31])
+
+    def add(self, event_date, range_start=None, range_end=None, sign=1):
+        first, last = event_span(event_date, range_start, range_end)
+        self._month(first)[0] += sign
+        day = first
+        while day <= last:
+            chunk_end = min(last, month_end(day))
+            day_counts = self._month(day)[1]
+            for index in range(day.day - 1, chunk_end.day):
+                day_counts[index] += sign
+            day = chunk_end + timedelta(days=1)
+
+    def remove(self, event_date, range_start=None, range_end=None):
+        self.add(event_date, range_start, range_end, sign=-1)
+
+    def changed(self):
+        return {month: change for month, change in self.months.items() if change[0] or any(change[1])}
+
+    def __bool__(self):
+        return bool(self.changed())
+
+
+def apply_stats_delta(session, user_id, delta):
+    """Fold a StatsDelta into event_month_stats; call inside the transaction that wrote the events.
+
+    The event write is flushed first (autoflush), so on SQLite this transaction already
+    holds the write lock; elsewhere the touched month rows are read FOR UPDATE.
+    """
+    from models import EventMonthStat
+
+    changes = delta.changed()
+    if not changes:
+        return
+    rows = {
+        row.month: row for row in session.scalars(
+            select(EventMonthStat)
+            .where(EventMonthStat.user_id == user_id, EventMonthStat.month.in_(list(changes)))
+            .with_for_update()
+        )
+    }
+    for month, (count_change, day_changes) in changes.items():
+        row = rows.get(month)
+        event_count = (row.event_count if row else 0) + count_change
+        day_counts = [old + change for old, change in zip(row.day_counts if row else [0] * 31, day_changes)]
+        if event_count < 0 or min(day_counts) < 0:
+            # The rollup no longer matches the events (raw SQL edit, lost write...): say so, keep it non-negative
+            current_app.logger.warning(
+                "event_month_stats drift for user %s in %s; run `flask stats rebuild --user-id %s`",
+                user_id, f"{month:%Y-%m}", user_id,
+            )
+            event_count, day_counts = max(0, event_count), [max(0, count) for count in day_counts]
+        if not event_count and not any(day_counts):
+            if row is not None:
+                session.delete(row)
+        elif row is None:
+            session.add(EventMonthStat(user_id=user_id, month=month, event_count=event_count, day_counts=day_counts))
+        else:
+            row.event_count, row.day_counts = event_count, day_counts  # Reassign so the JSON change is seen
+
+
+def _runs(days):
+    """Lengths of consecutive-day runs in a sorted list of dates, as (last day, length) pairs."""
+    runs = []
+    for day in days:
+        if runs and runs[-1][0] + timedelta(days=1) == day:
+            runs[-1] = (day, runs[-1][1] + 1)
+        else:
+            runs.append((day, 1))
+    return runs
+
+
+def _month_runs(month_starts):
+    runs = []
+    for month in month_starts:
+        if runs and month_end(runs[-1][0]) + timedelta(days=1) == month:
+            runs[-1] = (month, runs[-1][1] + 1)
+        else:
+            runs.append((month, 1))
+    return runs
+
+
+def summarize(rows, today, first_month=None, last_month=None):
+    """Heatmap, totals, streaks and last/next date from a user's month rows (sorted by month).
+
+    Work is O(months x 31) whatever the number of events. Streaks count consecutive days
+    (and months) with at least one event; a current streak may end today or yesterday.
+    """
+    months, active_days = [], []
+    totals = {"events": 0, "active_days": 0, "months": 0}
+    for row in rows:
+        length = calendar.monthrange(row.month.year, row.month.month)[1]
+        days = row.day_counts[:length]
+        row_active = [row.month.replace(day=index + 1) for index, count in enumerate(days) if count]
+        active_days.extend(row_active)
+        totals["events"] += row.event_count
+        totals["active_days"] += len(row_active)
+        totals["months"] += bool(row_active)
+        if (first_month is None or row.month >= first_month) and (last_month is None or row.month <= last_month):
+            months.append({"month": f"{row.month:%Y-%m}", "events": row.event_count, "active_days": len(row_active), "days": days})
+
+    past = [day for day in active_days if day <= today]
+    upcoming = [day for day in active_days if day > today]
+    day_runs = _runs(past)
+    month_runs = _month_runs(sorted({day.replace(day=1) for day in past}))
+    this_month = today.replace(day=1)
+    last_month_start = (this_month - timedelta(days=1)).replace(day=1)
+    return {
+        "months": months,
+        "totals": totals,
+        "streaks": {
+            "current_days": day_runs[-1][1] if day_runs and day_runs[-1][0] >= today - timedelta(days=1) else 0,
+            "longest_days": max((length for _, length in day_runs), default=0),
+            "current_months": month_runs[-1][1] if month_runs and month_runs[-1][0] >= last_month_start else 0,
+            "longest_months": max((length for _, length in month_runs), default=0),
+        },
+        "last_date": past[-1].isoformat() if past else None,
+        "days_since_last_date": (today - past[-1]).days if past else None,
+        "next_date": upcoming[0].isoformat() if upcoming else None,
+        "today": today.isoformat(),
+    }
+
+
+class EventStats:
+    """Owns the event_month_stats rollup: rebuilds it from events and reads it per user.
+
+    The write routes keep it current with StatsDelta + apply_stats_delta in their own
+    transaction. `flask stats rebuild` recomputes it from scratch (after the migration that
+    creates it, a restore, or raw SQL edits to events); seed.py runs it after bulk inserts.
+
+    Config keys:
+      - STATS_REBUILD_CHUNK_SIZE: rollup rows per insert (default 1000)
+    """
+
+    def __init__(self, app=None, db=None):
+        self.db = None
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.db = db
+        self.chunk_size = app.config.get("STATS_REBUILD_CHUNK_SIZE", 1000)
+        app.cli.add_command(self._cli())
+
+    def for_user(self, user_id):
+        from models import EventMonthStat
+
+        return self.db.session.scalars(
+            select(EventMonthStat).where(EventMonthStat.user_id == user_id).order_by(EventMonthStat.month)
+        ).all()
+
+    def rebuild(self, user_ids=None, from_user_id=None):
+        """Recompute the rollup in one transaction; returns (events, rows).
+
+        Covers every user, or just `user_ids`, or every user with id >= `from_user_id`.
+        """
+        from models import Event, EventMonthStat
+
+        session = self.db.session
+        clear = delete(EventMonthStat)
+        events = select(Event.user_id, Event.date, Event.range_start, Event.range_end).order_by(Event.user_id)
+        if user_ids is not None:
+            clear = clear.where(EventMonthStat.user_id.in_(user_ids))
+            events = events.where(Event.user_id.in_(user_ids))
+        if from_user_id is not None:
+            clear = clear.where(EventMonthStat.user_id >= from_user_id)
+            events = events.where(Event.user_id >= from_user_id)
+        session.execute(clear)
+
+        pending, counted, written = [], 0, 0
+        current_user, delta = None, StatsDelta()
+
+        def flush_user():
+            for month, (event_count, day_counts) in sorted(delta.changed().items()):
+                pending.append({"user_id": current_user, "month": month, "event_count": event_count, "day_counts": day_counts})
+
+        def write_pending():
+            if pending:
+                session.execute(insert(EventMonthStat), pending)
+            return len(pending)
+
+        for user_id, event_date, range_start, range_end in session.execute(events.execution_options(yield_per=self.chunk_size)):
+            if user_id != current_user:
+                flush_user()
+                current_user, delta = user_id, StatsDelta()
+                if len(pending) >= self.chunk_size:
+                    written += write_pending()
+                    pending.clear()
+            delta.add(event_date, range_start, range_end)
+            counted += 1
+        flush_user()
+        written += write_pending()
+        session.commit()
+        return counted, written
+
+    def _cli(self):
+        group = click.Group("stats", help="Per-user calendar statistics.")
+
+        @group.command("rebuild")
+        @click.option("--user-id", "user_ids", type=int, multiple=True, help="Only these users (repeatable).")
+        def rebuild_command(user_ids):
+            """Recompute event_month_stats from the events table."""
+            counted, written = self.rebuild(list(user_ids) or None)
+            click.echo(f"📅 Rolled {counted:,} events into {written:,} month rows.")
+
+        return group
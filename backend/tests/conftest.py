@@ -0,0 +1,57 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# 🧪 Configure the app before config.py reads the environment: throwaway database, fake mail sink,
+# no background threads, cheap bcrypt hashed inline, no rate limits, and no per-process caches
+# (every test starts from an empty database, so cached user ids would leak between tests)
+_instance_dir = tempfile.mkdtemp(prefix="lovelog-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(_instance_dir, 'test.db')}",
+    "TOKEN_REVOCATION_FILE": os.path.join(_instance_dir, "revoked_tokens.log"),
+    "PHOTO_STORAGE_DIR": os.path.join(_instance_dir, "photos"),
+    "MAIL_BACKEND": "outbox.MemoryMailer",
+    "OUTBOX_WORKER_ENABLED": "0",
+    "MAINTENANCE_SCHEDULER_ENABLED": "0",
+    "RATELIMIT_ENABLED": "0",
+    "PASSWORD_HASH_WORKERS": "0",
+    "BCRYPT_LOG_ROUNDS": "4",
+    "RESPONSE_CACHE_ENABLED": "0",
+    "IDENTITY_CACHE_TTL": "0",
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app as flask_app  # noqa: E402  (registers the routes)
+from config import db  # noqa: E402
+from outbox import MemoryMailer  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    """The app with a fresh schema and an empty mail sink for every test."""
+    flask_app.config["TESTING"] = True
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+    MemoryMailer.outbox.clear()
+    MemoryMailer.fail_next = 0
+    yield flask_app
+    with flask_app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def signup(client):
+    """signup(email) -> (Authorization headers, login response JSON) for a new account."""
+    def create(email="alex@example.com", password="secret1"):
+        client.post("/api/signup", json={"email": email, "password": password})
+        tokens = client.post("/api/login", json={"email": email, "password": password}).get_json()
+        return {"Authorization": f"Bearer {tokens['access_token']}"}, tokens
+    return create
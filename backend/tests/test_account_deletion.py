@@ -0,0 +1,59 @@
+from sqlalchemy import func, select
+
+from config import db, maintenance
+from models import Event, EventMonthStat, User
+
+
+def bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def add_events(client, headers, count):
+    for day in range(1, count + 1):
+        client.post("/api/events", headers=headers, json={"title": "Event", "date": f"2025-05-{day:02d}"})
+
+
+def count(app, model, *conditions):
+    with app.app_context():
+        return db.session.scalar(select(func.count()).select_from(model).where(*conditions))
+
+
+def test_deleted_accounts_tokens_do_not_pass_for_the_next_signup(client, signup):
+    headers, tokens = signup()
+    assert client.delete("/api/user/delete", headers=headers).status_code == 200
+
+    # The new account must not inherit the deleted one's id, or the old tokens would be its own
+    new_headers, _ = signup("sam@example.com")
+    assert client.get("/api/user", headers=new_headers).get_json()["email"] == "sam@example.com"
+    assert client.get("/api/user", headers=headers).status_code == 401
+    refreshed = client.post("/api/token/refresh", headers=bearer(tokens["refresh_token"]))
+    assert refreshed.status_code == 401
+
+
+def test_small_account_is_deleted_inline(app, client, signup):
+    headers, _ = signup()
+    add_events(client, headers, 3)
+
+    response = client.delete("/api/user/delete", headers=headers)
+    assert response.status_code == 200
+    assert count(app, User) == count(app, Event) == count(app, EventMonthStat) == 0
+
+
+def test_large_account_is_closed_now_and_purged_in_the_background(app, client, signup, monkeypatch):
+    headers, tokens = signup()
+    add_events(client, headers, 3)
+    monkeypatch.setitem(app.config, "ACCOUNT_DELETE_INLINE_MAX_EVENTS", 2)
+
+    response = client.delete("/api/user/delete", headers=headers)
+    assert response.status_code == 202
+    # Closed right away: no login, no tokens, and the email is free again
+    assert client.post("/api/login", json={"email": "alex@example.com", "password": "secret1"}).status_code == 401
+    assert client.get("/api/user", headers=headers).status_code == 401
+    assert client.post("/api/token/refresh", headers=bearer(tokens["refresh_token"])).status_code == 401
+    assert count(app, Event) == 3
+    signup()
+
+    assert maintenance.run_pending(["purge_deleted_accounts"], force=True)["purge_deleted_accounts"]["accounts"] == 1
+    assert count(app, User, User.deleted_at.is_not(None)) == 0
+    assert count(app, Event) == count(app, EventMonthStat) == 0
+    assert count(app, User) == 1  # The new signup with the same email
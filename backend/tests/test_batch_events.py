@@ -0,0 +1,104 @@
+from config import db
+from models import Event, EventTombstone
+
+
+def batch(client, headers, operations, atomic=False):
+    return client.post("/api/events/batch", headers=headers, json={"operations": operations, "atomic": atomic})
+
+
+def event_titles(app):
+    with app.app_context():
+        return sorted(db.session.scalars(db.select(Event.title)))
+
+
+def create(title, date="2025-02-14"):
+    return {"op": "create", "data": {"title": title, "date": date}}
+
+
+def test_batch_applies_creates_updates_and_deletes_together(app, client, signup):
+    headers, _ = signup()
+    ids = [result["id"] for result in batch(client, headers, [create("one"), create("two")]).get_json()["results"]]
+
+    response = batch(client, headers, [
+        create("three"),
+        {"op": "update", "id": ids[0], "data": {"title": "one, edited", "date": "2025-03-01"}},
+        {"op": "delete", "id": ids[1]},
+    ])
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["committed"] is True
+    assert [result["status"] for result in body["results"]] == [201, 200, 200]
+    assert event_titles(app) == ["one, edited", "three"]
+    with app.app_context():
+        assert db.session.scalars(db.select(EventTombstone.event_id)).all() == [ids[1]]
+
+
+def test_atomic_batch_writes_nothing_when_any_operation_is_invalid(app, client, signup):
+    headers, _ = signup()
+    (existing,) = [result["id"] for result in batch(client, headers, [create("keep")]).get_json()["results"]]
+
+    response = batch(client, headers, [
+        create("new"),
+        {"op": "update", "id": existing, "data": {"title": "changed", "date": "2025-01-01"}},
+        {"op": "delete", "id": existing + 100},
+        create(""),
+    ], atomic=True)
+
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body["committed"] is False
+    assert [result.get("status") for result in body["results"]] == [None, None, 404, 400]
+    assert event_titles(app) == ["keep"]
+    assert client.get("/api/stats", headers=headers, query_string={"today": "2025-03-01"}).get_json()["totals"]["events"] == 1
+
+
+def test_non_atomic_batch_skips_invalid_operations(app, client, signup):
+    headers, _ = signup()
+
+    response = batch(client, headers, [
+        create("good"),
+        {"op": "create", "data": [1]},
+        {"op": "update", "id": 1, "data": "not an object"},
+        {"op": "rename"},
+        "not an operation",
+    ])
+
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [result["status"] for result in results] == [201, 400, 400, 400, 400]
+    assert results[1]["error"] == "'data' must be an object"
+    assert event_titles(app) == ["good"]
+
+
+def test_batch_cannot_touch_another_users_events(app, client, signup):
+    owner, _ = signup("owner@example.com")
+    other, _ = signup("other@example.com")
+    (event_id,) = [result["id"] for result in batch(client, owner, [create("mine")]).get_json()["results"]]
+
+    results = batch(client, other, [{"op": "delete", "id": event_id}], atomic=True).get_json()["results"]
+
+    assert results[0]["status"] == 403
+    assert event_titles(app) == ["mine"]
+
+
+def test_same_event_twice_in_one_batch_is_a_conflict(client, signup):
+    headers, _ = signup()
+    (event_id,) = [result["id"] for result in batch(client, headers, [create("once")]).get_json()["results"]]
+
+    results = batch(client, headers, [
+        {"op": "update", "id": event_id, "data": {"title": "a", "date": "2025-01-01"}},
+        {"op": "delete", "id": event_id},
+    ]).get_json()["results"]
+
+    assert [result["status"] for result in results] == [200, 409]
+
+
+def test_atomic_must_be_a_json_boolean(app, client, signup):
+    headers, _ = signup()
+
+    for value in ("false", "no", 0, None):
+        response = client.post("/api/events/batch", headers=headers, json={"operations": [create("x")], "atomic": value})
+        assert response.status_code == 400
+        assert response.get_json() == {"error": "'atomic' must be true or false"}
+    assert event_titles(app) == []
@@ -0,0 +1,73 @@
+import gzip
+import json
+
+import brotli
+import msgpack
+import pytest
+from werkzeug.http import parse_accept_header
+
+from config import response_compressor
+
+
+def fill_events(client, headers, count=30):
+    for index in range(count):
+        client.post("/api/events", headers=headers, json={
+            "title": f"Event {index}", "date": "2025-05-10", "details": "A long evening out " * 3
+        })
+
+
+def events(client, headers, **extra):
+    return client.get("/api/events", headers={**headers, **extra})
+
+
+def test_json_is_compact_and_the_default(client, signup):
+    headers, _ = signup()
+    fill_events(client, headers, 1)
+
+    response = events(client, headers, Accept="*/*")
+    assert response.mimetype == "application/json"
+    assert b", " not in response.get_data() and b": " not in response.get_data()
+    assert "Accept" in response.headers["Vary"]
+
+
+@pytest.mark.parametrize("accept", ["application/msgpack", "application/x-msgpack, application/json;q=0.5"])
+def test_msgpack_when_the_client_prefers_it(client, signup, accept):
+    headers, _ = signup()
+    fill_events(client, headers, 2)
+    plain = events(client, headers)
+
+    packed = events(client, headers, Accept=accept)
+    assert packed.mimetype == "application/msgpack"
+    assert msgpack.unpackb(packed.get_data()) == plain.get_json()
+    assert packed.headers["ETag"] == f'W/{plain.headers["ETag"]}'  # Same data, different bytes
+
+
+@pytest.mark.parametrize("encoding, decompress", [("br", brotli.decompress), ("gzip", gzip.decompress)])
+def test_large_bodies_are_compressed_with_the_best_offered_encoding(client, signup, encoding, decompress):
+    headers, _ = signup()
+    fill_events(client, headers)
+    plain = events(client, headers)
+
+    response = events(client, headers, **{"Accept-Encoding": f"{encoding}, identity;q=0.1"})
+    assert response.headers["Content-Encoding"] == encoding
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.headers["ETag"].startswith("W/")
+    assert json.loads(decompress(response.get_data())) == plain.get_json()
+
+
+def test_brotli_wins_ties_and_small_bodies_stay_plain(client, signup):
+    headers, _ = signup()
+    assert response_compressor.choose(parse_accept_header("gzip, br")) == "br"
+    assert response_compressor.choose(parse_accept_header("deflate")) is None
+
+    fill_events(client, headers, 1)
+    response = events(client, headers, **{"Accept-Encoding": "gzip, br"})
+    assert "Content-Encoding" not in response.headers
+
+
+def test_compressed_response_still_revalidates(client, signup):
+    headers, _ = signup()
+    fill_events(client, headers)
+    etag = events(client, headers, **{"Accept-Encoding": "gzip"}).headers["ETag"]
+
+    assert events(client, headers, **{"Accept-Encoding": "gzip", "If-None-Match": etag}).status_code == 304
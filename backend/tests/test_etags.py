@@ -0,0 +1,52 @@
+import pytest
+
+from cache import LocalCacheBackend
+from config import response_cache
+
+
+def get(client, headers, path, etag=None):
+    extra = {"If-None-Match": etag} if etag else {}
+    return client.get(path, headers={**headers, **extra})
+
+
+@pytest.fixture(params=[False, True], ids=["uncached", "response-cache"])
+def cache_enabled(request, monkeypatch):
+    """Run a test with and without the response cache in front of the views."""
+    monkeypatch.setattr(response_cache, "enabled", request.param)
+    monkeypatch.setattr(response_cache, "backend", LocalCacheBackend())  # User ids repeat across tests
+    return request.param
+
+
+@pytest.mark.parametrize("path", ["/api/user", "/api/events"])
+def test_matching_etag_gets_304_until_the_next_write(client, signup, cache_enabled, path):
+    headers, _ = signup()
+    first = get(client, headers, path)
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    etag = first.headers["ETag"]
+
+    revalidated = get(client, headers, path, etag)
+    assert revalidated.status_code == 304
+    assert revalidated.get_data() == b""
+
+    client.post("/api/events", headers=headers, json={"title": "Event", "date": "2025-05-10"})
+    changed = get(client, headers, path, etag)
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_profile_change_updates_the_body_behind_the_etag(client, signup, cache_enabled):
+    headers, _ = signup()
+    etag = get(client, headers, "/api/user").headers["ETag"]
+
+    client.patch("/api/user/update", headers=headers, json={"email": "sam@example.com"})
+    response = get(client, headers, "/api/user", etag)
+    assert response.status_code == 200
+    assert response.get_json()["email"] == "sam@example.com"
+
+
+def test_etags_are_per_user(client, signup):
+    alex, _ = signup()
+    sam, _ = signup("sam@example.com")
+    etag = get(client, alex, "/api/events").headers["ETag"]
+    assert get(client, sam, "/api/events", etag).status_code == 200
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from app import encode_sync_token
+from config import db, maintenance
+from models import EventTombstone
+
+
+def add_event(client, headers, title="Event"):
+    response = client.post("/api/events", headers=headers, json={"title": title, "date": "2025-05-10"})
+    return response.get_json()["event"]["id"]
+
+
+def changes(client, headers, since=None):
+    response = client.get("/api/events/changes", headers=headers, query_string={"since": since} if since else {})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_initial_sync_is_full_and_hands_out_a_token(client, signup):
+    headers, _ = signup()
+    event_id = add_event(client, headers)
+
+    body = changes(client, headers)
+    assert body["full"] is True
+    assert [event["id"] for event in body["events"]] == [event_id]
+    assert body["deleted"] == [] and body["sync_token"]
+
+
+def test_delta_returns_edits_and_tombstones_of_deletes(client, signup):
+    headers, _ = signup()
+    kept, edited, removed = (add_event(client, headers) for _ in range(3))
+    # A token from a minute ago: all three rows are newer, so only the later writes tell them apart
+    since = encode_sync_token(datetime.utcnow() - timedelta(minutes=1))
+
+    client.put(f"/api/events/{edited}", headers=headers, json={"title": "Edited", "date": "2025-05-11"})
+    client.delete(f"/api/events/{removed}", headers=headers)
+
+    body = changes(client, headers, since)
+    assert body["full"] is False
+    assert sorted(event["id"] for event in body["events"]) == [kept, edited]
+    assert body["deleted"] == [removed]
+
+
+def test_token_older_than_tombstone_retention_gets_a_full_resync(app, client, signup):
+    headers, _ = signup()
+    event_id = add_event(client, headers)
+    client.delete(f"/api/events/{add_event(client, headers)}", headers=headers)
+
+    retention = app.config["SYNC_TOMBSTONE_RETENTION_DAYS"]
+    body = changes(client, headers, encode_sync_token(datetime.utcnow() - timedelta(days=retention + 1)))
+    assert body["full"] is True
+    assert [event["id"] for event in body["events"]] == [event_id]
+    assert body["deleted"] == []
+
+
+def test_purge_drops_only_tombstones_past_retention(app, client, signup):
+    headers, _ = signup()
+    old, recent = add_event(client, headers), add_event(client, headers)
+    client.delete(f"/api/events/{old}", headers=headers)
+    client.delete(f"/api/events/{recent}", headers=headers)
+    with app.app_context():
+        retention = app.config["SYNC_TOMBSTONE_RETENTION_DAYS"]
+        db.session.execute(update(EventTombstone).where(EventTombstone.event_id == old)
+                           .values(deleted_at=datetime.utcnow() - timedelta(days=retention + 1)))
+        db.session.commit()
+
+    assert maintenance.run_pending(["purge_tombstones"], force=True)["purge_tombstones"]["deleted"] == 1
+    with app.app_context():
+        assert db.session.scalars(select(EventTombstone.event_id)).all() == [recent]
+    assert changes(client, headers, encode_sync_token(datetime.utcnow() - timedelta(minutes=1)))["deleted"] == [recent]
+
+
+def test_malformed_token_is_rejected(client, signup):
+    headers, _ = signup()
+    assert client.get("/api/events/changes", headers=headers, query_string={"since": "nope"}).status_code == 400
@@ -0,0 +1,80 @@
+from app import decode_opaque_token
+from config import db
+
+
+def add_event(client, headers, title, **fields):
+    response = client.post("/api/events", headers=headers, json={"title": title, "date": "2025-05-10", **fields})
+    return response.get_json()["event"]["id"]
+
+
+def search(client, headers, q, **params):
+    response = client.get("/api/events/search", headers=headers, query_string={"q": q, **params})
+    assert response.status_code == 200
+    body = response.get_json()
+    return [event["id"] for event in body["events"]], body["next_cursor"]
+
+
+def test_prefix_terms_match_title_details_and_address(client, signup):
+    headers, _ = signup()
+    by_title = add_event(client, headers, "Ramen night")
+    by_details = add_event(client, headers, "Dinner", details="Best ramen in town")
+    by_address = add_event(client, headers, "Walk", address="12 Ramenstraße")
+    add_event(client, headers, "Picnic")
+
+    ids, _ = search(client, headers, "ram")
+    assert ids[0] == by_title  # Title hits rank first
+    assert sorted(ids) == sorted([by_title, by_details, by_address])
+    assert search(client, headers, "ramen town")[0] == [by_details]
+
+
+def test_index_follows_updates_and_deletes(client, signup):
+    headers, _ = signup()
+    event_id = add_event(client, headers, "Sushi date")
+    removed = add_event(client, headers, "Sushi lunch")
+
+    client.put(f"/api/events/{event_id}", headers=headers, json={"title": "Tapas date", "date": "2025-05-10"})
+    client.delete(f"/api/events/{removed}", headers=headers)
+
+    assert search(client, headers, "sushi")[0] == []
+    assert search(client, headers, "tapas")[0] == [event_id]
+
+
+def test_search_only_sees_the_callers_events(client, signup):
+    alex, _ = signup()
+    sam, _ = signup("sam@example.com")
+    add_event(client, alex, "Museum")
+    mine = add_event(client, sam, "Museum")
+
+    assert search(client, sam, "museum")[0] == [mine]
+
+
+def test_cursor_pages_through_every_match_once(client, signup):
+    headers, _ = signup()
+    matches = {add_event(client, headers, f"Concert {index}") for index in range(5)}
+
+    seen, cursor = [], None
+    while True:
+        ids, cursor = search(client, headers, "concert", limit=2, **({"cursor": cursor} if cursor else {}))
+        seen += ids
+        if cursor is None:
+            break
+        assert decode_opaque_token(cursor)["offset"] == len(seen)
+    assert sorted(seen) == sorted(matches)
+
+
+def test_queries_without_words_are_rejected(client, signup):
+    headers, _ = signup()
+    for q in ("", "   ", '"*"'):
+        assert client.get("/api/events/search", headers=headers, query_string={"q": q}).status_code == 400
+
+
+def test_drop_all_takes_the_index_with_it(app, client, signup):
+    headers, _ = signup()
+    add_event(client, headers, "Zebra")
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+    headers, _ = signup()
+    add_event(client, headers, "Lion")  # Same rowid as the dropped "Zebra" event
+    assert search(client, headers, "zebra")[0] == []
@@ -0,0 +1,45 @@
+def add_event(client, headers, day, title="Event"):
+    response = client.post("/api/events", headers=headers, json={"title": title, "date": day})
+    return response.get_json()["event"]["id"]
+
+
+def page(client, headers, **params):
+    response = client.get("/api/events", headers=headers, query_string=params)
+    assert response.status_code == 200
+    body = response.get_json()
+    return [event["id"] for event in body["events"]], body["next_cursor"]
+
+
+def test_cursor_walks_equal_dates_without_skipping_or_repeating(client, signup):
+    headers, _ = signup()
+    # Five events share a date, so only the id tiebreaker keeps the page boundaries stable
+    same_day = [add_event(client, headers, "2025-05-10") for _ in range(5)]
+    earlier = add_event(client, headers, "2025-05-01")
+    later = add_event(client, headers, "2025-05-20")
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        ids, cursor = page(client, headers, **params)
+        seen += ids
+        if cursor is None:
+            break
+        # A row inserted behind the cursor mid-walk must not shift the remaining pages
+        if len(seen) == 2:
+            add_event(client, headers, "2025-04-01")
+
+    assert seen == [earlier, *same_day, later]
+
+
+def test_window_bounds_are_inclusive_and_limit_is_clamped(client, signup):
+    headers, _ = signup()
+    ids = [add_event(client, headers, day) for day in ("2025-04-30", "2025-05-01", "2025-05-31", "2025-06-01")]
+
+    assert page(client, headers, **{"from": "2025-05-01", "to": "2025-05-31"}) == (ids[1:3], None)
+    assert page(client, headers, limit=10000)[0] == ids
+
+
+def test_bad_paging_arguments_are_rejected(client, signup):
+    headers, _ = signup()
+    for params in ({"limit": 0}, {"limit": "ten"}, {"cursor": "not-a-cursor"}, {"from": "05/01/2025"}):
+        assert client.get("/api/events", headers=headers, query_string=params).status_code == 400
@@ -0,0 +1,16 @@
+def test_metrics_are_open_in_testing_without_a_token(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+
+
+def test_metrics_are_refused_in_production_without_a_token(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, "TESTING", False)
+    assert client.get("/metrics").status_code == 403
+
+
+def test_metrics_token_is_required_once_set(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, "METRICS_TOKEN", "scrape-me")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-me"}).status_code == 200
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from geo import covering_prefixes, encode_geohash
+
+
+def add_event(client, headers, latitude, longitude):
+    response = client.post("/api/events", headers=headers, json={
+        "title": "Event", "date": "2025-05-10", "latitude": latitude, "longitude": longitude
+    })
+    return response.get_json()["event"]["id"]
+
+
+def nearby(client, headers, **params):
+    response = client.get("/api/events/nearby", headers=headers, query_string=params)
+    assert response.status_code == 200
+    return [event["id"] for event in response.get_json()["events"]]
+
+
+@pytest.mark.parametrize("box", [
+    (-0.01, -0.01, 0.01, 0.01),        # Corner shared by the four top-level cells
+    (40.69, -74.02, 40.73, -73.98),    # Straddles several fine cell edges
+    (89.5, 179.5, 90.0, 180.0),        # Edges on lat 90 / lon 180
+    (-90.0, -180.0, -89.9, -179.9),
+])
+def test_covering_prefixes_cover_every_point_of_the_box(box):
+    min_lat, min_lon, max_lat, max_lon = box
+    prefixes = covering_prefixes(*box)
+    assert 0 < len(prefixes) <= 32
+
+    rng = random.Random(7)
+    points = [(lat, lon) for lat in (min_lat, max_lat) for lon in (min_lon, max_lon)]
+    points += [(rng.uniform(min_lat, max_lat), rng.uniform(min_lon, max_lon)) for _ in range(500)]
+    for lat, lon in points:
+        geohash = encode_geohash(lat, lon)
+        assert any(geohash.startswith(prefix) for prefix in prefixes), (lat, lon)
+
+
+def test_box_across_cell_edges_finds_neighbors_on_every_side(client, signup):
+    headers, _ = signup()
+    inside = [add_event(client, headers, lat, lon) for lat, lon in ((0.001, 0.001), (-0.001, 0.001), (0.001, -0.001), (-0.001, -0.001))]
+    add_event(client, headers, 0.02, 0.0)
+
+    assert sorted(nearby(client, headers, min_lat=-0.01, min_lon=-0.01, max_lat=0.01, max_lon=0.01)) == sorted(inside)
+
+
+def test_box_across_the_antimeridian(client, signup):
+    headers, _ = signup()
+    east, west = add_event(client, headers, 10, 179.5), add_event(client, headers, 10, -179.5)
+    add_event(client, headers, 10, 0)
+
+    assert sorted(nearby(client, headers, min_lat=9, min_lon=179, max_lat=11, max_lon=-179)) == sorted([east, west])
+
+
+def test_radius_results_are_sorted_by_distance(client, signup):
+    headers, _ = signup()
+    far = add_event(client, headers, 40.72, -74.0)
+    near = add_event(client, headers, 40.701, -74.0)
+    add_event(client, headers, 41.5, -74.0)
+
+    assert nearby(client, headers, lat=40.7, lon=-74.0, radius=5000) == [near, far]
+    assert nearby(client, headers, lat=40.7, lon=-74.0, radius=5000, limit=1) == [near]
+
+
+def test_bad_viewport_arguments_are_rejected(client, signup):
+    headers, _ = signup()
+    for params in (
+        {"min_lat": 1, "min_lon": 0, "max_lat": 0, "max_lon": 1},
+        {"min_lat": 0, "min_lon": 0, "max_lat": 91, "max_lon": 1},
+        {"min_lat": 0, "min_lon": 0, "max_lat": 1, "max_lon": 1, "limit": 0},
+        {"lat": 0, "lon": 0},
+    ):
+        assert client.get("/api/events/nearby", headers=headers, query_string=params).status_code == 400, params
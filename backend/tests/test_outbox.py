@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from config import db, email_outbox
+from models import OutboxMessage
+from outbox import MemoryMailer
+
+
+@pytest.fixture
+def outbox(app):
+    """email_outbox with its retry settings restored after the test."""
+    saved = (email_outbox.max_attempts, email_outbox.backoff_base, email_outbox.backoff_max)
+    yield email_outbox
+    email_outbox.max_attempts, email_outbox.backoff_base, email_outbox.backoff_max = saved
+
+
+def enqueue(app, recipient="alex@example.com"):
+    with app.app_context():
+        message = email_outbox.enqueue(recipient, "Hello", "Body")
+        db.session.commit()
+        return message.id
+
+
+def load(app, message_id):
+    with app.app_context():
+        return db.session.get(OutboxMessage, message_id)
+
+
+def make_due(app, message_id):
+    with app.app_context():
+        db.session.execute(
+            update(OutboxMessage).where(OutboxMessage.id == message_id)
+            .values(next_attempt_at=datetime.utcnow() - timedelta(seconds=1))
+        )
+        db.session.commit()
+
+
+def test_reset_email_is_queued_with_the_token_and_sent_by_drain(client, signup, outbox):
+    signup()
+    assert client.post("/api/forgot-password", json={"email": "alex@example.com"}).status_code == 200
+    assert MemoryMailer.outbox == []  # Nothing leaves before the worker drains
+
+    assert outbox.drain() == 1
+    assert [message["To"] for message in MemoryMailer.outbox] == ["alex@example.com"]
+    assert "reset-password?token=" in MemoryMailer.outbox[0].get_content()
+    with outbox.app.app_context():
+        message = db.session.scalars(select(OutboxMessage)).one()
+        assert (message.status, message.attempts, message.claim_token) == ("sent", 0, None)
+        assert message.sent_at is not None
+
+
+def test_failed_send_backs_off_exponentially_with_jitter(app, outbox):
+    outbox.backoff_base, outbox.backoff_max = 30, 3600
+    message_id = enqueue(app)
+
+    for attempt, delay in ((1, 30), (2, 60), (3, 120)):
+        MemoryMailer.fail_next = 1
+        before = datetime.utcnow()
+        assert outbox.drain() == 1
+        message = load(app, message_id)
+        assert (message.status, message.attempts, message.claim_token) == ("pending", attempt, None)
+        assert "simulated failure" in message.last_error
+        # Jitter spreads the retry over the upper half of the backoff window
+        wait = (message.next_attempt_at - before).total_seconds()
+        assert delay * 0.5 - 1 <= wait <= delay + 1
+        assert outbox.drain() == 0  # Not due yet
+        make_due(app, message_id)
+
+    assert outbox.drain() == 1
+    assert load(app, message_id).status == "sent"
+    assert len(MemoryMailer.outbox) == 1
+
+
+def test_message_fails_for_good_after_max_attempts(app, outbox):
+    outbox.max_attempts = 2
+    message_id = enqueue(app)
+
+    MemoryMailer.fail_next = 2
+    outbox.drain()
+    make_due(app, message_id)
+    outbox.drain()
+
+    message = load(app, message_id)
+    assert (message.status, message.attempts) == ("failed", 2)
+    make_due(app, message_id)
+    assert outbox.drain() == 0
+    assert MemoryMailer.outbox == []
+
+
+def test_claimed_message_is_leased_until_the_claim_expires(app, outbox):
+    message_id = enqueue(app)
+    # Another worker claimed it and crashed before recording the outcome
+    with app.app_context():
+        db.session.execute(
+            update(OutboxMessage).where(OutboxMessage.id == message_id)
+            .values(claim_token="crashed-worker", next_attempt_at=datetime.utcnow() + outbox.lease)
+        )
+        db.session.commit()
+
+    assert outbox.drain() == 0
+    make_due(app, message_id)  # Lease ran out
+    assert outbox.drain() == 1
+    assert load(app, message_id).status == "sent"
+
+
+def test_drain_claims_at_most_one_batch(app, outbox):
+    for index in range(outbox.batch_size + 3):
+        enqueue(app, f"user{index}@example.com")
+
+    assert outbox.drain() == outbox.batch_size
+    assert outbox.drain() == 3
+    assert outbox.drain() == 0
+    assert len(MemoryMailer.outbox) == outbox.batch_size + 3
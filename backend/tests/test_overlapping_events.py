@@ -0,0 +1,46 @@
+from datetime import date
+
+from config import db, event_stats
+from models import Event
+
+
+def add_event(client, headers, **fields):
+    return client.post("/api/events", headers=headers, json={"title": "Event", **fields}).get_json()["event"]["id"]
+
+
+def overlapping(client, headers, date_from, date_to):
+    response = client.get("/api/events/overlapping", headers=headers, query_string={"from": date_from, "to": date_to})
+    return [event["id"] for event in response.get_json()["events"]]
+
+
+def heatmap(client, headers, month):
+    stats = client.get("/api/stats", headers=headers, query_string={"from": month, "to": month, "today": "2025-12-31"}).get_json()
+    return {month_stats["month"]: month_stats["days"] for month_stats in stats["months"]}
+
+
+def test_ranges_overlap_the_window_from_either_side(client, signup):
+    headers, _ = signup()
+    trip = add_event(client, headers, date="2025-03-30", range_start="2025-03-30", range_end="2025-04-02")
+    dinner = add_event(client, headers, date="2025-04-01")
+    add_event(client, headers, date="2025-04-05")
+
+    assert overlapping(client, headers, "2025-04-01", "2025-04-01") == [trip, dinner]
+    assert overlapping(client, headers, "2025-03-01", "2025-03-30") == [trip]
+    assert overlapping(client, headers, "2025-04-03", "2025-04-04") == []
+
+
+def test_half_open_range_is_its_date_for_both_overlap_and_stats(app, client, signup):
+    headers, _ = signup()
+    event_id = add_event(client, headers, date="2025-05-10")
+    with app.app_context():  # Legacy shape: a range start without an end
+        db.session.get(Event, event_id).range_start = date(2025, 5, 3)
+        db.session.commit()
+        assert not db.session.get(Event, event_id).is_multi_day
+
+    assert overlapping(client, headers, "2025-05-10", "2025-05-10") == [event_id]
+    assert overlapping(client, headers, "2025-05-03", "2025-05-09") == []
+    # Rebuilt rollup counts the same single day the overlap query returns it for
+    with app.app_context():
+        event_stats.rebuild()
+    days = heatmap(client, headers, "2025-05")["2025-05"]
+    assert [index + 1 for index, count in enumerate(days) if count] == [10]
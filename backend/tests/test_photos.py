@@ -0,0 +1,89 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from PIL import Image
+from sqlalchemy import update
+
+from config import db, photo_service
+from models import Photo
+
+
+@pytest.fixture
+def thumbnails(monkeypatch):
+    """Render thumbnails on a thread instead of the process pool; call it to wait for them."""
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(photo_service, "executor", lambda: pool)
+    yield lambda: pool.shutdown(wait=True)
+    pool.shutdown(wait=True)
+
+
+def png(width=800, height=600, color=(200, 40, 90)):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def upload(client, headers, data):
+    return client.post("/api/photos", headers=headers, data={"photo": (io.BytesIO(data), "photo.png")},
+                       content_type="multipart/form-data")
+
+
+def test_same_bytes_are_stored_once(client, signup, thumbnails):
+    headers, _ = signup()
+    data = png()
+
+    first = upload(client, headers, data)
+    assert first.status_code == 201
+    again = upload(client, headers, data)
+    assert again.status_code == 200
+    assert again.get_json()["photo"] == first.get_json()["photo"]
+    assert upload(client, headers, png(color=(0, 0, 0))).status_code == 201
+
+
+def test_thumbnails_are_rendered_and_served_immutable(app, client, signup, thumbnails):
+    headers, _ = signup()
+    body = upload(client, headers, png(1600, 1200)).get_json()
+    assert (body["width"], body["height"], body["status"]) == (1600, 1200, "pending")
+    thumbnails()
+
+    response = client.get(body["sizes"]["thumb"])
+    assert response.status_code == 200
+    assert response.mimetype == "image/jpeg"
+    assert "immutable" in response.headers["Cache-Control"]
+    assert Image.open(io.BytesIO(response.get_data())).size == (200, 150)
+
+
+def test_original_stands_in_until_the_thumbnail_is_ready(app, client, signup, thumbnails):
+    headers, _ = signup()
+    body = upload(client, headers, png()).get_json()
+    thumbnails()
+    with app.app_context():  # As if the pool had not got to it yet
+        db.session.execute(update(Photo).values(status="pending", variants=None))
+        db.session.commit()
+
+    response = client.get(body["sizes"]["small"])
+    assert response.mimetype == "image/png"
+    assert "no-cache" in response.headers["Cache-Control"]
+
+
+def test_range_and_conditional_requests(client, signup, thumbnails):
+    headers, _ = signup()
+    data = png()
+    url = upload(client, headers, data).get_json()["photo"]
+
+    partial = client.get(url, headers={"Range": "bytes=0-9"})
+    assert partial.status_code == 206
+    assert partial.get_data() == data[:10]
+    assert partial.headers["Content-Range"] == f"bytes 0-9/{len(data)}"
+
+    etag = client.get(url).headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_bad_uploads_and_unknown_photos(client, signup):
+    headers, _ = signup()
+    assert upload(client, headers, b"not an image").status_code == 415
+    assert client.post("/api/photos", headers=headers, json={"photo": "x"}).status_code == 400
+    assert client.get("/api/photos/" + "0" * 64).status_code == 404
+    assert client.get("/api/photos/not-a-hash").status_code == 404
@@ -0,0 +1,93 @@
+from sqlalchemy import select
+
+from config import db
+from models import PasswordResetToken
+
+
+def refresh(client, refresh_token):
+    return client.post("/api/token/refresh", headers={"Authorization": f"Bearer {refresh_token}"})
+
+
+def test_refresh_rotates_the_pair(client, signup):
+    _, tokens = signup()
+
+    response = refresh(client, tokens["refresh_token"])
+    assert response.status_code == 200
+    rotated = response.get_json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    assert client.get("/api/user", headers={"Authorization": f"Bearer {rotated['access_token']}"}).status_code == 200
+    assert refresh(client, rotated["refresh_token"]).status_code == 200
+
+
+def test_reusing_a_rotated_refresh_token_revokes_the_whole_chain(client, signup):
+    _, tokens = signup()
+    rotated = refresh(client, tokens["refresh_token"]).get_json()
+
+    # The old token shows up again: someone else has a copy
+    reused = refresh(client, tokens["refresh_token"])
+    assert reused.status_code == 401
+    assert reused.get_json() == {"error": "Token has been revoked"}
+
+    # ...so the legitimate holder's newer token is refused too and they must log in again
+    assert refresh(client, rotated["refresh_token"]).status_code == 401
+
+
+def test_reuse_only_revokes_its_own_chain(client, signup):
+    _, first_login = signup()
+    second_login = client.post("/api/login", json={"email": "alex@example.com", "password": "secret1"}).get_json()
+
+    refresh(client, first_login["refresh_token"])
+    assert refresh(client, first_login["refresh_token"]).status_code == 401
+
+    assert refresh(client, second_login["refresh_token"]).status_code == 200
+
+
+def test_access_token_is_not_accepted_for_refresh(client, signup):
+    _, tokens = signup()
+    assert refresh(client, tokens["access_token"]).status_code == 422
+
+
+def bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_password_change_ends_other_sessions_but_not_this_one(client, signup):
+    headers, tokens = signup()
+
+    response = client.patch("/api/user/update", headers=headers, json={"password": "secret2"})
+    assert response.status_code == 200
+    fresh = response.get_json()
+
+    assert client.get("/api/user", headers=headers).status_code == 401
+    assert refresh(client, tokens["refresh_token"]).status_code == 401
+    assert client.get("/api/user", headers=bearer(fresh["access_token"])).status_code == 200
+    assert refresh(client, fresh["refresh_token"]).status_code == 200
+
+
+def test_email_change_keeps_sessions(client, signup):
+    headers, tokens = signup()
+    response = client.patch("/api/user/update", headers=headers, json={"email": "sam@example.com"})
+    assert "access_token" not in response.get_json()
+    assert refresh(client, tokens["refresh_token"]).status_code == 200
+
+
+def test_password_reset_ends_every_session(app, client, signup):
+    headers, tokens = signup()
+    client.post("/api/forgot-password", json={"email": "alex@example.com"})
+    with app.app_context():
+        reset_token = db.session.scalars(select(PasswordResetToken.token)).one()
+
+    assert client.post("/api/reset-password", json={"token": reset_token, "new_password": "secret2"}).status_code == 200
+    assert client.get("/api/user", headers=headers).get_json() == {"error": "Token has been revoked"}
+    assert refresh(client, tokens["refresh_token"]).status_code == 401
+    assert client.post("/api/login", json={"email": "alex@example.com", "password": "secret2"}).status_code == 200
+
+
+def test_rotation_cannot_outlive_the_family_max_age(app, client, signup, monkeypatch):
+    _, tokens = signup()
+    rotated = refresh(client, tokens["refresh_token"]).get_json()
+
+    monkeypatch.setitem(app.config, "JWT_REFRESH_FAMILY_MAX_AGE", -1)  # The chain's login is now too old
+    response = refresh(client, rotated["refresh_token"])
+    assert response.status_code == 401
+    assert response.get_json() == {"error": "Session expired, please log in again"}
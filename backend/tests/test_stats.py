@@ -0,0 +1,101 @@
+from datetime import date
+
+from config import db, event_stats
+from models import EventMonthStat
+from stats import StatsDelta
+
+
+def days_with(day_counts, value=1):
+    return [index + 1 for index, count in enumerate(day_counts) if count == value]
+
+
+def test_range_across_a_month_boundary_counts_once_and_covers_every_day():
+    delta = StatsDelta()
+    delta.add(date(2025, 1, 30), date(2025, 1, 30), date(2025, 2, 2))
+
+    changes = delta.changed()
+    assert sorted(changes) == [date(2025, 1, 1), date(2025, 2, 1)]
+    january, february = changes[date(2025, 1, 1)], changes[date(2025, 2, 1)]
+    assert (january[0], february[0]) == (1, 0)  # Counted in the month it starts
+    assert days_with(january[1]) == [30, 31]
+    assert days_with(february[1]) == [1, 2]
+
+
+def test_range_across_a_year_and_a_leap_day():
+    delta = StatsDelta()
+    delta.add(date(2023, 12, 31), date(2023, 12, 31), date(2024, 3, 1))
+
+    changes = delta.changed()
+    assert sorted(changes) == [date(2023, 12, 1), date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)]
+    assert days_with(changes[date(2023, 12, 1)][1]) == [31]
+    assert days_with(changes[date(2024, 2, 1)][1]) == list(range(1, 30))
+    assert days_with(changes[date(2024, 3, 1)][1]) == [1]
+
+
+def test_remove_cancels_add_and_moves_are_net_changes():
+    delta = StatsDelta()
+    delta.add(date(2025, 1, 31), date(2025, 1, 31), date(2025, 2, 1))
+    delta.remove(date(2025, 1, 31), date(2025, 1, 31), date(2025, 2, 1))
+    assert not delta
+
+    delta.remove(date(2025, 1, 31), date(2025, 1, 31), date(2025, 2, 1))
+    delta.add(date(2025, 2, 1))
+    changes = delta.changed()
+    assert changes[date(2025, 1, 1)][0] == -1 and days_with(changes[date(2025, 1, 1)][1], -1) == [31]
+    assert changes[date(2025, 2, 1)][0] == 1 and not any(changes[date(2025, 2, 1)][1])  # Day 1 was covered before too
+
+
+def test_a_date_without_a_full_range_is_a_single_day():
+    delta = StatsDelta()
+    delta.add(date(2025, 5, 4), date(2025, 5, 1), None)
+    assert days_with(delta.changed()[date(2025, 5, 1)][1]) == [4]
+
+
+def rollup(app, user_id=1):
+    with app.app_context():
+        return {
+            row.month: (row.event_count, list(row.day_counts))
+            for row in db.session.scalars(db.select(EventMonthStat).where(EventMonthStat.user_id == user_id))
+        }
+
+
+def rebuilt(app):
+    with app.app_context():
+        event_stats.rebuild()
+    return rollup(app)
+
+
+def test_write_routes_keep_the_rollup_equal_to_a_rebuild(app, client, signup):
+    headers, _ = signup()
+    trip = client.post("/api/events", headers=headers, json={
+        "title": "Trip", "date": "2025-01-30", "range_start": "2025-01-30", "range_end": "2025-02-02",
+    }).get_json()["event"]
+    client.post("/api/events", headers=headers, json={"title": "Dinner", "date": "2025-02-01"})
+    incremental = rollup(app)
+    assert incremental == rebuilt(app)
+    assert incremental[date(2025, 2, 1)][0] == 1 and days_with(incremental[date(2025, 2, 1)][1], 2) == [1]
+
+    # Move the trip entirely into March: January empties out and its row goes away
+    client.put(f"/api/events/{trip['id']}", headers=headers, json={
+        "title": "Trip", "date": "2025-03-30", "range_start": "2025-03-30", "range_end": "2025-04-01",
+    })
+    incremental = rollup(app)
+    assert date(2025, 1, 1) not in incremental
+    assert incremental == rebuilt(app)
+
+    client.delete(f"/api/events/{trip['id']}", headers=headers)
+    assert rollup(app) == rebuilt(app) == {date(2025, 2, 1): (1, [1] + [0] * 30)}
+
+
+def test_stats_endpoint_reports_streaks_across_months(client, signup):
+    headers, _ = signup()
+    client.post("/api/events", headers=headers, json={
+        "title": "Weekend", "date": "2025-02-28", "range_start": "2025-02-28", "range_end": "2025-03-02",
+    })
+
+    stats = client.get("/api/stats", headers=headers, query_string={"today": "2025-03-03"}).get_json()
+
+    assert stats["totals"] == {"events": 1, "active_days": 3, "months": 2}
+    assert stats["streaks"]["current_days"] == 3
+    assert stats["streaks"]["current_months"] == 2
+    assert stats["last_date"] == "2025-03-02" and stats["days_since_last_date"] == 1